@@ -6,9 +6,22 @@ import pandas as pd
 import plotly.express as px
 import streamlit as st
 
-from boilerplate_filter import BoilerplateFilter
 from document_loader import DocumentLoader
 from redflag_engine import RedFlagAnalyzer
+from redflag_pipeline import RedFlagPipeline
+from result_cache import ResultCache
+
+
+@st.cache_resource
+def _get_analyzer() -> RedFlagAnalyzer:
+    """One analyzer per server process; its result cache absorbs re-renders."""
+    return RedFlagAnalyzer(cache=ResultCache(maxsize=256))
+
+
+@st.cache_resource
+def _get_pipeline(use_filter: bool) -> RedFlagPipeline:
+    """Filter + analyzer pipeline sharing the process-wide analyzer."""
+    return RedFlagPipeline(_get_analyzer(), use_filter=use_filter)
 
 
 # ==========================================
@@ -202,20 +215,12 @@ with st.sidebar:
                 for warn in load_result.warnings:
                     st.warning(warn)
 
-                # Boilerplate filter
-                filter_result = None
-                if filter_enabled:
-                    bp_filter = BoilerplateFilter()
-                    filter_result = bp_filter.filter(load_result.text)
-                    text_content = filter_result.filtered_text
-                else:
-                    text_content = load_result.text
-
                 with st.spinner("Running RedFlag analysis..."):
-                    analyzer = RedFlagAnalyzer()
-                    result = analyzer.analyze(text_content)
-                    st.session_state["custom_analysis"] = result
-                    st.session_state["custom_text"] = text_content
+                    # Boilerplate filter + analysis
+                    run = _get_pipeline(filter_enabled).analyze_text(load_result.text)
+                    filter_result = run.filter_result
+                    st.session_state["custom_analysis"] = run.result
+                    st.session_state["custom_text"] = run.text
                     st.session_state["load_meta"] = {
                         "format": load_result.format,
                         "chars": load_result.char_count,
@@ -291,6 +296,8 @@ if "custom_analysis" in st.session_state:
                     f"**Severity:** {flag.get('severity', 'N/A')} (Score: {flag.get('score', 'N/A')})"
                 )
                 st.markdown(f"**Evidence:** {', '.join(flag.get('evidence', []))}")
+                for span in flag.get("evidence_spans", []):
+                    st.caption(f"chars {span['start']:,}–{span['end']:,}: …{span['context']}…")
                 st.markdown(f"**Explanation:** {flag.get('explanation', 'N/A')}")
                 st.markdown(f"**Recommended Action:** {flag.get('recommended_action', 'N/A')}")
     else:
@@ -0,0 +1,113 @@
+"""
+bench_pipeline.py
+
+Benchmark: RedFlagPipeline.analyze_text against the separate stages
+(BoilerplateFilter.filter, then RedFlagAnalyzer.analyze on the filtered
+text), on the example notes with and without boilerplate to strip.
+
+Exits with status 1 if the pipeline is slower than the separate stages on
+any case, by more than --tolerance (the median of paired measurements).
+
+Usage:
+    python benchmarks/bench_pipeline.py [--copies 1 20] [--tolerance 0.05]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from boilerplate_filter import BoilerplateFilter  # noqa: E402
+from redflag_engine import RedFlagAnalyzer  # noqa: E402
+from redflag_pipeline import RedFlagPipeline  # noqa: E402
+
+_EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
+
+_DISCLAIMER = (
+    "DISCLAIMER\n"
+    "This report is for informational purposes only and does not constitute "
+    "investment advice. Past performance is not indicative of future results.\n\n"
+    "This report is for institutional investors only."
+)
+
+
+def _documents(copies: int):
+    """``(label, text)`` pairs: each example repeated *copies* times, then the lot with disclaimers."""
+    notes = [
+        (_EXAMPLES / name).read_text(encoding="utf-8") for name in sorted(os.listdir(_EXAMPLES))
+    ]
+    plain = "\n\n".join(notes * copies)
+    stripped = "\n\n".join(note + "\n\n" + _DISCLAIMER for note in notes * copies)
+    yield f"{len(notes) * copies} notes, nothing to strip", plain
+    yield f"{len(notes) * copies} notes, disclaimers", stripped
+
+
+def _compare(base, candidate, number: int, repeat: int):
+    """
+    Best per-call CPU time of *base* and *candidate*, and the median ratio.
+
+    The two are timed alternately and each pair gives a ratio, so drift in
+    machine speed between measurements does not favour either.
+    """
+    timers = [timeit.Timer(fn, timer=time.process_time) for fn in (base, candidate)]
+    best = [float("inf")] * 2
+    ratios = []
+    for _ in range(repeat):
+        pair = [timer.timeit(number) for timer in timers]
+        best = [min(b, t) for b, t in zip(best, pair)]
+        ratios.append(pair[1] / pair[0])
+    return best[0] / number, best[1] / number, statistics.median(ratios)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Pipeline vs separate stages")
+    parser.add_argument(
+        "--copies", type=int, nargs="+", default=[1, 20], help="Copies of each example note"
+    )
+    parser.add_argument("--repeat", type=int, default=15, help="Measurement pairs")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.05,
+        help="Allowed slowdown of the pipeline before failing (fraction)",
+    )
+    args = parser.parse_args()
+
+    analyzer = RedFlagAnalyzer()
+    bp_filter = BoilerplateFilter(protected=analyzer.protected_keywords)
+    pipeline = RedFlagPipeline(analyzer)
+
+    def stages(text: str):
+        return analyzer.analyze(bp_filter.filter(text).filtered_text)
+
+    print(f"{'case':<32} {'stages us':>10} {'pipeline us':>12} {'ratio':>6}")
+    print("-" * 63)
+    slower = []
+    for copies in args.copies:
+        for label, text in _documents(copies):
+            number = max(1, 200 // copies)
+            base, piped, ratio = _compare(
+                lambda t=text: stages(t),
+                lambda t=text: pipeline.analyze_text(t),
+                number,
+                args.repeat,
+            )
+            print(f"{label:<32} {base * 1e6:>10.1f} {piped * 1e6:>12.1f} {ratio:>6.2f}")
+            if ratio > 1 + args.tolerance:
+                slower.append(label)
+
+    if slower:
+        print(f"\nFAIL: pipeline slower than the separate stages on: {', '.join(slower)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
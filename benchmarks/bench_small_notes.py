@@ -0,0 +1,62 @@
+"""
+bench_small_notes.py
+
+Microbenchmark: per-call overhead of RedFlagAnalyzer on small (~1 KB) notes,
+where fixed costs (normalization, rule evaluation, output assembly) dominate
+the keyword scan.
+
+Usage:
+    python benchmarks/bench_small_notes.py [--size 1024] [--number 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from redflag_engine import RedFlagAnalyzer  # noqa: E402
+from text_normalizer import normalize_text  # noqa: E402
+
+_EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
+
+
+def _note(name: str, size: int) -> str:
+    text = (_EXAMPLES / name).read_text(encoding="utf-8")
+    return (text * (size // max(len(text), 1) + 1))[:size]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-call overhead on small notes")
+    parser.add_argument("--size", type=int, default=1024, help="Note size in characters")
+    parser.add_argument("--number", type=int, default=2000, help="Calls per measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="Measurements (best is reported)")
+    args = parser.parse_args()
+
+    analyzer = RedFlagAnalyzer()
+    cases = [
+        ("construct analyzer", lambda: RedFlagAnalyzer()),
+    ]
+    for name in ("analyst_note_clean.txt", "analyst_note_risky.txt"):
+        note = _note(name, args.size)
+        label = name.replace("analyst_note_", "").replace(".txt", "")
+        flags = len(analyzer.analyze(note)["flags"])
+        cases += [
+            (f"normalize ({label})", lambda n=note: normalize_text(n)),
+            (f"analyze full ({label}, {flags} flags)", lambda n=note: analyzer.analyze(n)),
+            (f"analyze gate ({label})", lambda n=note: analyzer.analyze(n, mode="gate")),
+        ]
+
+    print(f"{'case':<40} {'us/call':>10}")
+    print("-" * 51)
+    for label, fn in cases:
+        best = min(timeit.repeat(fn, number=args.number, repeat=args.repeat))
+        print(f"{label:<40} {best / args.number * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
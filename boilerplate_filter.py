@@ -14,42 +14,30 @@ Design goals:
 
 from __future__ import annotations
 
+import itertools
 import re
+from bisect import bisect_right
 from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Callable, Iterable, Iterator, NamedTuple
+
+from keyword_matcher import KeywordMatcher
+from redflag_engine import RedFlagAnalyzer
 
 # ---------------------------------------------------------------------------
-# Protected keywords — drawn from redflag_engine.DEFAULT_THRESHOLDS
-# Any paragraph containing one of these is NEVER stripped.
+# Protected keywords — the `protect` vocabulary of the engine's rules
+# (see redflag_engine._default_rules). Any paragraph containing one of these
+# is NEVER stripped.
 # ---------------------------------------------------------------------------
-DEFAULT_PROTECTED_KEYWORDS: list[str] = [
-    # MNPI / tipping
-    "friend",
-    "investigator",
-    "off the record",
-    "not public",
-    "leak",
-    "insider",
-    "told me",
-    "said things look good",
-    "preliminary results",
-    # Options / leverage
-    "naked call",
-    "naked calls",
-    "maximize leverage",
-    "max leverage",
-    "near max risk",
-    # Cross-border / inducements
-    "soft dollar",
-    "soft dollars",
-    "corporate access",
-    "mifid",
-    "inducement",
-    # Crowding / positioning
-    "crowded",
-    "most held short",
-    "short squeeze",
-    "13f",
-]
+_DEFAULT_PROTECTED: KeywordMatcher = RedFlagAnalyzer().protected_keywords
+DEFAULT_PROTECTED_KEYWORDS: list[str] = list(_DEFAULT_PROTECTED.keywords)
+
+
+@lru_cache(maxsize=64)
+def _extended_matcher(keywords: tuple[str, ...], extra: tuple[str, ...]) -> KeywordMatcher:
+    """Protected-keyword matcher with *extra* keywords, compiled once per config."""
+    return KeywordMatcher(keywords + extra)
+
 
 # ---------------------------------------------------------------------------
 # Boilerplate section headers (case-insensitive)
@@ -134,6 +122,115 @@ _COPYRIGHT_PATTERNS: list[str] = [
 ]
 
 
+# Literal prefilter: for each built-in pattern, words at least one of which
+# occurs in any text the pattern matches. Most paragraphs contain none of a
+# pattern's anchors, so its regex never runs on them.
+_PATTERN_ANCHORS: dict[str, tuple[str, ...]] = {
+    _DISCLAIMER_PATTERNS[0]: ("institutional",),
+    _DISCLAIMER_PATTERNS[1]: ("performance",),
+    _DISCLAIMER_PATTERNS[2]: ("believed",),
+    _DISCLAIMER_PATTERNS[3]: ("advice",),
+    _DISCLAIMER_PATTERNS[4]: ("warranty",),
+    _DISCLAIMER_PATTERNS[5]: ("guarantee", "warrant", "assure"),
+    _DISCLAIMER_PATTERNS[6]: ("investing",),
+    _DISCLAIMER_PATTERNS[7]: ("advi",),
+    _CERTIFICATION_PATTERNS[0]: ("hereby",),
+    _CERTIFICATION_PATTERNS[1]: ("accurately",),
+    _CERTIFICATION_PATTERNS[2]: ("compensation",),
+    _CERTIFICATION_PATTERNS[3]: ("analyst",),
+    _DISTRIBUTION_PATTERNS[0]: ("reproduced", "distributed", "copied", "forwarded"),
+    _DISTRIBUTION_PATTERNS[1]: ("distribution",),
+    _DISTRIBUTION_PATTERNS[2]: ("investor",),
+    _DISTRIBUTION_PATTERNS[3]: ("forward", "distribute", "copy", "reproduce"),
+    _REGULATORY_PATTERNS[0]: ("registered", "regulated"),
+    _REGULATORY_PATTERNS[1]: ("member",),
+    _REGULATORY_PATTERNS[2]: ("conduct",),
+    _REGULATORY_PATTERNS[3]: ("through",),
+    _CONFIDENTIALITY_PATTERNS[0]: ("confidential",),
+    _CONFIDENTIALITY_PATTERNS[1]: ("received",),
+    _CONFIDENTIALITY_PATTERNS[2]: ("proprietary", "confidential"),
+    _COPYRIGHT_PATTERNS[0]: ("\u00a9", "copyright"),
+    _COPYRIGHT_PATTERNS[1]: ("reserved",),
+}
+
+# IGNORECASE matches these against ASCII "i" / "s" and str.lower() keeps them,
+# so the prefilter is skipped for paragraphs containing either.
+_DOTLESS_I = "\u0131"
+_LONG_S = "\u017f"
+
+
+# ---------------------------------------------------------------------------
+# Paragraph classifier
+# ---------------------------------------------------------------------------
+class _ParagraphClassifier:
+    """
+    Ordered paragraph patterns behind a literal prefilter.
+
+    Patterns are tried in order and the first match wins, exactly as before,
+    but a pattern with anchors (see ``_PATTERN_ANCHORS``) is only searched
+    when one of its anchor words occurs in the paragraph; ``in`` checks are
+    far cheaper than a regex scan. Custom patterns have no anchors and are
+    always searched.
+    """
+
+    __slots__ = ("_patterns", "_anchors")
+
+    def __init__(self, patterns: tuple[tuple[str, str], ...]) -> None:
+        self._patterns: list[tuple[re.Pattern[str], str, frozenset[str] | None]] = []
+        for source, category in patterns:
+            anchors = _PATTERN_ANCHORS.get(source)
+            self._patterns.append(
+                (
+                    re.compile(source, re.IGNORECASE),
+                    category,
+                    frozenset(anchors) if anchors else None,
+                )
+            )
+        # Every distinct anchor, each looked up once per paragraph
+        self._anchors = tuple(sorted({w for _, _, a in self._patterns if a for w in a}))
+
+    def __bool__(self) -> bool:
+        return bool(self._patterns)
+
+    def match(self, lower_text: str) -> str | None:
+        """Category of the first pattern, in order, found in *lower_text*."""
+        present = None
+        if _DOTLESS_I not in lower_text and _LONG_S not in lower_text:
+            present = frozenset(filter(lower_text.__contains__, self._anchors))
+        for compiled, category, anchors in self._patterns:
+            if present is not None and anchors is not None and present.isdisjoint(anchors):
+                continue
+            if compiled.search(lower_text):
+                return category
+        return None
+
+    def for_document(self, document: str) -> _ParagraphClassifier:
+        """
+        Narrow the classifier to the paragraphs of lower-cased *document*.
+
+        An anchor absent from the document is absent from each of its
+        paragraphs, so patterns without a present anchor are dropped and the
+        rest only look up the anchors the document contains.
+        """
+        if _DOTLESS_I in document or _LONG_S in document:
+            return self
+        present = frozenset(filter(document.__contains__, self._anchors))
+        narrowed = object.__new__(_ParagraphClassifier)
+        narrowed._patterns = [
+            (compiled, category, anchors if anchors is None else anchors & present)
+            for compiled, category, anchors in self._patterns
+            if anchors is None or not anchors.isdisjoint(present)
+        ]
+        narrowed._anchors = tuple(sorted(present))
+        return narrowed
+
+
+@lru_cache(maxsize=64)
+def _paragraph_classifier(patterns: tuple[tuple[str, str], ...]) -> _ParagraphClassifier:
+    """Classifier for an ordered ``(source, category)`` tuple, compiled once per config."""
+    return _ParagraphClassifier(patterns)
+
+
 # ---------------------------------------------------------------------------
 # Configuration
 # ---------------------------------------------------------------------------
@@ -155,15 +252,66 @@ class BoilerplateFilterConfig:
 # ---------------------------------------------------------------------------
 # Result
 # ---------------------------------------------------------------------------
+class FilterRegion(NamedTuple):
+    """A ``[start, end)`` span of the original text and what happened to it."""
+
+    start: int
+    end: int
+    category: str  # "kept", "section:<header>" or "paragraph:<category>"
+
+
 @dataclass
 class FilterResult:
-    """Result of boilerplate filtering."""
+    """
+    Result of boilerplate filtering.
+
+    The filtered text is described by `kept_regions`, spans of the original
+    text joined with `separators` (``separators[i]`` precedes region ``i``),
+    and is only materialized when `filtered_text` is first read. Removed
+    boilerplate is listed in `removed_regions`, in document order.
+    """
 
-    filtered_text: str
     original_length: int
     filtered_length: int
     sections_removed: list[str]
     chars_removed: int
+    kept_regions: list[FilterRegion] = field(default_factory=list)
+    removed_regions: list[FilterRegion] = field(default_factory=list)
+    separators: list[str] = field(default_factory=list, repr=False)
+    source: str = field(default="", repr=False, compare=False)
+    _filtered_text: str | None = field(default=None, init=False, repr=False, compare=False)
+    _filtered_starts: list[int] | None = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def filtered_text(self) -> str:
+        """The filtered text, joined from the kept regions on first access."""
+        if self._filtered_text is None:
+            source = self.source
+            self._filtered_text = "".join(
+                sep + source[region.start : region.end]
+                for sep, region in zip(self.separators, self.kept_regions)
+            )
+        return self._filtered_text
+
+    def to_original(self, pos: int) -> int:
+        """
+        Map offset *pos* in `filtered_text` to an offset in the original text.
+
+        Offsets inside a separator map to the start of the region after it;
+        ``filtered_length`` maps to the end of the last kept region.
+        """
+        if self._filtered_starts is None:
+            starts, offset = [], 0
+            for sep, region in zip(self.separators, self.kept_regions):
+                offset += len(sep)
+                starts.append(offset)
+                offset += region.end - region.start
+            self._filtered_starts = starts
+        if not self.kept_regions:
+            return 0
+        i = max(bisect_right(self._filtered_starts, pos) - 1, 0)
+        region = self.kept_regions[i]
+        return min(region.start + max(pos - self._filtered_starts[i], 0), region.end)
 
 
 # ---------------------------------------------------------------------------
@@ -175,12 +323,23 @@ class BoilerplateFilter:
 
     Conservative by design: only removes clearly boilerplate content.
     When in doubt, keeps the text.
+
+    Args:
+        config: Filter configuration (default: everything enabled).
+        protected: Protected-keyword matcher, normally
+            ``analyzer.protected_keywords`` so the filter protects exactly the
+            vocabulary of the analyzer's rules (custom rules included).
+            Defaults to the built-in rules' vocabulary.
     """
 
-    def __init__(self, config: BoilerplateFilterConfig | None = None) -> None:
+    def __init__(
+        self,
+        config: BoilerplateFilterConfig | None = None,
+        protected: KeywordMatcher | None = None,
+    ) -> None:
         self._config = config or BoilerplateFilterConfig()
         self._paragraph_patterns = self._build_paragraph_patterns()
-        self._protected = self._build_protected_keywords()
+        self._protected = self._build_protected_keywords(protected or _DEFAULT_PROTECTED)
 
         # Pre-compile section header regexes
         self._boilerplate_header_re = re.compile(
@@ -196,127 +355,314 @@ class BoilerplateFilter:
     # Public API
     # ------------------------------------------------------------------
 
-    def filter(self, text: str) -> FilterResult:
-        """Strip boilerplate from *text* and return a FilterResult."""
+    @property
+    def protected_keywords(self) -> KeywordMatcher:
+        """Compiled protected vocabulary: the rules' plus any configured extras."""
+        return self._protected
+
+    def filter(
+        self,
+        text: str,
+        candidates: Iterable[str] | None = None,
+        normalized: str | None = None,
+        memo: dict[str, str | None] | None = None,
+    ) -> FilterResult:
+        """
+        Strip boilerplate from *text* and return a FilterResult.
+
+        Args:
+            text: The document text.
+            candidates: Protected keywords that may occur in *text*, e.g. those
+                a keyword scan of the whole document found. Only
+                these are searched for in each paragraph; default: all of
+                `protected_keywords`.
+            normalized: *text* as normalized by the analyzer, if already
+                computed. Boilerplate patterns whose anchor words it lacks are
+                not tried on any paragraph.
+            memo: Paragraph decisions (matched category, or None to keep)
+                from earlier calls on this filter, keyed by paragraph text.
+                Looked up before classifying and updated after, so paragraphs
+                unchanged between versions of a draft are not classified
+                again (see RedFlagSession).
+
+        One pass over the text: section state (pass 1) decides which lines
+        survive, and surviving lines are grouped into paragraphs (pass 2) as
+        they arrive. Runs of non-blank lines that cannot start or end a
+        section pass through pass 1 as a whole. Kept and removed text is
+        reported as offset regions of *text*; nothing is copied out until
+        ``filtered_text`` is read.
+        """
         original_length = len(text)
 
-        if not self._config.enabled or not text.strip():
+        if not self._config.enabled or not text or text.isspace():
             return FilterResult(
-                filtered_text=text,
                 original_length=original_length,
-                filtered_length=len(text),
+                filtered_length=original_length,
                 sections_removed=[],
                 chars_removed=0,
+                kept_regions=[FilterRegion(0, original_length, "kept")] if text else [],
+                separators=[""] if text else [],
+                source=text,
             )
 
-        sections_removed: list[str] = []
-
-        # Pass 1 — section-level removal
-        text = self._remove_boilerplate_sections(text, sections_removed)
-
-        # Pass 2 — paragraph-level pattern matching
-        text = self._remove_boilerplate_paragraphs(text, sections_removed)
-
-        # Clean up excessive blank lines
-        text = re.sub(r"\n{3,}", "\n\n", text).strip()
+        removed_sections: list[FilterRegion] = []
+        removed_paragraphs: list[FilterRegion] = []
+        paragraph_records: list[str] = []
+        if candidates is None:
+            contains_protected = self._protected.search_any
+        else:
+            contains_protected = _contains_any(tuple(candidates))
+        lines = self._kept_lines(text, contains_protected, removed_sections)
+        if self._paragraph_patterns:
+            classifier = self._paragraph_patterns
+            if normalized is not None:
+                classifier = classifier.for_document(normalized)
+            pieces = self._kept_paragraphs(
+                text,
+                lines,
+                contains_protected,
+                classifier,
+                removed_paragraphs,
+                paragraph_records,
+                memo,
+            )
+        else:
+            pieces = _collapse_empty_lines(lines)
+        kept, separators = _layout(text, pieces)
 
-        filtered_length = len(text)
+        filtered_length = sum(r.end - r.start for r in kept) + sum(map(len, separators))
         return FilterResult(
-            filtered_text=text,
             original_length=original_length,
             filtered_length=filtered_length,
-            sections_removed=sections_removed,
+            sections_removed=[r.category for r in removed_sections] + paragraph_records,
             chars_removed=original_length - filtered_length,
+            kept_regions=kept,
+            removed_regions=sorted(removed_sections + removed_paragraphs),
+            separators=separators,
+            source=text,
         )
 
+    def filter_stream(self, pages: Iterable[str]) -> Iterator[str]:
+        """
+        Filter a document supplied page by page, yielding filtered text as it
+        becomes final.
+
+        The pieces, joined with blank lines, are
+        ``filter("\n\n".join(pages)).filtered_text`` up to whitespace: they
+        normalize to the same text. A page that leaves a boilerplate section
+        open is held back, since a substantive header on a later page may
+        close the section; held pages are filtered again together with the
+        next one. Pages that fall wholly inside an open section (no
+        substantive header, no protected keyword) are skipped unfiltered.
+
+        Args:
+            pages: Page texts in document order, e.g. ``DocumentLoader.iter_pages``.
+        """
+        pending = ""
+        section_open = False
+        for page in pages:
+            if not page or page.isspace():
+                continue  # only blank lines: they never change a section
+            if (
+                section_open
+                and self._substantive_header_re.search(page) is None
+                and not self._protected.search_any(page.lower())
+            ):
+                continue
+            pending = f"{pending}\n\n{page}" if pending else page
+            result = self.filter(pending)
+            # An open section runs to the end of the text, trailing blanks included.
+            text_end = len(pending.rstrip())
+            section_open = any(
+                region.end >= text_end and region.category.startswith("section:")
+                for region in result.removed_regions
+            )
+            if not section_open:
+                if result.filtered_length:
+                    yield result.filtered_text
+                pending = ""
+        if section_open and result.filtered_length:
+            yield result.filtered_text
+
     # ------------------------------------------------------------------
     # Pass 1: section-level removal
     # ------------------------------------------------------------------
 
-    def _remove_boilerplate_sections(self, text: str, sections_removed: list[str]) -> str:
-        """Remove entire sections that start with boilerplate headers."""
-        lines = text.split("\n")
-        result_lines: list[str] = []
+    def _kept_lines(
+        self,
+        text: str,
+        contains_protected: Callable[[str], bool],
+        removed: list[FilterRegion],
+    ) -> Iterator[tuple[int, int, bool]]:
+        """
+        Yield ``(start, end, blank)`` for the lines of *text* outside a
+        boilerplate section. A section runs from a boilerplate header to the
+        next substantive header, or to the first line with a protected keyword;
+        each removed section is appended to *removed*.
+
+        Blank lines never change the section state, so the text is walked one
+        block (a run of non-blank lines) at a time. A block outside a section
+        without a boilerplate header is yielded whole, as one multi-line
+        entry; a block inside a section with no header and no protected
+        keyword is dropped whole. Other blocks are walked line by line.
+        """
+        boilerplate_header = self._boilerplate_header_re.search
+        substantive_header = self._substantive_header_re.search
         in_boilerplate_section = False
         current_section_header = ""
+        section_start = section_end = 0
+        start = 0
+        size = len(text)
+
+        for block in _BLOCK_RE.finditer(text):
+            block_start, block_end = block.span()
+
+            # Blank lines before the block: part of the section, or kept
+            if start < block_start:
+                if in_boilerplate_section:
+                    section_end = block_start - 1
+                elif text.find("\n", start, block_start - 1) < 0:
+                    yield start, block_start - 1, True
+                else:
+                    for line_start, end in _line_spans(text, start, block_start - 1):
+                        yield line_start, end, True
+            start = block_end + 1
+
+            # The header regexes match at line starts, so a search of the whole
+            # block finds every header line (and rarely a header split over
+            # two lines, which only sends the block down the slow path).
+            if boilerplate_header(text, block_start, block_end) is None:
+                if not in_boilerplate_section:
+                    yield block_start, block_end, False
+                    continue
+                if substantive_header(text, block_start, block_end) is None and not (
+                    contains_protected(text[block_start:block_end].lower())
+                ):
+                    section_end = block_end
+                    continue
 
-        for line in lines:
-            stripped = line.strip()
-
-            # Check if this line is a boilerplate section header
-            if self._boilerplate_header_re.match(stripped):
-                # Check protected keywords in the header itself (unlikely but safe)
-                if not self._contains_protected_keyword(stripped):
-                    in_boilerplate_section = True
-                    current_section_header = stripped
+            for line_start, end in _line_spans(text, block_start, block_end):
+                stripped = text[line_start:end].strip()
+
+                # Check if this line is a boilerplate section header
+                if self._boilerplate_header_re.match(stripped):
+                    # Check protected keywords in the header itself (unlikely but safe)
+                    if not contains_protected(stripped.lower()):
+                        if not in_boilerplate_section:
+                            section_start = line_start
+                        in_boilerplate_section = True
+                        current_section_header = stripped
+                        section_end = end
+                        continue
+
+                # Check if a substantive header ends the boilerplate section
+                if in_boilerplate_section and self._substantive_header_re.match(stripped):
+                    in_boilerplate_section = False
+                    removed.append(
+                        FilterRegion(
+                            section_start, section_end, f"section:{current_section_header}"
+                        )
+                    )
+
+                if in_boilerplate_section:
+                    # Still check protected keywords — if found, stop removing
+                    if contains_protected(stripped.lower()):
+                        in_boilerplate_section = False
+                        removed.append(
+                            FilterRegion(
+                                section_start, section_end, f"section:{current_section_header}"
+                            )
+                        )
+                        yield line_start, end, False
+                    else:
+                        # Otherwise skip this line (it's part of a boilerplate section)
+                        section_end = end
                     continue
 
-            # Check if a substantive header ends the boilerplate section
-            if in_boilerplate_section and self._substantive_header_re.match(stripped):
-                in_boilerplate_section = False
-                if current_section_header:
-                    sections_removed.append(f"section:{current_section_header}")
-                    current_section_header = ""
+                yield line_start, end, False
 
+        # Blank lines after the last block
+        for line_start, end in _line_spans(text, start, size):
             if in_boilerplate_section:
-                # Still check protected keywords — if found, stop removing
-                if self._contains_protected_keyword(stripped):
-                    in_boilerplate_section = False
-                    if current_section_header:
-                        sections_removed.append(f"section:{current_section_header}")
-                        current_section_header = ""
-                    result_lines.append(line)
-                # Otherwise skip this line (it's part of a boilerplate section)
-                continue
-
-            result_lines.append(line)
+                section_end = end
+            else:
+                yield line_start, end, True
 
         # If we ended while still in a boilerplate section, record it
-        if in_boilerplate_section and current_section_header:
-            sections_removed.append(f"section:{current_section_header}")
-
-        return "\n".join(result_lines)
+        if in_boilerplate_section:
+            removed.append(
+                FilterRegion(section_start, section_end, f"section:{current_section_header}")
+            )
 
     # ------------------------------------------------------------------
     # Pass 2: paragraph-level pattern matching
     # ------------------------------------------------------------------
 
-    def _remove_boilerplate_paragraphs(self, text: str, sections_removed: list[str]) -> str:
-        """Remove individual paragraphs that match boilerplate patterns."""
-        if not self._paragraph_patterns:
-            return text
-
-        paragraphs = re.split(r"\n\s*\n", text)
-        kept: list[str] = []
-
-        for para in paragraphs:
-            stripped = para.strip()
-            if not stripped:
+    def _kept_paragraphs(
+        self,
+        text: str,
+        lines: Iterable[tuple[int, int, bool]],
+        contains_protected: Callable[[str], bool],
+        classifier: _ParagraphClassifier,
+        removed: list[FilterRegion],
+        sections_removed: list[str],
+        memo: dict[str, str | None] | None = None,
+    ) -> Iterator[tuple[str, int, int]]:
+        """
+        Group kept lines into paragraphs and yield the lines of those that are
+        not boilerplate as ``(separator, start, end)`` pieces.
+
+        A paragraph is a run of consecutive kept lines, none blank, exactly
+        the non-empty pieces ``re.split(r"\\n\\s*\\n")`` yields on the kept
+        lines joined with newlines. Blank lines only separate paragraphs; at
+        the edges of the output they would be stripped anyway.
+        """
+        classify = classifier.match
+        runs: list[list[int]] = []  # [start, end] of contiguous kept lines
+        for start, end, blank in itertools.chain(lines, [(0, 0, True)]):
+            if not blank:
+                if runs and runs[-1][1] + 1 == start:
+                    runs[-1][1] = end
+                else:
+                    runs.append([start, end])
                 continue
-
-            # Never remove paragraphs containing protected keywords
-            if self._contains_protected_keyword(stripped):
-                kept.append(para)
+            if not runs:
                 continue
-
-            # Check if this paragraph matches any boilerplate pattern
-            lower = stripped.lower()
-            matched_category = self._match_boilerplate(lower)
-            if matched_category:
-                sections_removed.append(f"paragraph:{matched_category}")
+            if len(runs) == 1:
+                para = text[runs[0][0] : runs[0][1]]
+            else:
+                para = "\n".join(text[s:e] for s, e in runs)
+            paragraph, runs = runs, []
+
+            # Never remove paragraphs containing protected keywords, and keep
+            # those matching no boilerplate pattern
+            if memo is not None and para in memo:
+                matched_category = memo[para]
+            else:
+                lower = para.strip().lower()
+                matched_category = None
+                if not contains_protected(lower):
+                    matched_category = classify(lower)
+                if memo is not None:
+                    memo[para] = matched_category
+            if not matched_category:
+                separator = "\n\n"
+                for s, e in paragraph:
+                    yield separator, s, e
+                    separator = "\n"
                 continue
 
-            kept.append(para)
-
-        return "\n\n".join(kept)
+            label = f"paragraph:{matched_category}"
+            sections_removed.append(label)
+            removed.extend(FilterRegion(s, e, label) for s, e in paragraph)
 
     # ------------------------------------------------------------------
     # Pattern building and matching
     # ------------------------------------------------------------------
 
-    def _build_paragraph_patterns(self) -> list[tuple[re.Pattern[str], str]]:
-        """Build compiled regex patterns grouped by category."""
-        patterns: list[tuple[re.Pattern[str], str]] = []
+    def _build_paragraph_patterns(self) -> _ParagraphClassifier:
+        """Build the paragraph classifier for the enabled categories."""
+        patterns: list[tuple[str, str]] = []
         cfg = self._config
 
         category_map: list[tuple[bool, list[str], str]] = [
@@ -336,28 +682,108 @@ class BoilerplateFilter:
             if not enabled:
                 continue
             for pat_str in raw_patterns:
-                patterns.append((re.compile(pat_str, re.IGNORECASE), category))
+                patterns.append((pat_str, category))
 
         # Add custom patterns
         for pat_str in cfg.custom_patterns:
-            patterns.append((re.compile(pat_str, re.IGNORECASE), "custom"))
+            patterns.append((pat_str, "custom"))
 
-        return patterns
+        return _paragraph_classifier(tuple(patterns))
 
-    def _build_protected_keywords(self) -> list[str]:
-        """Combine default + user-supplied protected keywords."""
-        keywords = list(DEFAULT_PROTECTED_KEYWORDS)
-        keywords.extend(self._config.protected_keywords)
-        return [kw.lower() for kw in keywords]
+    def _build_protected_keywords(self, protected: KeywordMatcher) -> KeywordMatcher:
+        """Extend the rule vocabulary with user-supplied protected keywords."""
+        if not self._config.protected_keywords:
+            return protected
+        extra = tuple(kw.lower() for kw in self._config.protected_keywords)
+        return _extended_matcher(protected.keywords, extra)
 
     def _contains_protected_keyword(self, text: str) -> bool:
         """Return True if *text* contains any protected keyword."""
-        lower = text.lower()
-        return any(kw in lower for kw in self._protected)
+        return self._protected.search_any(text.lower())
 
     def _match_boilerplate(self, lower_text: str) -> str | None:
         """Return the category name if *lower_text* matches a boilerplate pattern."""
-        for compiled, category in self._paragraph_patterns:
-            if compiled.search(lower_text):
-                return category
-        return None
+        return self._paragraph_patterns.match(lower_text)
+
+
+def _contains_any(keywords: tuple[str, ...]) -> Callable[[str], bool]:
+    """Keyword test for a handful of keywords, without compiling a matcher."""
+
+    def contains_any(text: str) -> bool:
+        return any(map(text.__contains__, keywords))
+
+    return contains_any
+
+
+# A block: a maximal run of lines with at least one non-space character each
+_BLOCK_RE = re.compile(r"^[^\S\n]*\S[^\n]*(?:\n[^\S\n]*\S[^\n]*)*", re.MULTILINE)
+
+
+def _line_spans(text: str, start: int, last: int) -> Iterator[tuple[int, int]]:
+    """Yield ``(start, end)`` of the lines of *text* starting at offsets *start*..*last*."""
+    while start <= last:
+        end = text.find("\n", start)
+        if end < 0:
+            end = len(text)
+        yield start, end
+        start = end + 1
+
+
+def _collapse_empty_lines(lines: Iterable[tuple[int, int, bool]]) -> Iterator[tuple[str, int, int]]:
+    """Yield kept lines as pieces, cutting runs of empty lines to one (as ``\\n{3,}`` -> ``\\n\\n``)."""
+    previous_empty = False
+    for start, end, _ in lines:
+        empty = start == end
+        if not (empty and previous_empty):
+            yield "\n", start, end
+        previous_empty = empty
+
+
+def _layout(
+    text: str, pieces: Iterable[tuple[str, int, int]]
+) -> tuple[list[FilterRegion], list[str]]:
+    """
+    Lay ``(separator, start, end)`` pieces of *text* out as kept regions.
+
+    Returns the regions and the separator before each, describing
+    ``"".join(sep + text[start:end] for each piece).strip()``: pieces whose
+    separator matches the source text between them are merged into one
+    region, empty pieces become part of the next separator, and whitespace is
+    trimmed from the outer edges.
+    """
+    starts: list[int] = []
+    ends: list[int] = []
+    separators: list[str] = []
+    pending = ""
+    for separator, start, end in pieces:
+        if not ends:
+            while start < end and text[start].isspace():
+                start += 1
+            if start < end:
+                starts.append(start)
+                ends.append(end)
+                separators.append("")
+            continue
+        pending += separator
+        if start == end:
+            continue
+        last_end = ends[-1]
+        if last_end + len(pending) == start and text[last_end:start] == pending:
+            ends[-1] = end
+        else:
+            starts.append(start)
+            ends.append(end)
+            separators.append(pending)
+        pending = ""
+
+    while ends:
+        start, end = starts[-1], ends[-1]
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if end > start:
+            ends[-1] = end
+            break
+        starts.pop()
+        ends.pop()
+        separators.pop()
+    return [FilterRegion(start, end, "kept") for start, end in zip(starts, ends)], separators
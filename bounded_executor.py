@@ -0,0 +1,155 @@
+"""
+bounded_executor.py
+
+Runs blocking extraction and analysis off an asyncio event loop.
+
+Loading and analyzing a document are blocking, CPU-bound calls. An
+asyncio-based gate service has to run them in an executor, and a plain
+``loop.run_in_executor`` queues without limit: a burst of 300-page PDFs
+takes every worker thread and the 2 KB notes submitted after them wait
+until the PDFs are done. BoundedExecutor owns a thread pool and admits
+calls to it itself:
+
+- At most ``max_workers`` calls run at once. Further callers wait, in
+  order, for a slot, so a producer that awaits each call before accepting
+  more work is held to the executor's pace (backpressure) instead of
+  piling up work in the pool's queue.
+- Calls at or above ``heavy_size`` (bytes of an upload, characters of a
+  text) run in at most ``max_workers - 1`` slots. One slot is always left
+  for small documents, however many large ones are waiting.
+- A slot is freed when its call finishes, not when its caller stops
+  waiting: cancelling a call cannot let more work run than there are slots.
+
+Extraction and rule matching hold the GIL, so the pool keeps the event
+loop responsive and shares it fairly; it does not add cores. Throughput
+across cores comes from several processes (``analyze_many``, batch mode).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Uploads (bytes) or texts (characters) at least this large use the heavy lane.
+# PDF content streams are compressed: a 60-page report can be a 40 KB file
+# that takes seconds to extract, while a 1-5 KB note analyzes in milliseconds.
+HEAVY_SIZE = 32 * 1024
+
+
+class BoundedExecutor:
+    """
+    Thread pool for blocking calls made from coroutines, with bounded concurrency.
+
+    An executor serves one event loop at a time; it may be reused by a later
+    loop (e.g. successive ``asyncio.run`` calls) once the earlier one's calls
+    are done.
+
+    Args:
+        max_workers: Calls running at once (default: the CPU count, between
+            2 and 4). Two or more leave a slot for small documents.
+        heavy_size: Size from which a call counts as large (default
+            ``HEAVY_SIZE``).
+    """
+
+    def __init__(self, max_workers: int | None = None, heavy_size: int = HEAVY_SIZE) -> None:
+        if max_workers is None:
+            max_workers = max(2, min(4, os.cpu_count() or 1))
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self._max_workers = max_workers
+        self._heavy_size = heavy_size
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="redflag")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._heavy_slots: Optional[asyncio.Semaphore] = None
+        self._closed = False
+
+    @property
+    def max_workers(self) -> int:
+        """Calls that may run at once."""
+        return self._max_workers
+
+    async def run(self, fn: Callable[..., T], *args: Any, size: int = 0) -> T:
+        """
+        Run ``fn(*args)`` in the pool once a slot is free, and return its result.
+
+        Args:
+            fn: The blocking call.
+            *args: Its arguments.
+            size: Size of the document it processes, in bytes or characters;
+                calls of ``heavy_size`` or more wait for the heavy lane.
+
+        Raises RuntimeError when the executor is closed, and whatever *fn*
+        raises.
+        """
+        if self._closed:
+            raise RuntimeError("BoundedExecutor is closed")
+        loop = asyncio.get_running_loop()
+        slots, heavy_slots = self._lanes(loop)
+        lanes: Tuple[asyncio.Semaphore, ...] = (slots,)
+        if size >= self._heavy_size:
+            lanes = (heavy_slots, slots)
+
+        acquired = []
+        try:
+            for lane in lanes:
+                await lane.acquire()
+                acquired.append(lane)
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            for lane in acquired:
+                lane.release()
+            raise
+
+        def release(_: Future) -> None:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(_release, lanes)
+
+        future.add_done_callback(release)
+        return await asyncio.wrap_future(future)
+
+    def close(self, wait: bool = True) -> None:
+        """Stop accepting calls and shut the pool down (waiting for running calls)."""
+        self._closed = True
+        self._pool.shutdown(wait=wait)
+
+    def _lanes(
+        self, loop: asyncio.AbstractEventLoop
+    ) -> Tuple[asyncio.Semaphore, asyncio.Semaphore]:
+        if self._loop is not loop or self._slots is None or self._heavy_slots is None:
+            # asyncio primitives belong to one loop (Python 3.9 binds them when
+            # created), so a new loop gets new ones.
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self._max_workers)
+            self._heavy_slots = asyncio.Semaphore(max(1, self._max_workers - 1))
+        return self._slots, self._heavy_slots
+
+
+def _release(lanes: Tuple[asyncio.Semaphore, ...]) -> None:
+    for lane in lanes:
+        lane.release()
+
+
+# ----------------------------
+# Shared executor
+# ----------------------------
+_DEFAULT: Optional[BoundedExecutor] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_executor() -> BoundedExecutor:
+    """
+    The process-wide executor used by the async APIs when none is given.
+
+    Created on first use; its threads are joined at interpreter exit.
+    """
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = BoundedExecutor()
+        return _DEFAULT
@@ -8,13 +8,52 @@ Design goals:
 - Keep redflag_engine.py accepting `text: str` — this module sits upstream.
 - Local-first, no API keys.
 - Backward-compatible: TXT loading produces identical output to the legacy path.
+- Files on disk are parsed in place, never read into memory whole: batch
+  workers loading several-hundred-MB PDFs are bounded by memory, not CPU.
+- Documents are routed by content, not name: each format is registered with
+  the byte signature that identifies it (``register_loader``), and the file
+  extension only decides when no signature matches. Backends are imported on
+  first use, so importing this module stays cheap.
 """
 
 from __future__ import annotations
 
+import hashlib
+import importlib
 import io
+import mmap
+import os
+import re
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, Callable, Generator, Iterable, Iterator, Union
+
+if TYPE_CHECKING:
+    import zipfile
+    from xml.etree import ElementTree
+
+    from bounded_executor import BoundedExecutor
+    from result_cache import ExtractionCache
+
+# Where a document's bytes come from: a file on disk, read by the parsers
+# themselves (never copied into memory whole), or an in-memory upload.
+_Source = Union[Path, bytes]
+
+# Part of every extraction cache key: bump whenever extraction output changes,
+# so cached text from older loaders is not served.
+EXTRACTION_VERSION = "3"
+
+# Pages each PDF worker process should have at least: below that, starting a
+# pool and re-parsing the file in every worker costs more than it saves.
+PDF_PAGES_PER_WORKER = 8
+
+# PDF text extraction settings: pdfplumber's layout-aware text, or pypdf's
+# plain text with pdfplumber for the pages it cannot read.
+PDF_TEXT_MODES = ("layout", "fast")
+
+# Byte order marks that identify a text file (UTF-8, UTF-16 LE/BE).
+_UTF16_BOMS = (b"\xff\xfe", b"\xfe\xff")
+_TEXT_BOMS = (b"\xef\xbb\xbf",) + _UTF16_BOMS
 
 
 @dataclass
@@ -40,63 +79,198 @@ class DocumentLoader:
     """
     Load text content from supported document formats.
 
-    Supported: .txt, .pdf, .docx
-    Unsupported .doc files raise UnsupportedFormatError with conversion guidance.
+    Supported: .txt, .pdf, .docx, plus formats added with ``register_loader``.
+    Documents are recognized by content (PDF header, DOCX package, UTF-8 or
+    UTF-16 byte order mark) before extension, so a mis-named upload loads as
+    what it is, with a warning. Unsupported .doc files raise
+    UnsupportedFormatError with conversion guidance.
+
+    Args:
+        pdf_workers: Processes extracting PDF pages in parallel (default 1:
+            in-process). Each worker opens the PDF itself and extracts
+            contiguous page ranges; pages are reassembled in order, so the
+            LoadResult is the same either way. Short PDFs (fewer than
+            ``PDF_PAGES_PER_WORKER`` pages per worker) use fewer workers.
+        cache: Optional ExtractionCache. Documents are looked up by a hash
+            of their bytes (and extension) before being parsed, and stored
+            after; a hit returns the same LoadResult without parsing.
+        docx_compat: Lay DOCX text out exactly as the python-docx based
+            extractor did (all paragraphs first, then all table rows, merged
+            cells repeated). By default paragraphs and table rows keep their
+            document order and each cell appears once.
+        pdf_text: "layout" (default) extracts PDF text with pdfplumber,
+            which lays characters out as they appear on the page. "fast"
+            reads each page's text with pypdf (``pip install pypdf``), an
+            order of magnitude faster, and falls back to pdfplumber for
+            pages where that text is empty or garbled; keyword detection
+            does not need the layout. Fast extraction runs in-process,
+            whatever ``pdf_workers`` is. Without pypdf, "fast" extracts
+            every page with pdfplumber.
     """
 
     SUPPORTED_EXTENSIONS = {".txt", ".pdf", ".docx"}
 
+    def __init__(
+        self,
+        pdf_workers: int = 1,
+        cache: ExtractionCache | None = None,
+        docx_compat: bool = False,
+        pdf_text: str = "layout",
+    ) -> None:
+        if pdf_text not in PDF_TEXT_MODES:
+            raise ValueError(f"pdf_text must be one of {PDF_TEXT_MODES}, got {pdf_text!r}")
+        self._pdf_workers = pdf_workers
+        self._cache = cache
+        self._docx_compat = docx_compat
+        self._pdf_text = pdf_text
+
+    @property
+    def pdf_text(self) -> str:
+        """PDF text extraction mode, one of PDF_TEXT_MODES."""
+        return self._pdf_text
+
+    @property
+    def cache(self) -> ExtractionCache | None:
+        """The extraction cache consulted before parsing, if any."""
+        return self._cache
+
     def load_file(self, path: str | Path) -> LoadResult:
-        """Load text from a file on disk, dispatching by extension."""
+        """
+        Load text from a file on disk, dispatching by content.
+
+        The file is never read into memory whole: PDF and DOCX parsers read
+        it from disk as they go, and TXT is decoded straight from a
+        read-only memory map.
+        """
         path = Path(path)
         if not path.exists():
             raise FileNotFoundError(f"File not found: {path}")
 
-        ext = path.suffix.lower()
-        self._validate_extension(ext)
-
-        raw = path.read_bytes()
-        result = self._dispatch(raw, ext)
+        result = self._load(path, path.suffix.lower())
         result.source_path = str(path)
         return result
 
+    def iter_pages(self, path: str | Path) -> Generator[str, None, None]:
+        """
+        Yield the text of a file page by page, extracting each page on demand.
+
+        PDF pages are extracted only as they are requested (in-process,
+        whatever ``pdf_workers`` is), so a consumer that stops early skips
+        the rest of the report; the PDF is closed once the iterator is
+        exhausted or closed, even if no page was requested. TXT and DOCX files have no pages and are yielded
+        as one. Joined with blank lines and stripped, the pages are
+        ``load_file(path).text``. A document found in the cache is yielded
+        as one page.
+
+        The file is checked and opened before the first page is requested.
+        """
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"File not found: {path}")
+
+        return self._iter_pages(path, path.suffix.lower())
+
+    def iter_pages_bytes(self, data: bytes, filename: str) -> Generator[str, None, None]:
+        """:meth:`iter_pages` for in-memory bytes (e.g. uploads)."""
+        return self._iter_pages(data, Path(filename).suffix.lower())
+
     def load_bytes(self, data: bytes, filename: str) -> LoadResult:
         """Load text from in-memory bytes (e.g. Streamlit uploads)."""
-        ext = Path(filename).suffix.lower()
-        self._validate_extension(ext)
-
-        result = self._dispatch(data, ext)
+        result = self._load(data, Path(filename).suffix.lower())
         result.source_path = None
         return result
 
+    async def aload_bytes(
+        self, data: bytes, filename: str, executor: BoundedExecutor | None = None
+    ) -> LoadResult:
+        """
+        :meth:`load_bytes` for coroutines: extraction runs on *executor*.
+
+        Args:
+            data: The uploaded document.
+            filename: Its name (the extension is used when the content is
+                not recognized).
+            executor: Where to extract (default: the shared
+                ``bounded_executor.default_executor()``). Large uploads wait
+                for its heavy lane, so they cannot hold up small ones.
+        """
+        from bounded_executor import default_executor
+
+        executor = executor or default_executor()
+        return await executor.run(self.load_bytes, data, filename, size=len(data))
+
+    def detect_format(self, path: str | Path) -> str:
+        """
+        The format ``load_file(path)`` loads the file as (e.g. "pdf").
+
+        Raises UnsupportedFormatError when neither the content nor the
+        extension is recognized.
+        """
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"File not found: {path}")
+        return _resolve_backend(path, path.suffix.lower()).format
+
+    def detect_format_bytes(self, data: bytes, filename: str) -> str:
+        """:meth:`detect_format` for in-memory bytes."""
+        return _resolve_backend(data, Path(filename).suffix.lower()).format
+
     # ------------------------------------------------------------------
     # Private helpers
     # ------------------------------------------------------------------
 
-    def _validate_extension(self, ext: str) -> None:
-        if ext == ".doc":
-            raise UnsupportedFormatError(
-                "Legacy .doc format is not supported. "
-                "Please convert to .docx (Save As in Word/LibreOffice) or .pdf."
+    def _iter_pages(self, source: _Source, ext: str) -> Generator[str, None, None]:
+        backend = _resolve_backend(source, ext)
+        cached = None
+        if self._cache is not None:
+            cached = self._cache.get(self._cache_key(source, backend))
+        if cached is not None:
+            return (text for text in [cached["text"]])
+        if backend.pages is None:
+            return (text for text in [backend.load(self, source).text])
+        return backend.pages(self, source)
+
+    def _load(self, source: _Source, ext: str) -> LoadResult:
+        """Extract *source*, through the cache when there is one."""
+        backend = _resolve_backend(source, ext)
+        cached = None
+        if self._cache is not None:
+            key = self._cache_key(source, backend)
+            cached = self._cache.get(key)
+        if cached is not None:
+            result = LoadResult(
+                text=cached["text"],
+                source_path=None,
+                format=cached["format"],
+                page_count=cached["page_count"],
+                warnings=cached["warnings"],
             )
-        if ext not in self.SUPPORTED_EXTENSIONS:
-            raise UnsupportedFormatError(
-                f"Unsupported file format: '{ext}'. "
-                f"Supported formats: {', '.join(sorted(self.SUPPORTED_EXTENSIONS))}"
+        else:
+            result = backend.load(self, source)
+            if self._cache is not None:
+                self._cache.put(key, result.text, result.format, result.page_count, result.warnings)
+        if ext not in backend.extensions:
+            result.warnings.append(
+                f"Loaded as {backend.format}: the content does not match "
+                f"the file extension '{ext}'."
             )
+        return result
 
-    def _dispatch(self, data: bytes, ext: str) -> LoadResult:
-        if ext == ".txt":
-            return self._load_txt(data)
-        if ext == ".pdf":
-            return self._load_pdf(data)
-        if ext == ".docx":
-            return self._load_docx(data)
-        # Should not reach here due to _validate_extension
-        raise UnsupportedFormatError(f"Unhandled extension: {ext}")  # pragma: no cover
-
-    def _load_txt(self, data: bytes) -> LoadResult:
-        text = data.decode("utf-8", errors="replace")
+    def _cache_key(self, source: _Source, backend: _Backend) -> str:
+        # The two DOCX layouts (and PDF text modes) extract different text
+        # from the same bytes.
+        variant = ""
+        if backend.format == "docx" and self._docx_compat:
+            variant = ":compat"
+        elif backend.format == "pdf" and self._pdf_text == "fast":
+            variant = ":fast"
+        return _extraction_key(source, f"{backend.format}:{backend.name}{variant}")
+
+    def _load_txt(self, source: _Source) -> LoadResult:
+        if isinstance(source, Path):
+            text = _decode_mapped(source)
+        else:
+            text = source.decode(_text_encoding(source[:2]), errors="replace")
         return LoadResult(
             text=text,
             source_path=None,
@@ -104,22 +278,22 @@ class DocumentLoader:
             page_count=None,
         )
 
-    def _load_pdf(self, data: bytes) -> LoadResult:
-        import pdfplumber
-
+    def _load_pdf(self, source: _Source) -> LoadResult:
         warnings: list[str] = []
 
-        try:
-            pdf = pdfplumber.open(io.BytesIO(data))
-        except Exception as exc:
-            raise ValueError(f"Failed to open PDF: {exc}") from exc
-
-        pages_text: list[str] = []
-        with pdf:
-            page_count = len(pdf.pages)
-            for page in pdf.pages:
-                page_text = page.extract_text() or ""
-                pages_text.append(page_text)
+        fast = _open_fast_pdf(source) if self._pdf_text == "fast" else None
+        if fast is not None:
+            with fast:
+                page_count = fast.page_count
+                pages_text = [fast.page_text(i) for i in range(page_count)]
+        else:
+            with _open_pdf(source) as pdf:
+                page_count = len(pdf.pages)
+                workers = min(self._pdf_workers, page_count // PDF_PAGES_PER_WORKER)
+                if workers > 1:
+                    pages_text = _extract_pages_parallel(source, page_count, workers)
+                else:
+                    pages_text = [_page_text(page) for page in pdf.pages]
 
         text = "\n\n".join(pages_text).strip()
 
@@ -137,27 +311,22 @@ class DocumentLoader:
             warnings=warnings,
         )
 
-    def _load_docx(self, data: bytes) -> LoadResult:
-        from docx import Document
+    def _load_docx(self, source: _Source) -> LoadResult:
+        import zipfile
+        from xml.etree import ElementTree
 
         try:
-            doc = Document(io.BytesIO(data))
+            archive = zipfile.ZipFile(source if isinstance(source, Path) else io.BytesIO(source))
+            main_part = _docx_main_part(archive)
         except Exception as exc:
             raise ValueError(f"Failed to open DOCX: {exc}") from exc
 
-        parts: list[str] = []
-
-        # Extract paragraph text
-        for para in doc.paragraphs:
-            if para.text.strip():
-                parts.append(para.text)
-
-        # Extract table cell text
-        for table in doc.tables:
-            for row in table.rows:
-                row_text = "\t".join(cell.text.strip() for cell in row.cells if cell.text.strip())
-                if row_text:
-                    parts.append(row_text)
+        with archive:
+            try:
+                with archive.open(main_part) as xml:
+                    parts = list(_iter_docx_parts(xml, self._docx_compat))
+            except (ElementTree.ParseError, zipfile.BadZipFile, OSError) as exc:
+                raise ValueError(f"Failed to read DOCX: {exc}") from exc
 
         text = "\n".join(parts).strip()
 
@@ -167,3 +336,513 @@ class DocumentLoader:
             format="docx",
             page_count=None,
         )
+
+
+# ----------------------------
+# Loader registry
+# ----------------------------
+# A backend's loader is called as load(loader, source) -> LoadResult and its
+# page iterator as pages(loader, source) -> page texts, where *source* is the
+# document's Path on disk or its uploaded bytes.
+Loader = Callable[[DocumentLoader, _Source], LoadResult]
+PageLoader = Callable[[DocumentLoader, _Source], Iterator[str]]
+
+
+class _Backend:
+    """A registered format: how to recognize it and how to extract it."""
+
+    __slots__ = ("format", "extensions", "magic", "sniff", "name", "_load", "_pages")
+
+    def __init__(
+        self,
+        fmt: str,
+        load: Loader | str,
+        extensions: tuple[str, ...],
+        magic: tuple[bytes, ...],
+        sniff: Callable[[IO[bytes]], bool] | None,
+        pages: PageLoader | str | None,
+    ) -> None:
+        self.format = fmt
+        self.extensions = extensions
+        self.magic = magic
+        self.sniff = sniff
+        # Identifies the extractor in cache keys: another backend for the same
+        # format extracts different text.
+        self.name = load if isinstance(load, str) else f"{load.__module__}:{load.__qualname__}"
+        self._load = load
+        self._pages = pages
+
+    def load(self, loader: DocumentLoader, source: _Source) -> LoadResult:
+        if isinstance(self._load, str):
+            self._load = _import_object(self._load)
+        return self._load(loader, source)
+
+    @property
+    def pages(self) -> PageLoader | None:
+        if isinstance(self._pages, str):
+            self._pages = _import_object(self._pages)
+        return self._pages
+
+    def matches(self, f: IO[bytes]) -> bool:
+        """Whether the document open as *f* (at offset 0) is in this format."""
+        if self.magic and f.read(max(map(len, self.magic))).startswith(self.magic):
+            return True
+        f.seek(0)
+        return self.sniff is not None and self.sniff(f)
+
+
+# Registered formats, in the order their signatures are tried.
+_BACKENDS: dict[str, _Backend] = {}
+
+
+def register_loader(
+    fmt: str,
+    load: Loader | str,
+    extensions: Iterable[str] = (),
+    magic: Iterable[bytes] = (),
+    sniff: Callable[[IO[bytes]], bool] | None = None,
+    pages: PageLoader | str | None = None,
+) -> None:
+    """
+    Register the loader for a document format, or replace it.
+
+    A document is loaded by the first format whose signature (*magic* or
+    *sniff*) matches its content; only when none does is its extension
+    used. Registering a format again replaces its loader and page
+    iterator; extensions and signatures not given are kept, so
+    ``register_loader("pdf", "fastpdf:load")`` swaps the PDF backend.
+
+    Args:
+        fmt: Format name, as reported in ``LoadResult.format`` (e.g. "pdf").
+        load: ``load(loader, source) -> LoadResult``, where *source* is the
+            file's Path or the uploaded bytes. May be given as a
+            "module:name" string, imported the first time a document of this
+            format is loaded, so a backend built on a heavy package costs
+            nothing until it is used.
+        extensions: File extensions of the format (lowercase, with the dot).
+        magic: Byte prefixes that identify the format.
+        sniff: ``sniff(f) -> bool`` for formats a prefix cannot identify,
+            called with the document open for binary reading at offset 0.
+        pages: ``pages(loader, source)`` yielding the document's text page by
+            page for ``DocumentLoader.iter_pages`` (or a "module:name"
+            string). Without it the document is one page.
+    """
+    previous = _BACKENDS.get(fmt)
+    extensions, magic = tuple(extensions), tuple(magic)
+    if previous is not None:
+        extensions = extensions or previous.extensions
+        magic = magic or previous.magic
+        sniff = sniff or previous.sniff
+    _BACKENDS[fmt] = _Backend(fmt, load, extensions, magic, sniff, pages)
+
+    supported = DocumentLoader.SUPPORTED_EXTENSIONS
+    supported.clear()
+    supported.update(ext for backend in _BACKENDS.values() for ext in backend.extensions)
+
+
+def _resolve_backend(source: _Source, ext: str) -> _Backend:
+    """The backend for *source*: by content, else by its extension *ext*."""
+    with open(source, "rb") if isinstance(source, Path) else io.BytesIO(source) as f:
+        for backend in _BACKENDS.values():
+            f.seek(0)
+            if backend.matches(f):
+                return backend
+    for backend in _BACKENDS.values():
+        if ext in backend.extensions:
+            return backend
+    if ext == ".doc":
+        raise UnsupportedFormatError(
+            "Legacy .doc format is not supported. "
+            "Please convert to .docx (Save As in Word/LibreOffice) or .pdf."
+        )
+    raise UnsupportedFormatError(
+        f"Unsupported file format: '{ext}'. "
+        f"Supported formats: {', '.join(sorted(DocumentLoader.SUPPORTED_EXTENSIONS))}"
+    )
+
+
+def _import_object(spec: str) -> Any:
+    """The object a "module:name" string refers to, importing its module."""
+    module, _, name = spec.partition(":")
+    obj: Any = importlib.import_module(module)
+    for attr in name.split("."):
+        obj = getattr(obj, attr)
+    return obj
+
+
+# ----------------------------
+# DOCX streaming
+# ----------------------------
+# WordprocessingML main namespace, as ElementTree spells qualified names.
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_BODY, _P, _R, _HYPERLINK = _W + "body", _W + "p", _W + "r", _W + "hyperlink"
+_TBL, _TR, _TC = _W + "tbl", _W + "tr", _W + "tc"
+_OFFICE_DOCUMENT = (
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+)
+
+
+# Content types of a main part that is a Word document, template or macro-enabled variant.
+_WORD_CONTENT_TYPES = (
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.",
+    "application/vnd.ms-word.",
+)
+
+
+def _sniff_docx(f: IO[bytes]) -> bool:
+    """Whether *f* is an OOXML package whose main part is a Word document."""
+    import zipfile
+    from xml.etree import ElementTree
+
+    if f.read(4) != b"PK\x03\x04":
+        return False
+    try:
+        with zipfile.ZipFile(f) as archive:
+            main = "/" + _docx_main_part(archive)
+            with archive.open("[Content_Types].xml") as types:
+                entries = ElementTree.parse(types).getroot()
+    except Exception:
+        return False  # not a ZIP, or not an OOXML package
+    content_type = ""
+    for entry in entries:
+        if entry.get("PartName") == main:
+            content_type = entry.get("ContentType", "")
+            break
+        if main.endswith("." + entry.get("Extension", "\0")):
+            content_type = entry.get("ContentType", "")
+    return content_type.startswith(_WORD_CONTENT_TYPES)
+
+
+def _docx_main_part(archive: zipfile.ZipFile) -> str:
+    """Name of the main document part (normally ``word/document.xml``)."""
+    from xml.etree import ElementTree
+
+    with archive.open("_rels/.rels") as rels:
+        for rel in ElementTree.parse(rels).getroot():
+            if rel.get("Type") == _OFFICE_DOCUMENT:
+                return rel.get("Target", "").lstrip("/")
+    raise ValueError("package has no main document part")
+
+
+def _iter_docx_parts(xml: IO[bytes], compat: bool) -> Iterator[str]:
+    """
+    Yield the text parts of a main document part, parsing it incrementally.
+
+    Body paragraphs with text are yielded as is, and rows of body tables as
+    their non-empty cells, stripped and tab-separated; text is read as
+    python-docx reads it (runs and hyperlinks directly under a paragraph,
+    paragraphs directly under a cell). Each element is dropped once read,
+    so memory holds one paragraph or table row at a time.
+
+    Parts come in document order. With *compat*, they come as the
+    python-docx extractor produced them: all paragraphs, then all table
+    rows, with a merged cell repeated for every grid column and row it
+    spans.
+    """
+    from xml.etree import ElementTree
+
+    stack: list[ElementTree.Element] = []
+    rows: list[str] = []  # compat: table rows come after every paragraph
+    above: dict[int, tuple[int, str]] = {}  # grid offset -> (span, text), previous row
+    for event, elem in ElementTree.iterparse(xml, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            continue
+        stack.pop()
+        if len(stack) < 2 or stack[-1].tag != _BODY and stack[-2].tag != _BODY:
+            continue  # not a body element or a row of a body table
+        parent = stack[-1]
+
+        if parent.tag == _BODY:
+            if elem.tag == _P:
+                text = _paragraph_text(elem)
+                if text.strip():
+                    yield text
+            elif elem.tag == _TBL:
+                above = {}
+            parent.remove(elem)
+        elif parent.tag == _TBL and elem.tag == _TR:
+            row_text, above = _row_text(elem, above, compat)
+            if row_text:
+                if compat:
+                    rows.append(row_text)
+                else:
+                    yield row_text
+            parent.remove(elem)
+    yield from rows
+
+
+def _row_text(
+    tr: ElementTree.Element, above: dict[int, tuple[int, str]], compat: bool
+) -> tuple[str, dict[int, tuple[int, str]]]:
+    """Text of one table row, and its cells by grid offset (for the next row)."""
+    cells: dict[int, tuple[int, str]] = {}
+    offset = _int_val(tr.find(f"{_W}trPr/{_W}gridBefore"), 0)
+    for tc in tr.findall(_TC):
+        span = _int_val(tc.find(f"{_W}tcPr/{_W}gridSpan"), 1)
+        merge = tc.find(f"{_W}tcPr/{_W}vMerge")
+        if compat and merge is not None and merge.get(_W + "val", "continue") == "continue":
+            # The continuation of a vertical merge shows the cell above.
+            cells[offset] = above.get(offset, (span, ""))
+        else:
+            text = "\n".join(_paragraph_text(p) for p in tc.findall(_P)).strip()
+            cells[offset] = (span, text)
+        offset += span
+    # python-docx lists a cell once for every grid column it spans.
+    texts = [text for span, text in cells.values() for _ in range(span if compat else 1) if text]
+    return "\t".join(texts), cells
+
+
+def _paragraph_text(p: ElementTree.Element) -> str:
+    parts: list[str] = []
+    for child in p:
+        if child.tag == _R:
+            _run_text(child, parts)
+        elif child.tag == _HYPERLINK:
+            for run in child.findall(_R):
+                _run_text(run, parts)
+    return "".join(parts)
+
+
+def _run_text(r: ElementTree.Element, parts: list[str]) -> None:
+    for child in r:
+        tag = child.tag
+        if tag == _W + "t":
+            parts.append(child.text or "")
+        elif tag in (_W + "tab", _W + "ptab"):
+            parts.append("\t")
+        elif tag == _W + "cr" or (
+            tag == _W + "br" and child.get(_W + "type", "textWrapping") == "textWrapping"
+        ):
+            parts.append("\n")
+        elif tag == _W + "noBreakHyphen":
+            parts.append("-")
+
+
+def _int_val(elem: ElementTree.Element | None, default: int) -> int:
+    """The integer ``w:val`` of *elem*, or *default* when absent."""
+    if elem is None:
+        return default
+    return int(elem.get(_W + "val", default))
+
+
+def _extraction_key(source: _Source, ext: str) -> str:
+    """Cache key for extracting *source* as an *ext* file: SHA-256 of its bytes."""
+    h = hashlib.sha256()
+    h.update(f"{EXTRACTION_VERSION}\0{ext}\0".encode())
+    if isinstance(source, Path):
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    else:
+        h.update(source)
+    return h.hexdigest()
+
+
+def _decode_mapped(path: Path) -> str:
+    """Decode a text file from a memory map, without a bytes copy."""
+    with open(path, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            return ""  # empty files cannot be mapped
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return str(mapped, _text_encoding(mapped[:2]), "replace")
+
+
+def _text_encoding(head: bytes) -> str:
+    """UTF-16 when *head* is a UTF-16 byte order mark, else UTF-8 (kept as is)."""
+    return "utf-16" if head in _UTF16_BOMS else "utf-8"
+
+
+def _open_pdf(source: _Source) -> Any:
+    import pdfplumber
+
+    try:
+        return pdfplumber.open(source if isinstance(source, Path) else io.BytesIO(source))
+    except Exception as exc:
+        raise ValueError(f"Failed to open PDF: {exc}") from exc
+
+
+def _page_text(page: Any) -> str:
+    text = page.extract_text() or ""
+    # pdfplumber keeps every page's parsed layout until the PDF is closed;
+    # only the text is needed, so release it page by page.
+    page.close()
+    return text
+
+
+class _PdfPages(Generator[str, None, None]):
+    """
+    Page texts of an open PDF, extracted on demand.
+
+    The PDF is opened before the first page is requested, so a broken file
+    is reported when the iterator is created. It is closed when the pages
+    run out, when extraction fails, or on :meth:`close` (or garbage
+    collection), whether or not iteration started.
+    """
+
+    def __init__(self, pdf: Any, texts: Iterator[str]) -> None:
+        self._pdf = pdf
+        self._texts = texts
+
+    def send(self, value: None) -> str:
+        if self._pdf is None:
+            raise StopIteration
+        try:
+            return next(self._texts)
+        except BaseException:
+            self.close()
+            raise
+
+    def throw(self, *args: Any) -> str:
+        self.close()
+        return super().throw(*args)
+
+    def close(self) -> None:
+        pdf, self._pdf = self._pdf, None
+        if pdf is not None:
+            pdf.close()
+
+    def __del__(self) -> None:
+        # As a generator would: an abandoned iterator still closes its PDF.
+        self.close()
+
+
+# ----------------------------
+# Fast PDF text
+# ----------------------------
+# Characters that only appear in text extracted without a usable font
+# encoding: replacement characters, private-use glyphs and C0 controls.
+_GARBLED_RE = re.compile("[\ufffd\ue000-\uf8ff\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+class _FastPdf:
+    """
+    A PDF whose pages are read with pypdf's plain text extraction.
+
+    Pages whose pypdf text is empty or garbled (see ``_garbled``) are
+    extracted with pdfplumber instead, which is opened on the first such
+    page.
+    """
+
+    def __init__(self, reader: Any, source: _Source) -> None:
+        self._reader = reader
+        self._source = source
+        self._fallback: Any = None
+        self.page_count = len(reader.pages)
+
+    def page_text(self, index: int) -> str:
+        try:
+            text = self._reader.pages[index].extract_text()
+        except Exception:
+            text = ""  # pdfplumber may still read what pypdf cannot
+        if not _garbled(text):
+            return text
+        if self._fallback is None:
+            self._fallback = _open_pdf(self._source)
+        return _page_text(self._fallback.pages[index])
+
+    def close(self) -> None:
+        self._reader.close()
+        if self._fallback is not None:
+            self._fallback.close()
+
+    def __enter__(self) -> _FastPdf:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def _open_fast_pdf(source: _Source) -> _FastPdf | None:
+    """*source* opened for fast extraction, or None when pypdf is not installed."""
+    try:
+        import pypdf
+    except ImportError:
+        return None
+    try:
+        reader = pypdf.PdfReader(source if isinstance(source, Path) else io.BytesIO(source))
+    except Exception as exc:
+        raise ValueError(f"Failed to open PDF: {exc}") from exc
+    return _FastPdf(reader, source)
+
+
+def _garbled(text: str) -> bool:
+    """
+    Whether fast-path page text is unusable for keyword detection.
+
+    True when it is empty, when over 5% of its characters are glyphs
+    without a text mapping, or when a page's worth of text has almost no
+    whitespace (words run together, so phrases cannot match).
+    """
+    visible = len("".join(text.split()))
+    if not visible:
+        return True
+    if len(_GARBLED_RE.findall(text)) > visible * 0.05:
+        return True
+    return visible >= 200 and len(text) - visible < len(text) * 0.05
+
+
+# ----------------------------
+# PDF page workers
+# ----------------------------
+# The PDF each worker process opened from the bytes it was started with.
+_WORKER_PDF: Any = None
+
+
+def _init_pdf_worker(source: _Source) -> None:
+    global _WORKER_PDF
+    _WORKER_PDF = _open_pdf(source)
+
+
+def _extract_page_range(start: int, stop: int) -> list[str]:
+    pdf = _WORKER_PDF
+    if pdf is None:  # pragma: no cover - initializer always runs first
+        raise RuntimeError("PDF worker was not initialized")
+    return [_page_text(pdf.pages[i]) for i in range(start, stop)]
+
+
+def _extract_pages_parallel(source: _Source, page_count: int, workers: int) -> list[str]:
+    """
+    Extract every page's text across *workers* processes, in page order.
+
+    Workers started for a file on disk are sent its path and open it
+    themselves; only uploads are copied to each worker.
+    """
+    # Several ranges per worker, so one slow range does not hold up the rest.
+    step = -(-page_count // (workers * 4))
+    starts = range(0, page_count, step)
+    stops = [min(start + step, page_count) for start in starts]
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_pdf_worker, initargs=(source,)
+    ) as pool:
+        return [text for texts in pool.map(_extract_page_range, starts, stops) for text in texts]
+
+
+# ----------------------------
+# Built-in formats
+# ----------------------------
+def _pdf_pages(loader: DocumentLoader, source: _Source) -> Generator[str, None, None]:
+    fast = _open_fast_pdf(source) if loader._pdf_text == "fast" else None
+    if fast is not None:
+        return _PdfPages(fast, map(fast.page_text, range(fast.page_count)))
+    pdf = _open_pdf(source)
+    return _PdfPages(pdf, (_page_text(page) for page in pdf.pages))
+
+
+def _method_loader(name: str) -> Loader:
+    """A loader calling the DocumentLoader method *name*, so subclasses can override it."""
+
+    def load(loader: DocumentLoader, source: _Source) -> LoadResult:
+        return getattr(loader, name)(source)
+
+    load.__qualname__ = f"DocumentLoader.{name}"
+    return load
+
+
+register_loader(
+    "pdf", _method_loader("_load_pdf"), extensions=[".pdf"], magic=[b"%PDF-"], pages=_pdf_pages
+)
+register_loader("docx", _method_loader("_load_docx"), extensions=[".docx"], sniff=_sniff_docx)
+register_loader("txt", _method_loader("_load_txt"), extensions=[".txt"], magic=_TEXT_BOMS)
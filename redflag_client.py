@@ -0,0 +1,177 @@
+"""
+redflag_client.py
+
+Thin client for a running gate server (see redflag_server.py).
+
+Imports only the standard library's socket, struct and json modules (no engine,
+pdfplumber, python-docx or http.client), so a CLI run that gates through a
+server skips the imports and rule-set construction that dominate a cold
+in-process run.
+
+Addresses are a Unix socket path (``/run/user/1000/redflag.sock``) or a TCP
+``host:port`` (``127.0.0.1:8765``, optionally prefixed with ``http://``).
+Documents are only sent to a Unix socket owned by the calling user.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import struct
+from typing import Any, Dict, Tuple, Union
+from urllib.parse import quote
+
+# Seconds to wait for a connection: a server that is running accepts at once.
+CONNECT_TIMEOUT = 1.0
+
+# Seconds to wait for a response (long PDFs take a while to extract).
+RESPONSE_TIMEOUT = 300.0
+
+_Address = Tuple[str, Union[str, Tuple[str, int]]]
+
+
+class ServerUnavailable(Exception):
+    """Raised when no gate server accepts connections at the address."""
+
+
+class ServerError(Exception):
+    """Raised when the server answers with an error (e.g. an unloadable document)."""
+
+
+class ServerMismatch(ServerError):
+    """Raised when the server is configured differently from what the request asked for."""
+
+
+def default_address() -> str:
+    """
+    Where ``redflag serve`` listens and ``--server`` connects by default.
+
+    ``redflag.sock`` in the user's runtime directory: ``$XDG_RUNTIME_DIR``,
+    else ``redflag-<uid>`` under ``$TMPDIR`` (or /tmp), which the server
+    creates private to the user (see ``redflag_server.private_dir``).
+    Without Unix sockets, TCP ``127.0.0.1:8765``.
+    """
+    if not hasattr(socket, "AF_UNIX"):
+        return "127.0.0.1:8765"
+    runtime = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(
+        os.environ.get("TMPDIR", "/tmp"), f"redflag-{os.getuid()}"
+    )
+    return os.path.join(runtime, "redflag.sock")
+
+
+def parse_address(address: str) -> _Address:
+    """``("unix", path)`` or ``("tcp", (host, port))`` for *address*."""
+    if address.startswith("http://"):
+        address = address[len("http://") :].rstrip("/")
+    host, sep, port = address.rpartition(":")
+    if sep and port.isdigit() and "/" not in address:
+        return "tcp", (host or "127.0.0.1", int(port))
+    return "unix", address
+
+
+def analyze(
+    address: str,
+    data: bytes,
+    filename: str,
+    mode: str = "full",
+    use_filter: bool = True,
+    pdf_text: str | None = None,
+    timeout: float = RESPONSE_TIMEOUT,
+) -> Dict[str, Any]:
+    """
+    Have the server at *address* analyze one document.
+
+    Returns what ``RedFlagPipeline.analyze_bytes(data, filename)`` returns
+    (``gate_bytes`` for mode "gate") with the server's pipeline.
+
+    With *pdf_text*, the server refuses (ServerMismatch) unless it extracts
+    PDF text in that mode, so the result is what an in-process run with
+    that mode returns.
+
+    Raises ServerUnavailable when nothing is listening at *address*, and
+    ServerError when the server rejects the request.
+    """
+    target = f"/v1/analyze?filename={quote(filename)}&mode={quote(mode)}&filter={int(use_filter)}"
+    if pdf_text is not None:
+        target += f"&pdf_text={quote(pdf_text)}"
+    status, body = request(address, "POST", target, data, timeout)
+    try:
+        payload = json.loads(body)
+    except ValueError as exc:
+        raise ServerError(f"invalid response from gate server (HTTP {status})") from exc
+    if status == 409:
+        raise ServerMismatch(payload.get("error", f"HTTP {status}"))
+    if status != 200:
+        raise ServerError(payload.get("error", f"HTTP {status}"))
+    return payload
+
+
+def request(
+    address: str, method: str, target: str, body: bytes = b"", timeout: float = RESPONSE_TIMEOUT
+) -> Tuple[int, bytes]:
+    """
+    Send one HTTP/1.1 request and return ``(status, body)``.
+
+    Raises ServerUnavailable when the connection is refused (or the socket
+    file does not exist, or is owned by another user).
+    """
+    sock = _connect(parse_address(address))
+    with sock:
+        sock.settimeout(timeout)
+        head = (
+            f"{method} {target} HTTP/1.1\r\n"
+            "Host: redflag\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        sock.sendall(head.encode("ascii") + body)
+        chunks = []
+        while True:
+            chunk = sock.recv(1 << 16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return _parse_response(b"".join(chunks))
+
+
+def _connect(address: _Address) -> socket.socket:
+    kind, where = address
+    try:
+        if kind == "tcp":
+            return socket.create_connection(where, timeout=CONNECT_TIMEOUT)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(where)
+            owner = _peer_uid(sock, where)
+        except BaseException:
+            sock.close()
+            raise
+        # A server run by another user (e.g. one squatting the path in a
+        # shared directory) must not receive documents.
+        if owner != os.getuid():
+            sock.close()
+            raise ServerUnavailable(
+                f"the gate server at {where} runs as another user (uid {owner}); "
+                "not sending documents to it"
+            )
+        return sock
+    except OSError as exc:  # no socket file, refused, timed out, not permitted
+        raise ServerUnavailable(f"no gate server at {where}: {exc}") from exc
+
+
+def _peer_uid(sock: socket.socket, path: str) -> int:
+    """User id of the process listening on Unix socket *sock*, else of the socket file."""
+    if hasattr(socket, "SO_PEERCRED"):  # Linux: the listening process itself
+        creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        return struct.unpack("3i", creds)[1]
+    return os.stat(path).st_uid
+
+
+def _parse_response(response: bytes) -> Tuple[int, bytes]:
+    head, sep, body = response.partition(b"\r\n\r\n")
+    status_line = head.split(b"\r\n", 1)[0].split()
+    if not sep or len(status_line) < 2 or not status_line[1].isdigit():
+        raise ServerError("malformed response from gate server")
+    return int(status_line[1]), body
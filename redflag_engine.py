@@ -9,16 +9,51 @@ Primary use: gate LLM-generated research drafts before they reach a PM.
 
 from __future__ import annotations
 
+import copy
 import datetime as _dt
+import os
 import re
-from dataclasses import asdict, dataclass
-from typing import Any, Dict, List
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from itertools import islice
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from keyword_matcher import KeywordMatcher
+from result_cache import ResultCache, cache_key, config_digest
+from rule_registry import SEVERITY_LEVELS, Rule, RuleSet
+from text_normalizer import EVIDENCE_CONTEXT_CHARS, OffsetMap, context_window, normalize_text
+
+if TYPE_CHECKING:
+    from bounded_executor import BoundedExecutor
 
 # ----------------------------
 # Defaults / configuration
 # ----------------------------
 MAX_INPUT_CHARS = 500_000
 
+# analyze() modes: "full" output, or "gate" (aggregate only, short-circuited)
+_ANALYZE_MODES = ("full", "gate")
+
+# analyze_many() results: (index in the input, v1 output) pairs.
+_Results = List[Tuple[int, Dict[str, Any]]]
+
+# analyze_stream(): normalized context carried between chunks. Must exceed the
+# longest keyword / expert-contact phrase so boundary-spanning matches are seen.
+STREAM_OVERLAP_CHARS = 256
+
 DEFAULT_THRESHOLDS = {
     "expert_network": {
         "medium": 10,
@@ -56,10 +91,228 @@ DEFAULT_THRESHOLDS = {
     ],
 }
 
+# ----------------------------
+# Detector vocabulary
+# ----------------------------
+# Hard-coded tokens used by the built-in rules (see _default_rules).
+_SOFT_DOLLAR_TOKENS = ("soft dollar", "soft dollars", "soft$")
+_CROSS_BORDER_EVIDENCE = (
+    "soft dollars",
+    "corporate access",
+    "mifid",
+    "inducement",
+    "london",
+    "france",
+    "ceo",
+)
+_OPTIONS_TOKENS = (
+    "naked call",
+    "naked calls",
+    "maximize leverage",
+    "max leverage",
+    "near max risk",
+    "max risk",
+)
+_OPTIONS_EVIDENCE = ("naked calls", "maximize leverage", "near max risk")
+# Bare "max risk" is routine risk-section language, so it does not protect.
+_OPTIONS_PROTECTED = tuple(tok for tok in _OPTIONS_TOKENS if tok != "max risk")
+_BETA_TOKENS = ("beta", "beta ~", "beta 0")
+_MARKET_NEUTRAL_TOKENS = ("market-neutral", "market neutral", "l/s")
+_BETA_EVIDENCE = ("beta", "market-neutral", "market neutral")
+_MVO_TOKENS = (
+    "mean-variance",
+    "mean variance",
+    "mvo",
+    "maximize sharpe",
+    "sharpe ratio",
+    "optimizer",
+)
+_MVO_EVIDENCE = ("mvo", "mean-variance", "sharpe ratio", "optimizer")
+_CROWDING_TOKENS = ("crowded", "most held short", "#1 most held short", "13f", "short squeeze")
+_CROWDING_EVIDENCE = ("13f", "crowded", "most held short", "short squeeze")
+_ILLIQUID_TOKENS = ("small cap", "small-cap", "illiquid")
+_HEDGE_TOKENS = ("hedge", "etf", "xbi")
+_LIQUIDITY_EVIDENCE = ("xbi", "small-cap", "small cap", "hedge", "etf", "illiquid")
+
+# Boilerplate-filter safety net (Rule.protect): text containing one of these is
+# never stripped. Routine MNPI indicators that disclosures mention are exempt.
+_MNPI_UNPROTECTED = ("guidance", "earnings")
+_CROSS_BORDER_PROTECTED = ("soft dollar", "soft dollars", "corporate access", "mifid", "inducement")
+
+# Examples: "10 one-hour calls", "15 calls", "20 hours"
+_EXPERT_CONTACT_PATTERN = r"(\d+)\s+(one-hour calls|calls|hours|hrs)"
+
+
+# ----------------------------
+# Built-in rules
+# ----------------------------
+def _default_rules(cfg: Dict[str, Any]) -> List[Rule]:
+    """The eight built-in detectors, as declarative rules under config *cfg*."""
+    en = cfg["expert_network"]
+    indicators = [tok for tok, _ in cfg["mnpi_indicators"]]
+    # Escalation keywords only count when they are also configured indicators.
+    high_kw = [tok for tok in cfg["mnpi_high_keywords"] if tok in indicators]
+    critical_when: List[Any] = [tok for tok in cfg["mnpi_critical_keywords"] if tok in indicators]
+    if "investigator" in indicators and "friend" in indicators:
+        critical_when.insert(0, {"all": ["investigator", "friend"]})
+    mnpi_escalate = []
+    if high_kw:
+        mnpi_escalate.append({"severity": "HIGH", "when": {"any": high_kw}})
+    if critical_when:
+        mnpi_escalate.append({"severity": "CRITICAL", "when": {"any": critical_when}})
+
+    rules = [
+        # Compliance / MNPI
+        Rule(
+            id="EXPERT_NETWORK_STEERING",
+            title="Expert network over-contact / potential steering",
+            patterns={"contact": _EXPERT_CONTACT_PATTERN},
+            when={"pattern": "contact"},
+            count={
+                "pattern": "contact",
+                "group": 1,
+                "tiers": {"MEDIUM": en["medium"], "HIGH": en["high"], "CRITICAL": en["critical"]},
+                "otherwise": "LOW",
+            },
+            evidence=[{"pattern": "contact"}],
+            explanation=(
+                "High-volume repeated expert interactions elevate 'steering vs. mosaic' risk, "
+                "and can indicate a process-control failure even if content is nominally public."
+            ),
+            action=(
+                "AUTO_REJECT + Compliance escalation: freeze the idea and audit expert interactions."
+            ),
+            actions=dict.fromkeys(
+                ("MEDIUM", "HIGH"),
+                "PM_REVIEW + Compliance: require documented research plan, transcripts, "
+                "and justification for repeated contact; consider trading restriction if MNPI risk co-occurs.",
+            ),
+        ),
+    ]
+    if indicators:
+        rules.append(
+            Rule(
+                id="MNPI_TIPPING_RISK",
+                title="Potential MNPI / tipping / non-public information",
+                when={"any": indicators},
+                severity="MEDIUM",
+                escalate=mnpi_escalate,
+                evidence=indicators,
+                evidence_sort=True,
+                protect=[tok for tok in indicators if tok not in _MNPI_UNPROTECTED],
+                explanation=(
+                    "Narrative contains non-public-information markers (direct hints, insiders, or off-the-record framing). "
+                    "In institutional workflows this must be treated as MNPI until proven otherwise."
+                ),
+                action=(
+                    "PM_REVIEW + Compliance: clarify source and publicness; document mosaic rationale; consider restriction."
+                ),
+                actions=dict.fromkeys(
+                    ("HIGH", "CRITICAL"),
+                    "AUTO_REJECT: do not trade; escalate to Compliance; preserve notes and communications for review.",
+                ),
+            )
+        )
+    rules += [
+        Rule(
+            id="CROSS_BORDER_INDUCEMENT",
+            title="Cross-border compliance / inducement (MiFID II-style) risk",
+            when={
+                "all": [
+                    {"any": list(_SOFT_DOLLAR_TOKENS)},
+                    {
+                        "any": [
+                            "corporate access",
+                            {"all": ["access", "ceo"]},
+                            *cfg["cross_border_eu_tokens"],
+                        ]
+                    },
+                ]
+            },
+            severity="HIGH",
+            escalate=[{"severity": "CRITICAL", "when": {"any": ["mifid", "inducement"]}}],
+            evidence=_CROSS_BORDER_EVIDENCE,
+            protect=_CROSS_BORDER_PROTECTED,
+            explanation=(
+                "Soft-dollar funded corporate access can trigger inducement restrictions in EU/UK regimes. "
+                "Treat as a high-risk compliance area requiring jurisdiction-specific review."
+            ),
+            action=(
+                "AUTO_REJECT: block execution until Compliance signs off on jurisdiction, payment method, and inducement analysis."
+            ),
+        ),
+        # Portfolio / risk traps (still important for fund workflows)
+        Rule(
+            id="OPTIONS_LEVERAGE_TRAP",
+            title="Options leverage trap (IV crush / convexity misunderstanding)",
+            when={"any": list(_OPTIONS_TOKENS)},
+            severity="HIGH",
+            evidence=_OPTIONS_EVIDENCE,
+            protect=_OPTIONS_PROTECTED,
+            explanation=(
+                "Language indicates aggressive convexity positioning under tight risk constraints. "
+                "Common failure mode: IV crush, beta expansion ('success risk'), and inability to de-risk after a win."
+            ),
+            action="PM_REVIEW: require scenario analysis (IV, skew, beta expansion) and explicit exit/liquidity plan.",
+        ),
+        Rule(
+            id="BETA_NEUTRALITY_FALLACY",
+            title="Beta-neutrality fallacy (style/factor risk unaccounted)",
+            when={"all": [{"any": list(_BETA_TOKENS)}, {"any": list(_MARKET_NEUTRAL_TOKENS)}]},
+            severity="MEDIUM",
+            evidence=_BETA_EVIDENCE,
+            explanation=(
+                "Beta neutrality does not imply factor neutrality. Books can blow up on momentum, junk/quality spreads, "
+                "or crowded factor rotations even with beta ~0."
+            ),
+            action="PM_REVIEW: require factor exposure report (momentum, size, quality, vol) and stress tests.",
+        ),
+        Rule(
+            id="MVO_OPTIMIZER_TRAP",
+            title="Optimization trap (MVO / estimation error maximization)",
+            when={"any": list(_MVO_TOKENS)},
+            severity="MEDIUM",
+            evidence=_MVO_EVIDENCE,
+            explanation=(
+                "Mean-variance style optimizers are brittle under estimation error and can concentrate risk in illiquid names "
+                "based on spurious correlations."
+            ),
+            action="PM_REVIEW: prefer robust heuristics; cap position sizes; validate inputs and turnover constraints.",
+        ),
+        Rule(
+            id="CROWDING_ENDOGENOUS_RISK",
+            title="Crowding / endogenous risk (liquidity spiral, squeeze)",
+            when={"any": list(_CROWDING_TOKENS)},
+            severity="MEDIUM",
+            escalate=[{"severity": "HIGH", "when": {"any": ["short squeeze", "most held short"]}}],
+            evidence=_CROWDING_EVIDENCE,
+            protect=_CROWDING_EVIDENCE,
+            explanation=(
+                "Crowded positioning can dominate fundamentals and create endogenous risk via forced covering or liquidity spirals."
+            ),
+            action="PM_REVIEW: require borrow/liquidity checks, squeeze risk limits, and hedge plan.",
+        ),
+        # Example: small-cap long hedged with liquid ETF
+        Rule(
+            id="LIQUIDITY_BASIS_MISMATCH",
+            title="Liquidity/basis mismatch (long illiquidity vs short liquidity)",
+            when={"all": [{"any": [*_ILLIQUID_TOKENS, "xbi"]}, {"any": list(_HEDGE_TOKENS)}]},
+            severity="HIGH",
+            evidence=_LIQUIDITY_EVIDENCE,
+            explanation=(
+                "ETF hedges can fail structurally in crises when small-cap liquidity disappears ('no-bid') "
+                "while the hedge remains tradable, breaking assumed correlation."
+            ),
+            action="PM_REVIEW: run crisis basis stress; cap gross; consider name-specific hedges where feasible.",
+        ),
+    ]
+    return rules
+
+
 # ----------------------------
 # Severity utilities
 # ----------------------------
-_SEVERITY_ORDER = ["NONE", "LOW", "MEDIUM", "HIGH", "CRITICAL"]
+_SEVERITY_ORDER = list(SEVERITY_LEVELS)
 _SEVERITY_TO_SCORE = {
     "NONE": 0,
     "LOW": 25,
@@ -69,8 +322,11 @@ _SEVERITY_TO_SCORE = {
 }
 
 
+_SEVERITY_RANK = {sev: rank for rank, sev in enumerate(_SEVERITY_ORDER)}
+
+
 def _max_severity(a: str, b: str) -> str:
-    return _SEVERITY_ORDER[max(_SEVERITY_ORDER.index(a), _SEVERITY_ORDER.index(b))]
+    return a if _SEVERITY_RANK[a] >= _SEVERITY_RANK[b] else b
 
 
 def _now_utc_iso() -> str:
@@ -79,9 +335,54 @@ def _now_utc_iso() -> str:
     )
 
 
+class _FlagTemplate(NamedTuple):
+    """The per-document-invariant part of a flag, shared by every analysis."""
+
+    id: str
+    title: str
+    severity: str
+    score: int
+    explanation: str
+    recommended_action: str
+
+
+def _flag_templates(rules: Iterable[Rule]) -> Dict[Tuple[str, str], _FlagTemplate]:
+    """One immutable template per (rule id, severity) a flag can be raised at."""
+    return {
+        (rule.id, severity): _FlagTemplate(
+            rule.id,
+            rule.title,
+            severity,
+            _SEVERITY_TO_SCORE[severity],
+            rule.explanation,
+            rule.action_for(severity),
+        )
+        for rule in rules
+        for severity in _SEVERITY_ORDER[1:]
+    }
+
+
 @dataclass
 class Flag:
-    """A single risk flag produced by the engine."""
+    """
+    A single risk flag produced by the engine.
+
+    `evidence_spans` runs parallel to `evidence`: for each token, the matched
+    original text, its ``start``/``end`` offsets in the analyzed document and a
+    short ``context`` window around it. Only the two evidence lists are
+    per-document; the other fields come from a shared template.
+    """
+
+    __slots__ = (
+        "id",
+        "title",
+        "severity",
+        "score",
+        "evidence",
+        "explanation",
+        "recommended_action",
+        "evidence_spans",
+    )
 
     id: str
     title: str
@@ -90,6 +391,47 @@ class Flag:
     evidence: List[str]
     explanation: str
     recommended_action: str
+    evidence_spans: List[Dict[str, Any]]
+
+    @classmethod
+    def from_template(cls, template: _FlagTemplate, evidence: List[str]) -> "Flag":
+        return cls(
+            template.id,
+            template.title,
+            template.severity,
+            template.score,
+            evidence,
+            template.explanation,
+            template.recommended_action,
+            [],
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The flag as a v1 output dict (evidence lists copied, spans included)."""
+        return {
+            "id": self.id,
+            "title": self.title,
+            "severity": self.severity,
+            "score": self.score,
+            "evidence": list(self.evidence),
+            "explanation": self.explanation,
+            "recommended_action": self.recommended_action,
+            "evidence_spans": [dict(span) for span in self.evidence_spans],
+        }
+
+
+class TextScan(NamedTuple):
+    """A document normalized and scanned once (see :meth:`RedFlagAnalyzer.scan`)."""
+
+    normalized: str
+    hits: Dict[str, int]  # keyword -> first offset in `normalized`
+
+
+# The built-in rules under DEFAULT_THRESHOLDS, compiled once at import and
+# shared by every analyzer constructed without overrides or extra rules.
+_DEFAULT_CONFIG = copy.deepcopy(DEFAULT_THRESHOLDS)
+_DEFAULT_RULE_SET = RuleSet(_default_rules(_DEFAULT_CONFIG))
+_DEFAULT_TEMPLATES = _flag_templates(_DEFAULT_RULE_SET.rules)
 
 
 class RedFlagAnalyzer:
@@ -102,6 +444,11 @@ class RedFlagAnalyzer:
     Args:
         config: Optional dict to override DEFAULT_THRESHOLDS keys.
         max_input_chars: Override the global MAX_INPUT_CHARS limit.
+        cache: Optional ResultCache; repeated analyses of the same normalized
+            text under the same VERSION and config are served from it with
+            only `timestamp_utc` refreshed.
+        rules: Optional extra rules (see rule_registry), evaluated after the
+            built-in detectors and compiled into the same rule set.
     """
 
     VERSION = "0.1.0"
@@ -110,31 +457,241 @@ class RedFlagAnalyzer:
         self,
         config: Dict[str, Any] | None = None,
         max_input_chars: int | None = None,
+        cache: ResultCache | None = None,
+        rules: Iterable[Rule] | None = None,
     ):
         self._cfg = {**DEFAULT_THRESHOLDS, **(config or {})}
         self._max_input_chars = max_input_chars if max_input_chars is not None else MAX_INPUT_CHARS
+        self._extra_rules = tuple(rules or ())
+        if not self._extra_rules and self._cfg == _DEFAULT_CONFIG:
+            self._rules = _DEFAULT_RULE_SET
+            self._templates = _DEFAULT_TEMPLATES
+        else:
+            self._rules = RuleSet([*_default_rules(self._cfg), *self._extra_rules])
+            self._templates = _flag_templates(self._rules.rules)
+        self._matcher = self._rules.matcher
+        self._cache = cache
+        self._config_digest = config_digest(
+            {"config": self._cfg, "rules": [rule.to_dict() for rule in self._extra_rules]}
+        )
+
+    @property
+    def max_input_chars(self) -> int:
+        """Largest input accepted by :meth:`analyze` (streams are unbounded)."""
+        return self._max_input_chars
 
-    def analyze(self, text: str) -> Dict[str, Any]:
+    @property
+    def cache(self) -> ResultCache | None:
+        """The result cache in use, if any (exposes hit/miss counters)."""
+        return self._cache
+
+    @property
+    def rules(self) -> RuleSet:
+        """The compiled rule set: built-in detectors followed by any extra rules."""
+        return self._rules
+
+    @property
+    def protected_keywords(self) -> KeywordMatcher:
+        """Compiled protected vocabulary of the rule set (see BoilerplateFilter)."""
+        return self._rules.protected
+
+    def scan(self, text: str) -> TextScan:
+        """Normalize *text* and build its keyword hit table, as :meth:`analyze` does."""
+        normalized = self._normalize(text)
+        return TextScan(normalized, self._matcher.scan(normalized))
+
+    def analyze(
+        self, text: str, mode: str = "full", *, scan: TextScan | None = None
+    ) -> Dict[str, Any]:
+        """
+        Analyze one document.
+
+        Args:
+            text: The document text.
+            mode: "full" (default) returns every flag with evidence. "gate"
+                returns only the aggregate: rules able to reach CRITICAL are
+                tried first, keywords are looked up on demand, and evaluation
+                stops as soon as AUTO_REJECT is certain. `gate_decision` is
+                always exact; on AUTO_REJECT, `severity`/`score` are a lower
+                bound (HIGH may stand for CRITICAL).
+            scan: This analyzer's :meth:`scan` of a text that normalizes to
+                the same string as *text* (e.g. *text* before whitespace-only
+                edits), reused instead of normalizing and scanning again.
+                Evidence offsets still refer to *text*.
+        """
+        if mode not in _ANALYZE_MODES:
+            raise ValueError(f"Unknown mode {mode!r}; expected one of {', '.join(_ANALYZE_MODES)}")
         if len(text) > self._max_input_chars:
             raise ValueError(
                 f"Input exceeds maximum allowed length "
                 f"({len(text):,} chars > {self._max_input_chars:,} limit)"
             )
-        normalized = self._normalize(text)
+        normalized = self._normalize(text) if scan is None else scan.normalized
 
-        flags: List[Flag] = []
+        key = None
+        if self._cache is not None:
+            key = cache_key(normalized, self.VERSION, self._config_digest)
+            cached = self._cache.get(key)
+            if cached is not None and mode == "gate":
+                return self._gate_result(cached["overall"])
+            if cached is not None:
+                return self._refresh_cached(cached, text, normalized)
 
-        # Compliance / MNPI
-        flags.extend(self._detect_expert_network_steering(normalized))
-        flags.extend(self._detect_mnpi_tipping(normalized))
-        flags.extend(self._detect_cross_border_soft_dollars(normalized))
+        if mode == "gate":
+            # Partial evaluation: never cached, the cache only holds full results.
+            severity = self._rules.gate_severity(normalized, stop_at="HIGH")
+            return self._gate_result(self._overall(severity, _SEVERITY_TO_SCORE[severity]))
 
-        # Portfolio / risk traps (still important for fund workflows)
-        flags.extend(self._detect_options_leverage_trap(normalized))
-        flags.extend(self._detect_beta_neutral_momentum_trap(normalized))
-        flags.extend(self._detect_mvo_optimizer_trap(normalized))
-        flags.extend(self._detect_crowding_endogenous_risk(normalized))
-        flags.extend(self._detect_liquidity_basis_mismatch(normalized))
+        # One scan over the document; every rule reads this hit table.
+        hits = self._matcher.scan(normalized) if scan is None else scan.hits
+        matches = self._rules.search_patterns(normalized)
+        result = self._evaluate(hits, matches)
+        if key is not None:
+            self._cache.put(key, result)
+        if result["flags"]:
+            self._attach_evidence_spans(
+                result["flags"], _evidence_positions(hits, matches), _DocumentLocator(text)
+            )
+        return result
+
+    async def aanalyze(
+        self, text: str, mode: str = "full", *, executor: BoundedExecutor | None = None
+    ) -> Dict[str, Any]:
+        """
+        :meth:`analyze` for coroutines: the analysis runs on *executor*.
+
+        Args:
+            text: The document text.
+            mode: As for :meth:`analyze`.
+            executor: Where to analyze (default: the shared
+                ``bounded_executor.default_executor()``). Long texts wait for
+                its heavy lane, so they cannot hold up short notes.
+        """
+        from bounded_executor import default_executor
+
+        executor = executor or default_executor()
+        return await executor.run(self.analyze, text, mode, size=len(text))
+
+    def analyze_stream(
+        self, chunks: Iterable[str], overlap: int | None = None, mode: str = "full"
+    ) -> Dict[str, Any]:
+        """
+        Analyze a document supplied as an iterator of text chunks.
+
+        Unlike :meth:`analyze` there is no input-size limit and memory stays
+        bounded by the chunk size: each chunk is normalized on its own, scanned
+        together with the last *overlap* normalized characters of the previous
+        chunks (so phrases spanning a boundary, e.g. "off the" / "record", are
+        still found), and merged into one hit table. The output is the same as
+        ``analyze("".join(chunks))``, evidence offsets included: the original
+        span of each first keyword hit is resolved as it is found, so only the
+        chunks around the current window and any unfinished evidence context
+        are retained.
+
+        In "gate" mode chunks are pulled only until AUTO_REJECT is certain:
+        once rules that more text cannot lower (see
+        ``RuleSet.settled_severity``) reach HIGH on the chunks so far, the
+        rest of *chunks* is never requested. A lazy source, e.g. PDF pages
+        extracted on demand, then skips the rest of the document. As with
+        ``analyze(text, mode="gate")``, `gate_decision` is exact and, on
+        AUTO_REJECT, `severity`/`score` are a lower bound.
+
+        Args:
+            chunks: Text chunks in document order, of any size.
+            overlap: Normalized characters carried between chunks (default:
+                STREAM_OVERLAP_CHARS). Always raised to the longest keyword,
+                so a keyword spanning a boundary is found.
+            mode: "full" (default) or "gate", as for :meth:`analyze`.
+
+        Raises ValueError for an unknown *mode* or a negative *overlap*.
+        """
+        if mode not in _ANALYZE_MODES:
+            raise ValueError(f"Unknown mode {mode!r}; expected one of {', '.join(_ANALYZE_MODES)}")
+        if overlap is None:
+            overlap = STREAM_OVERLAP_CHARS
+        elif overlap < 0:
+            raise ValueError(f"overlap must be non-negative, got {overlap}")
+        overlap = max(overlap, max(map(len, self._matcher.keywords), default=0))
+        if mode == "gate":
+            return self._gate_stream(chunks, overlap)
+        hits: Dict[str, int] = {}
+        matches: Dict[str, re.Match] = {}
+        positions: Dict[str, int] = {}  # pattern evidence tokens -> offset
+        tail = ""
+        consumed = 0  # normalized chars that precede `tail`
+        at_space = True  # start of document behaves like strip()
+        locator = _StreamLocator()
+
+        for chunk in chunks:
+            normalized = self._normalize_chunk(chunk)
+            if at_space and normalized.startswith(" "):
+                normalized = normalized[1:]
+            locator.add(chunk, consumed + len(tail), len(normalized), at_space)
+            if not normalized:
+                continue
+            at_space = normalized.endswith(" ")
+
+            window = tail + normalized
+            for kw, pos in self._matcher.scan(window).items():
+                if kw not in hits:
+                    hits[kw] = consumed + pos
+                    locator.mark(consumed + pos, len(kw))
+            if len(matches) < len(self._rules.patterns):
+                for source, m in self._rules.search_patterns(window, skip=matches).items():
+                    matches[source] = m
+                    token = m.group()
+                    if token not in positions:
+                        positions[token] = consumed + m.start()
+                        locator.mark(positions[token], len(token))
+
+            keep = min(len(window), overlap)
+            consumed += len(window) - keep
+            tail = window[len(window) - keep :]
+            locator.release(consumed)
+
+        result = self._evaluate(hits, matches)
+        locator.finish()
+        self._attach_evidence_spans(result["flags"], {**hits, **positions}, locator)
+        return result
+
+    def _gate_stream(self, chunks: Iterable[str], overlap: int) -> Dict[str, Any]:
+        """``analyze_stream(mode="gate")``: hits only, no evidence, early exit."""
+        hits: Dict[str, int] = {}
+        matches: Dict[str, re.Match] = {}
+        tail = ""
+        at_space = True
+        stop = _SEVERITY_RANK["HIGH"]
+        settled = "NONE"
+        for chunk in chunks:
+            normalized = self._normalize_chunk(chunk)
+            if at_space and normalized.startswith(" "):
+                normalized = normalized[1:]
+            if not normalized:
+                continue
+            at_space = normalized.endswith(" ")
+
+            # Offsets are irrelevant without evidence; only presence counts.
+            window = tail + normalized
+            for kw in self._matcher.scan(window):
+                hits.setdefault(kw, 0)
+            if len(matches) < len(self._rules.patterns):
+                matches.update(self._rules.search_patterns(window, skip=matches))
+            settled = self._rules.settled_severity(hits, matches)
+            if _SEVERITY_RANK[settled] >= stop:
+                break
+            tail = window[-overlap:]
+        else:
+            for match in self._rules.evaluate(hits, matches):
+                settled = _max_severity(settled, match.severity)
+        return self._gate_result(self._overall(settled, _SEVERITY_TO_SCORE[settled]))
+
+    def _evaluate(self, hits: Dict[str, int], matches: Dict[str, re.Match]) -> Dict[str, Any]:
+        """Evaluate the rule set against a hit table and build the v1 output."""
+        templates = self._templates
+        flags = [
+            Flag.from_template(templates[m.rule.id, m.severity], m.evidence)
+            for m in self._rules.evaluate(hits, matches)
+        ]
 
         overall = self._aggregate(flags)
 
@@ -143,315 +700,158 @@ class RedFlagAnalyzer:
             "engine": {"name": "RedFlagAnalyzer", "version": self.VERSION},
             "timestamp_utc": _now_utc_iso(),
             "overall": overall,
-            "flags": [asdict(f) for f in flags],
+            "flags": [f.to_dict() for f in flags],
         }
 
-    # ----------------------------
-    # Normalization
-    # ----------------------------
-    def _normalize(self, text: str) -> str:
-        text = text or ""
-        # Keep original meaning but make rules robust
-        text = text.replace("\u2019", "'").replace("\u201c", '"').replace("\u201d", '"')
-        text = re.sub(r"\s+", " ", text).strip()
-        return text.lower()
+    def _gate_result(self, overall: Dict[str, Any]) -> Dict[str, Any]:
+        """The v1 envelope without flags, as returned by ``analyze(mode="gate")``."""
+        return {
+            "schema": "redflag_ex1_analyst.output.v1",
+            "engine": {"name": "RedFlagAnalyzer", "version": self.VERSION},
+            "timestamp_utc": _now_utc_iso(),
+            "mode": "gate",
+            "overall": overall,
+        }
 
-    # ----------------------------
-    # Detection rules
-    # ----------------------------
-    def _detect_expert_network_steering(self, text: str) -> List[Flag]:
-        """
-        Detect excessive expert contact counts (calls/hours) which often correlates with:
-        - Steering risk
-        - Mosaic theory abuse
-        - Process control failures
+    @classmethod
+    def _refresh_cached(cls, cached: Dict[str, Any], text: str, normalized: str) -> Dict[str, Any]:
+        """A cached full result, with this call's timestamp and *text*'s spans."""
+        cached["timestamp_utc"] = _now_utc_iso()
+        if cached["flags"]:
+            # Cached spans may belong to a differently-spaced original;
+            # re-derive them from this document. Every evidence token
+            # is a first occurrence, so find() recovers its offset.
+            evidence = {tok for flag in cached["flags"] for tok in flag["evidence"]}
+            cls._attach_evidence_spans(
+                cached["flags"],
+                {tok: normalized.find(tok) for tok in evidence},
+                _DocumentLocator(text),
+            )
+        return cached
+
+    @staticmethod
+    def _attach_evidence_spans(
+        flags: List[Dict[str, Any]],
+        positions: Dict[str, int],
+        locate: Callable[[int, int], Dict[str, Any]],
+    ) -> None:
+        """Fill each flag's `evidence_spans` from normalized evidence offsets."""
+        for flag in flags:
+            flag["evidence_spans"] = [locate(positions[tok], len(tok)) for tok in flag["evidence"]]
+
+    def analyze_many(
+        self,
+        texts: Iterable[str],
+        workers: int | None = None,
+        *,
+        ordered: bool = True,
+        batch_size: int = 16,
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
         """
-        # Examples: "10 one-hour calls", "15 calls", "20 hours"
-        m = re.search(r"(\d+)\s+(one-hour calls|calls|hours|hrs)", text)
-        if not m:
-            return []
-
-        count = int(m.group(1))
-        en = self._cfg["expert_network"]
-        severity = "NONE"
-        if count >= en["critical"]:
-            severity = "CRITICAL"
-        elif count >= en["high"]:
-            severity = "HIGH"
-        elif count >= en["medium"]:
-            severity = "MEDIUM"
-        else:
-            severity = "LOW"
+        Analyze many documents, fanning batches out across a process pool.
 
-        if severity in ("NONE",):
-            return []
+        Each worker process builds one analyzer with this analyzer's effective
+        config and reuses it for every document it receives. Only a bounded
+        window of batches is in flight at a time, so *texts* may be a lazy
+        iterable of any length.
 
-        score = _SEVERITY_TO_SCORE[severity]
+        With a result cache, documents are looked up in this process first:
+        hits are answered here, only misses are sent to the pool, and their
+        results are stored when they come back. A repeated batch therefore
+        never reaches the workers.
 
-        return [
-            Flag(
-                id="EXPERT_NETWORK_STEERING",
-                title="Expert network over-contact / potential steering",
-                severity=severity,
-                score=score,
-                evidence=[m.group(0)],
-                explanation=(
-                    "High-volume repeated expert interactions elevate 'steering vs. mosaic' risk, "
-                    "and can indicate a process-control failure even if content is nominally public."
-                ),
-                recommended_action=(
-                    "PM_REVIEW + Compliance: require documented research plan, transcripts, "
-                    "and justification for repeated contact; consider trading restriction if MNPI risk co-occurs."
-                )
-                if severity in ("MEDIUM", "HIGH")
-                else (
-                    "AUTO_REJECT + Compliance escalation: freeze the idea and audit expert interactions."
-                ),
-            )
-        ]
+        Args:
+            texts: Documents to analyze.
+            workers: Worker processes (default: ``os.cpu_count()``). ``1`` runs
+                in-process without a pool.
+            ordered: Yield results in input order. When False, results are
+                yielded as batches complete.
+            batch_size: Documents sent to a worker per task.
 
-    def _detect_mnpi_tipping(self, text: str) -> List[Flag]:
-        """
-        Detect common MNPI/tipping indicators in narrative notes.
+        Yields:
+            ``(index, result)`` pairs, where *index* is the document's position
+            in *texts* and *result* is the same v1 output as :meth:`analyze`.
         """
-        indicators = self._cfg["mnpi_indicators"]
-        hits = [token for token, _ in indicators if token in text]
-
-        # Higher confidence if multiple indicators show up
-        if len(hits) == 0:
-            return []
-
-        severity = "MEDIUM"
-        if any(tok in hits for tok in self._cfg["mnpi_high_keywords"]):
-            severity = "HIGH"
-        critical_kw = self._cfg["mnpi_critical_keywords"]
-        if ("investigator" in hits and "friend" in hits) or any(tok in hits for tok in critical_kw):
-            severity = "CRITICAL"
-
-        score = _SEVERITY_TO_SCORE[severity]
-        return [
-            Flag(
-                id="MNPI_TIPPING_RISK",
-                title="Potential MNPI / tipping / non-public information",
-                severity=severity,
-                score=score,
-                evidence=sorted(set(hits))[:8],
-                explanation=(
-                    "Narrative contains non-public-information markers (direct hints, insiders, or off-the-record framing). "
-                    "In institutional workflows this must be treated as MNPI until proven otherwise."
-                ),
-                recommended_action=(
-                    "AUTO_REJECT: do not trade; escalate to Compliance; preserve notes and communications for review."
-                )
-                if severity in ("HIGH", "CRITICAL")
-                else (
-                    "PM_REVIEW + Compliance: clarify source and publicness; document mosaic rationale; consider restriction."
-                ),
-            )
-        ]
+        workers = workers or os.cpu_count() or 1
+        batches = _iter_batches(texts, batch_size)
 
-    def _detect_cross_border_soft_dollars(self, text: str) -> List[Flag]:
-        """
-        Detect cross-border inducements / soft-dollar / corporate access risks.
-        """
-        soft = ("soft dollar" in text) or ("soft dollars" in text) or ("soft$" in text)
-        access = ("corporate access" in text) or ("access" in text and "ceo" in text)
-        eu = any(tok in text for tok in self._cfg["cross_border_eu_tokens"])
-
-        if not (soft and (access or eu)):
-            return []
-
-        severity = "HIGH"
-        if "mifid" in text or "inducement" in text:
-            severity = "CRITICAL"
-
-        return [
-            Flag(
-                id="CROSS_BORDER_INDUCEMENT",
-                title="Cross-border compliance / inducement (MiFID II-style) risk",
-                severity=severity,
-                score=_SEVERITY_TO_SCORE[severity],
-                evidence=[
-                    tok
-                    for tok in [
-                        "soft dollars",
-                        "corporate access",
-                        "mifid",
-                        "inducement",
-                        "london",
-                        "france",
-                        "ceo",
-                    ]
-                    if tok in text
-                ][:8],
-                explanation=(
-                    "Soft-dollar funded corporate access can trigger inducement restrictions in EU/UK regimes. "
-                    "Treat as a high-risk compliance area requiring jurisdiction-specific review."
-                ),
-                recommended_action=(
-                    "AUTO_REJECT: block execution until Compliance signs off on jurisdiction, payment method, and inducement analysis."
-                ),
-            )
-        ]
+        if workers <= 1:
+            for batch in batches:
+                for index, text in batch:
+                    yield index, self.analyze(text)
+            return
 
-    def _detect_options_leverage_trap(self, text: str) -> List[Flag]:
-        if not any(
-            tok in text
-            for tok in [
-                "naked call",
-                "naked calls",
-                "maximize leverage",
-                "max leverage",
-                "near max risk",
-                "max risk",
-            ]
-        ):
-            return []
-        severity = "HIGH"
-        return [
-            Flag(
-                id="OPTIONS_LEVERAGE_TRAP",
-                title="Options leverage trap (IV crush / convexity misunderstanding)",
-                severity=severity,
-                score=_SEVERITY_TO_SCORE[severity],
-                evidence=[
-                    tok
-                    for tok in ["naked calls", "maximize leverage", "near max risk"]
-                    if tok in text
-                ][:8],
-                explanation=(
-                    "Language indicates aggressive convexity positioning under tight risk constraints. "
-                    "Common failure mode: IV crush, beta expansion ('success risk'), and inability to de-risk after a win."
-                ),
-                recommended_action="PM_REVIEW: require scenario analysis (IV, skew, beta expansion) and explicit exit/liquidity plan.",
-            )
-        ]
+        max_pending = workers * 2
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self._cfg, self._max_input_chars, self._extra_rules),
+        ) as pool:
+            if ordered:
+                queue: Deque[Tuple[_Results, Optional[Future], Dict[int, str]]] = deque()
+                for hits, misses, keys in map(self._split_cached, batches):
+                    future = pool.submit(_analyze_batch, misses) if misses else None
+                    queue.append((hits, future, keys))
+                    if len(queue) >= max_pending:
+                        yield from self._merge(*queue.popleft())
+                while queue:
+                    yield from self._merge(*queue.popleft())
+            else:
+                pending: Dict[Future, Dict[int, str]] = {}
+                for hits, misses, keys in map(self._split_cached, batches):
+                    yield from hits
+                    if misses:
+                        pending[pool.submit(_analyze_batch, misses)] = keys
+                    if len(pending) >= max_pending:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for fut in done:
+                            yield from self._merge([], fut, pending.pop(fut))
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        yield from self._merge([], fut, pending.pop(fut))
 
-    def _detect_beta_neutral_momentum_trap(self, text: str) -> List[Flag]:
-        if not (
-            ("beta" in text or "beta ~" in text or "beta 0" in text)
-            and ("market-neutral" in text or "market neutral" in text or "l/s" in text)
-        ):
-            return []
-        severity = "MEDIUM"
-        return [
-            Flag(
-                id="BETA_NEUTRALITY_FALLACY",
-                title="Beta-neutrality fallacy (style/factor risk unaccounted)",
-                severity=severity,
-                score=_SEVERITY_TO_SCORE[severity],
-                evidence=[
-                    tok for tok in ["beta", "market-neutral", "market neutral"] if tok in text
-                ][:8],
-                explanation=(
-                    "Beta neutrality does not imply factor neutrality. Books can blow up on momentum, junk/quality spreads, "
-                    "or crowded factor rotations even with beta ~0."
-                ),
-                recommended_action="PM_REVIEW: require factor exposure report (momentum, size, quality, vol) and stress tests.",
-            )
-        ]
+    def _split_cached(
+        self, batch: List[Tuple[int, str]]
+    ) -> Tuple[_Results, List[Tuple[int, str]], Dict[int, str]]:
+        """``(hits, misses, cache key by miss index)`` for an analyze_many batch."""
+        if self._cache is None:
+            return [], batch, {}
+        hits: _Results = []
+        misses: List[Tuple[int, str]] = []
+        keys: Dict[int, str] = {}
+        for index, text in batch:
+            if len(text) <= self._max_input_chars:  # longer ones fail in the worker
+                normalized = self._normalize(text)
+                key = cache_key(normalized, self.VERSION, self._config_digest)
+                cached = self._cache.get(key)
+                if cached is not None:
+                    hits.append((index, self._refresh_cached(cached, text, normalized)))
+                    continue
+                keys[index] = key
+            misses.append((index, text))
+        return hits, misses, keys
 
-    def _detect_mvo_optimizer_trap(self, text: str) -> List[Flag]:
-        if not any(
-            tok in text
-            for tok in [
-                "mean-variance",
-                "mean variance",
-                "mvo",
-                "maximize sharpe",
-                "sharpe ratio",
-                "optimizer",
-            ]
-        ):
-            return []
-        severity = "MEDIUM"
-        return [
-            Flag(
-                id="MVO_OPTIMIZER_TRAP",
-                title="Optimization trap (MVO / estimation error maximization)",
-                severity=severity,
-                score=_SEVERITY_TO_SCORE[severity],
-                evidence=[
-                    tok
-                    for tok in ["mvo", "mean-variance", "sharpe ratio", "optimizer"]
-                    if tok in text
-                ][:8],
-                explanation=(
-                    "Mean-variance style optimizers are brittle under estimation error and can concentrate risk in illiquid names "
-                    "based on spurious correlations."
-                ),
-                recommended_action="PM_REVIEW: prefer robust heuristics; cap position sizes; validate inputs and turnover constraints.",
-            )
-        ]
+    def _merge(self, hits: _Results, future: Optional[Future], keys: Dict[int, str]) -> _Results:
+        """A batch's cache hits and worker results in input order, caching the latter."""
+        analyzed: _Results = future.result() if future is not None else []
+        for index, result in analyzed:
+            if index in keys and self._cache is not None:
+                # Stored as analyze() stores it: spans are re-derived on a hit.
+                flags = [{**flag, "evidence_spans": []} for flag in result["flags"]]
+                self._cache.put(keys[index], {**result, "flags": flags})
+        return sorted(hits + analyzed, key=lambda item: item[0])
 
-    def _detect_crowding_endogenous_risk(self, text: str) -> List[Flag]:
-        if not any(
-            tok in text
-            for tok in [
-                "crowded",
-                "most held short",
-                "#1 most held short",
-                "13f",
-                "short squeeze",
-            ]
-        ):
-            return []
-        severity = "MEDIUM"
-        if "short squeeze" in text or "most held short" in text:
-            severity = "HIGH"
-        return [
-            Flag(
-                id="CROWDING_ENDOGENOUS_RISK",
-                title="Crowding / endogenous risk (liquidity spiral, squeeze)",
-                severity=severity,
-                score=_SEVERITY_TO_SCORE[severity],
-                evidence=[
-                    tok
-                    for tok in ["13f", "crowded", "most held short", "short squeeze"]
-                    if tok in text
-                ][:8],
-                explanation=(
-                    "Crowded positioning can dominate fundamentals and create endogenous risk via forced covering or liquidity spirals."
-                ),
-                recommended_action="PM_REVIEW: require borrow/liquidity checks, squeeze risk limits, and hedge plan.",
-            )
-        ]
+    # ----------------------------
+    # Normalization
+    # ----------------------------
+    def _normalize(self, text: str) -> str:
+        # Keep original meaning but make rules robust
+        return normalize_text(text or "").strip()
 
-    def _detect_liquidity_basis_mismatch(self, text: str) -> List[Flag]:
-        # Example: small-cap long hedged with liquid ETF
-        if (
-            not any(tok in text for tok in ["small cap", "small-cap", "illiquid"])
-            and "xbi" not in text
-        ):
-            return []
-        if not any(tok in text for tok in ["hedge", "etf", "xbi"]):
-            return []
-        severity = "HIGH"
-        return [
-            Flag(
-                id="LIQUIDITY_BASIS_MISMATCH",
-                title="Liquidity/basis mismatch (long illiquidity vs short liquidity)",
-                severity=severity,
-                score=_SEVERITY_TO_SCORE[severity],
-                evidence=[
-                    tok
-                    for tok in [
-                        "xbi",
-                        "small-cap",
-                        "small cap",
-                        "hedge",
-                        "etf",
-                        "illiquid",
-                    ]
-                    if tok in text
-                ][:8],
-                explanation=(
-                    "ETF hedges can fail structurally in crises when small-cap liquidity disappears ('no-bid') "
-                    "while the hedge remains tradable, breaking assumed correlation."
-                ),
-                recommended_action="PM_REVIEW: run crisis basis stress; cap gross; consider name-specific hedges where feasible.",
-            )
-        ]
+    def _normalize_chunk(self, text: str) -> str:
+        """Normalize without stripping, so chunks can be stitched together."""
+        return normalize_text(text)
 
     # ----------------------------
     # Aggregation / gating
@@ -462,7 +862,9 @@ class RedFlagAnalyzer:
         for f in flags:
             overall_sev = _max_severity(overall_sev, f.severity)
             overall_score = max(overall_score, f.score)
+        return self._overall(overall_sev, overall_score)
 
+    def _overall(self, overall_sev: str, overall_score: int) -> Dict[str, Any]:
         gate_decision = "PASS"
         if overall_sev == "MEDIUM":
             gate_decision = "PM_REVIEW"
@@ -481,3 +883,171 @@ class RedFlagAnalyzer:
             "gate_decision": gate_decision,
             "recommended_action": recommended_action,
         }
+
+
+# ----------------------------
+# Evidence locators
+# ----------------------------
+def _evidence_positions(hits: Dict[str, int], matches: Dict[str, re.Match]) -> Dict[str, int]:
+    """Normalized offset of every possible evidence token (keywords and pattern matches)."""
+    positions = dict(hits)
+    for m in matches.values():
+        positions.setdefault(m.group(), m.start())
+    return positions
+
+
+# Both map a normalized (offset, length) back to an evidence span dict:
+# {"text", "start", "end", "context"} in original-document coordinates.
+def _evidence_span(text: str, start: int, end: int, context: str) -> Dict[str, Any]:
+    return {"text": text, "start": start, "end": end, "context": context}
+
+
+class _DocumentLocator:
+    """Locate evidence in one in-memory document (OffsetMap built on first use)."""
+
+    __slots__ = ("_text", "_map")
+
+    def __init__(self, text: str) -> None:
+        self._text = text
+        self._map: Optional[OffsetMap] = None
+
+    def __call__(self, pos: int, length: int) -> Dict[str, Any]:
+        if self._map is None:
+            self._map = OffsetMap(self._text)
+        start, end = self._map.span(pos, pos + length)
+        return _evidence_span(
+            self._text[start:end], start, end, context_window(self._text, start, end)
+        )
+
+
+class _StreamChunk:
+    """One analyze_stream() chunk with its original and normalized extents."""
+
+    __slots__ = ("text", "orig_start", "norm_start", "norm_end", "drop_leading_space", "_map")
+
+    def __init__(
+        self, text: str, orig_start: int, norm_start: int, norm_len: int, drop_leading_space: bool
+    ) -> None:
+        self.text = text
+        self.orig_start = orig_start
+        self.norm_start = norm_start
+        self.norm_end = norm_start + norm_len
+        self.drop_leading_space = drop_leading_space
+        self._map: Optional[OffsetMap] = None
+
+    @property
+    def orig_end(self) -> int:
+        return self.orig_start + len(self.text)
+
+    def to_original(self, pos: int) -> int:
+        if self._map is None:
+            self._map = OffsetMap(self.text, self.drop_leading_space)
+        return self.orig_start + self._map.to_original(pos - self.norm_start)
+
+
+class _StreamLocator:
+    """
+    Locate evidence in a chunked document without holding all of it.
+
+    Hits are resolved to original offsets when marked (while their chunks are
+    still held); the span text and context are filled in once enough trailing
+    text has arrived, or at finish(). Chunks are released once no future hit
+    or pending context window can reach them.
+    """
+
+    def __init__(self, context_chars: int = EVIDENCE_CONTEXT_CHARS) -> None:
+        self._context = context_chars
+        self._chunks: Deque[_StreamChunk] = deque()
+        self._orig_end = 0
+        self._pending: List[Tuple[Tuple[int, int], int, int]] = []
+        self._spans: Dict[Tuple[int, int], Dict[str, Any]] = {}
+
+    def add(self, text: str, norm_start: int, norm_len: int, drop_leading_space: bool) -> None:
+        self._chunks.append(
+            _StreamChunk(text, self._orig_end, norm_start, norm_len, drop_leading_space)
+        )
+        self._orig_end += len(text)
+
+    def mark(self, pos: int, length: int) -> None:
+        """Resolve the normalized match at global offset *pos*."""
+        start = self._to_original(pos)
+        end = self._to_original(pos + length - 1) + 1 if length else start
+        self._pending.append(((pos, length), start, end))
+
+    def release(self, consumed: int) -> None:
+        """Complete ready spans and drop chunks before normalized offset *consumed*."""
+        self._complete(self._orig_end - self._context)
+        # Future hits start in the last chunk beginning at or before `consumed`.
+        floor = self._orig_end
+        for chunk in reversed(self._chunks):
+            if chunk.norm_start <= consumed:
+                floor = chunk.orig_start
+                break
+        for _, start, _ in self._pending:
+            floor = min(floor, start)
+        floor -= self._context
+        while self._chunks and self._chunks[0].orig_end <= floor:
+            self._chunks.popleft()
+
+    def finish(self) -> None:
+        """Complete every pending span (end of stream)."""
+        self._complete(self._orig_end)
+
+    def __call__(self, pos: int, length: int) -> Dict[str, Any]:
+        return self._spans[(pos, length)]
+
+    def _complete(self, limit: int) -> None:
+        still_pending = []
+        for key, start, end in self._pending:
+            if end <= limit:
+                context = " ".join(self._slice(start - self._context, end + self._context).split())
+                self._spans[key] = _evidence_span(self._slice(start, end), start, end, context)
+            else:
+                still_pending.append((key, start, end))
+        self._pending = still_pending
+
+    def _to_original(self, pos: int) -> int:
+        for chunk in reversed(self._chunks):
+            if chunk.norm_start <= pos < chunk.norm_end:
+                return chunk.to_original(pos)
+        raise ValueError(f"normalized offset {pos} is no longer held")  # pragma: no cover
+
+    def _slice(self, start: int, end: int) -> str:
+        parts = []
+        for chunk in self._chunks:
+            lo = max(start, chunk.orig_start)
+            hi = min(end, chunk.orig_end)
+            if lo < hi:
+                parts.append(chunk.text[lo - chunk.orig_start : hi - chunk.orig_start])
+        return "".join(parts)
+
+
+# ----------------------------
+# Batch workers (analyze_many)
+# ----------------------------
+# One analyzer per worker process, built by the pool initializer so the
+# compiled vocabulary is reused for every batch the worker receives.
+_WORKER_ANALYZER: Optional[RedFlagAnalyzer] = None
+
+
+def _init_worker(
+    config: Dict[str, Any], max_input_chars: int, rules: Tuple[Rule, ...] = ()
+) -> None:
+    global _WORKER_ANALYZER
+    _WORKER_ANALYZER = RedFlagAnalyzer(config=config, max_input_chars=max_input_chars, rules=rules)
+
+
+def _analyze_batch(batch: List[Tuple[int, str]]) -> List[Tuple[int, Dict[str, Any]]]:
+    analyzer = _WORKER_ANALYZER
+    if analyzer is None:  # pragma: no cover - initializer always runs first
+        raise RuntimeError("analyze_many worker was not initialized")
+    return [(index, analyzer.analyze(text)) for index, text in batch]
+
+
+def _iter_batches(texts: Iterable[str], size: int) -> Iterator[List[Tuple[int, str]]]:
+    items = enumerate(texts)
+    while True:
+        batch = list(islice(items, max(1, size)))
+        if not batch:
+            return
+        yield batch
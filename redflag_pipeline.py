@@ -0,0 +1,372 @@
+"""
+redflag_pipeline.py
+
+Load -> boilerplate filter -> analyze, as one object.
+
+The CLI and the dashboard both run documents through the same three stages.
+RedFlagPipeline filters the loaded document first, with the analyzer's
+protected vocabulary, and normalizes and scans only the kept text, once.
+A scan of the whole document before filtering would let the filter skip
+protected keywords and anchor words the document lacks, but once boilerplate
+is removed the kept text must be normalized and scanned again; measured on
+notes with disclaimers, that made the pipeline slower than filter-then-analyze
+(``benchmarks/bench_pipeline.py`` checks it is not).
+
+RedFlagSession re-analyzes successive versions of one document (an analyst
+saving a draft) and keeps, per paragraph, the filter's decision and the
+paragraph's normalized text and hit table. A new version only classifies and
+scans the paragraphs that changed.
+
+``gate_file`` runs the stages page by page for gate-only callers, so a
+report that is rejected early is never extracted past the rejecting page.
+
+``aanalyze_bytes`` / ``aanalyze_text`` serve asyncio callers, running the
+stages on a BoundedExecutor (see bounded_executor.py).
+"""
+
+from __future__ import annotations
+
+from contextlib import closing
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+)
+
+from boilerplate_filter import BoilerplateFilter, BoilerplateFilterConfig, FilterResult
+from document_loader import DocumentLoader, LoadResult
+from keyword_matcher import KeywordMatcher
+from redflag_engine import RedFlagAnalyzer, TextScan
+
+if TYPE_CHECKING:
+    from bounded_executor import BoundedExecutor
+
+# Chunk size used when a document exceeds the analyzer's single-shot limit.
+STREAM_CHUNK_CHARS = 64_000
+
+
+class PipelineResult(NamedTuple):
+    """Output of :meth:`RedFlagPipeline.analyze_text`."""
+
+    result: Dict[str, Any]  # v1 analyzer output, plus `preprocessing` when filtered
+    filter_result: Optional[FilterResult]  # None when the filter is disabled
+    text: str  # the text that was analyzed
+
+
+class RedFlagPipeline:
+    """
+    Document loader, boilerplate filter and analyzer run as one pipeline.
+
+    Args:
+        analyzer: The analyzer (default: built-in rules, no cache).
+        use_filter: Strip boilerplate before analysis (default: True).
+        filter_config: Boilerplate filter configuration (default: everything
+            enabled). The filter always protects the analyzer's rule
+            vocabulary.
+        loader: Document loader (default: a new DocumentLoader).
+    """
+
+    def __init__(
+        self,
+        analyzer: RedFlagAnalyzer | None = None,
+        use_filter: bool = True,
+        filter_config: BoilerplateFilterConfig | None = None,
+        loader: DocumentLoader | None = None,
+    ) -> None:
+        self._analyzer = analyzer or RedFlagAnalyzer()
+        self._loader = loader or DocumentLoader()
+        self._filter: Optional[BoilerplateFilter] = None
+        if use_filter:
+            self._filter = BoilerplateFilter(
+                filter_config, protected=self._analyzer.protected_keywords
+            )
+
+    @property
+    def analyzer(self) -> RedFlagAnalyzer:
+        """The analyzer run on every document."""
+        return self._analyzer
+
+    @property
+    def loader(self) -> DocumentLoader:
+        """The document loader used by :meth:`analyze_file`."""
+        return self._loader
+
+    @property
+    def boilerplate_filter(self) -> Optional[BoilerplateFilter]:
+        """The boilerplate filter, or None when filtering is disabled."""
+        return self._filter
+
+    def session(self) -> RedFlagSession:
+        """Start an incremental session for successive versions of one document."""
+        return RedFlagSession(self)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def analyze_file(self, path: str | Path) -> Dict[str, Any]:
+        """
+        Load, filter and analyze one file, attaching input/preprocessing metadata.
+
+        Raises UnsupportedFormatError / ValueError when the document cannot be loaded.
+        """
+        return self.analyze_loaded(self._loader.load_file(path), str(path))
+
+    def analyze_bytes(self, data: bytes, filename: str) -> Dict[str, Any]:
+        """
+        Load, filter and analyze an uploaded document, attaching metadata.
+
+        Raises UnsupportedFormatError / ValueError when the document cannot be loaded.
+        """
+        return self.analyze_loaded(self._loader.load_bytes(data, filename), filename)
+
+    def gate_file(self, path: str | Path) -> Dict[str, Any]:
+        """
+        Gate one file page by page, stopping extraction once AUTO_REJECT is certain.
+
+        Pages are extracted on demand (``DocumentLoader.iter_pages``),
+        filtered as they become final (``BoilerplateFilter.filter_stream``)
+        and fed to ``analyze_stream(mode="gate")``, so a CRITICAL finding on
+        page 3 of a 400-page report leaves the other pages unread. Returns
+        the gate-mode result (no flags) with `input` metadata; `pages_read`
+        counts the pages extracted.
+
+        Raises UnsupportedFormatError / ValueError when the document cannot be loaded.
+        """
+        return self._gate(
+            self._loader.iter_pages(path), str(path), self._loader.detect_format(path)
+        )
+
+    def gate_bytes(self, data: bytes, filename: str) -> Dict[str, Any]:
+        """:meth:`gate_file` for an uploaded document; `input.path` is *filename*."""
+        pages = self._loader.iter_pages_bytes(data, filename)
+        return self._gate(pages, filename, self._loader.detect_format_bytes(data, filename))
+
+    def analyze_loaded(self, load_result: LoadResult, path: str) -> Dict[str, Any]:
+        """Filter and analyze an already loaded document, attaching input metadata."""
+        result = self.analyze_text(load_result.text).result
+        result["input"] = {
+            "path": path,
+            "format": load_result.format,
+            "chars": load_result.char_count,
+            "page_count": load_result.page_count,
+            "warnings": load_result.warnings,
+        }
+        # Keep the historical key order: input before preprocessing.
+        if "preprocessing" in result:
+            result["preprocessing"] = result.pop("preprocessing")
+        return result
+
+    def analyze_text(self, text: str) -> PipelineResult:
+        """Filter and analyze *text*, attaching preprocessing metadata."""
+        if self._filter is None:
+            return PipelineResult(self._analyze(text, None), None, text)
+
+        filter_result = self._filter.filter(text)
+        filtered = filter_result.filtered_text
+        result = self._analyze(filtered, None)
+        result["preprocessing"] = _preprocessing(filter_result)
+        return PipelineResult(result, filter_result, filtered)
+
+    # ------------------------------------------------------------------
+    # Async API
+    # ------------------------------------------------------------------
+
+    async def aanalyze_bytes(
+        self, data: bytes, filename: str, executor: BoundedExecutor | None = None
+    ) -> Dict[str, Any]:
+        """
+        :meth:`analyze_bytes` for coroutines.
+
+        Loading, filtering and analysis run as one call on *executor*
+        (default: the shared ``bounded_executor.default_executor()``), so an
+        upload costs one slot and one thread hop. Large uploads wait for the
+        executor's heavy lane, so they cannot hold up small notes.
+        """
+        from bounded_executor import default_executor
+
+        executor = executor or default_executor()
+        return await executor.run(self.analyze_bytes, data, filename, size=len(data))
+
+    async def aanalyze_text(
+        self, text: str, executor: BoundedExecutor | None = None
+    ) -> PipelineResult:
+        """:meth:`analyze_text` for coroutines, run on *executor* as above."""
+        from bounded_executor import default_executor
+
+        executor = executor or default_executor()
+        return await executor.run(self.analyze_text, text, size=len(text))
+
+    # ------------------------------------------------------------------
+    # Private helpers
+    # ------------------------------------------------------------------
+
+    def _gate(self, pages: Generator[str, None, None], path: str, fmt: str) -> Dict[str, Any]:
+        """Gate *pages* as :meth:`gate_file` does, closing them when done."""
+        pages_read = 0
+
+        def counted(pages: Iterable[str]) -> Iterator[str]:
+            nonlocal pages_read
+            for page in pages:
+                pages_read += 1
+                yield page
+
+        with closing(pages):
+            chunks = counted(pages)
+            if self._filter is not None:
+                chunks = self._filter.filter_stream(chunks)
+            result = self._analyzer.analyze_stream(_paragraphs(chunks), mode="gate")
+        result["input"] = {"path": path, "format": fmt, "pages_read": pages_read}
+        return result
+
+    def _analyze(self, text: str, scan: TextScan | None) -> Dict[str, Any]:
+        """Analyze *text*, streaming it in chunks when it exceeds the input limit."""
+        analyzer = self._analyzer
+        if len(text) > analyzer.max_input_chars:
+            # 10-K-sized documents: analyze in bounded chunks instead of rejecting.
+            return analyzer.analyze_stream(
+                text[i : i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)
+            )
+        return analyzer.analyze(text, scan=scan)
+
+
+class RedFlagSession:
+    """
+    Incremental analysis of successive versions of one document.
+
+    Each :meth:`update` returns what ``pipeline.analyze_text`` returns for
+    the new version, but only the paragraphs that changed since the
+    previous versions are classified by the filter and scanned:
+
+    - Filter decisions are memoized by paragraph (see ``BoilerplateFilter.filter``).
+    - The filtered text is split at its paragraph breaks (``"\\n\\n"``); each
+      piece's normalized text and hit table are kept, keyed by the piece.
+      The document's normalized text is the pieces joined with single
+      spaces, and its hit table the pieces' tables shifted to their offsets.
+    - A keyword containing a space may span two pieces, so the few
+      characters around each join are scanned as well, keyed by their text.
+
+    Section detection, the pattern rules and evidence spans still run over
+    the whole text, but as regex and substring passes. Documents over the
+    analyzer's input limit are streamed as in ``analyze_text``. Entries not
+    used by the latest version are dropped, so memory follows the document.
+
+    Args:
+        pipeline: The pipeline whose filter and analyzer are used.
+    """
+
+    def __init__(self, pipeline: RedFlagPipeline) -> None:
+        self._pipeline = pipeline
+        self._memo: Dict[str, Optional[str]] = {}
+        self._pieces: Dict[str, TextScan] = {}
+        self._joins: Dict[str, Dict[str, int]] = {}
+        spaced = [kw for kw in pipeline.analyzer.rules.matcher.keywords if " " in kw]
+        self._join_matcher = KeywordMatcher(spaced)
+        self._reach = max(map(len, spaced), default=0)
+
+    def update(self, text: str) -> PipelineResult:
+        """Analyze the new version *text* of the document."""
+        pipeline = self._pipeline
+        bp_filter = pipeline.boilerplate_filter
+        filter_result = None
+        filtered = text
+        if bp_filter is not None:
+            # Decisions are carried over from the previous version as they are
+            # looked up, so the memo holds this version's paragraphs only.
+            memo = _CarriedMemo(self._memo)
+            filter_result = bp_filter.filter(text, memo=memo)
+            filtered = filter_result.filtered_text
+            self._memo = dict(memo)  # a plain dict: no chain back to older versions
+
+        scan = None
+        if len(filtered) <= pipeline.analyzer.max_input_chars:
+            scan = self._scan(filtered)
+
+        result = pipeline._analyze(filtered, scan)
+        if filter_result is not None:
+            result["preprocessing"] = _preprocessing(filter_result)
+        return PipelineResult(result, filter_result, filtered)
+
+    def _scan(self, text: str) -> TextScan:
+        """The analyzer's scan of *text*, assembled from per-piece scans."""
+        scan_piece = self._pipeline.analyzer.scan
+        previous, pieces = self._pieces, {}
+        parts: List[str] = []
+        hits: Dict[str, int] = {}
+        offset = 0
+        for piece in text.split("\n\n"):
+            scan = pieces.get(piece) or previous.get(piece) or scan_piece(piece)
+            pieces[piece] = scan
+            if not scan.normalized:
+                continue
+            for kw, pos in scan.hits.items():
+                if kw not in hits:
+                    hits[kw] = offset + pos
+            parts.append(scan.normalized)
+            offset += len(scan.normalized) + 1
+        self._pieces = pieces
+        normalized = " ".join(parts)
+
+        # Keywords spanning a join: scan the text around each joining space.
+        previous, joins = self._joins, {}
+        if self._reach:
+            join = -1
+            for part in parts[:-1]:
+                join += len(part) + 1
+                start = max(join - self._reach + 1, 0)
+                window = normalized[start : join + self._reach]
+                found = joins.get(window)
+                if found is None:
+                    found = previous.get(window)
+                    if found is None:
+                        found = self._join_matcher.scan(window)
+                    joins[window] = found
+                for kw, pos in found.items():
+                    if start + pos < hits.get(kw, offset):
+                        hits[kw] = start + pos
+        self._joins = joins
+        return TextScan(normalized, hits)
+
+
+class _CarriedMemo(Dict[str, Optional[str]]):
+    """Filter memo for one version: lookups missing here copy the previous version's entry."""
+
+    def __init__(self, previous: Dict[str, Optional[str]]) -> None:
+        super().__init__()
+        self._previous = previous
+
+    def __contains__(self, para: object) -> bool:
+        return dict.__contains__(self, para) or para in self._previous
+
+    def __getitem__(self, para: str) -> Optional[str]:
+        if not dict.__contains__(self, para):
+            self[para] = self._previous[para]
+        return dict.__getitem__(self, para)
+
+
+def _paragraphs(pieces: Iterable[str]) -> Iterator[str]:
+    """*pieces* as stream chunks, with the blank line that joins them in between."""
+    separator = ""
+    for piece in pieces:
+        yield separator
+        yield piece
+        separator = "\n\n"
+
+
+def _preprocessing(filter_result: FilterResult) -> Dict[str, Any]:
+    """The `preprocessing` metadata attached to filtered results."""
+    return {
+        "boilerplate_filter": True,
+        "original_chars": filter_result.original_length,
+        "filtered_chars": filter_result.filtered_length,
+        "chars_removed": filter_result.chars_removed,
+        "sections_removed": filter_result.sections_removed,
+        "removed_regions": [list(region) for region in filter_result.removed_regions],
+    }
@@ -0,0 +1,334 @@
+"""
+redflag_server.py
+
+Gate server: keeps a warm pipeline in memory and analyzes documents sent to
+it over a local Unix socket or TCP, as HTTP/1.1 (standard library only).
+
+A cold CLI run spends most of its time before the first rule runs: starting
+the interpreter, importing the engine, pdfplumber and python-docx, and
+building the rule set. ``python run_redflag.py serve`` (``redflag serve``)
+pays that once; ``run_redflag.py --server`` then sends each document to the
+server through redflag_client.py, which imports little more than socket and
+json, and falls back to in-process analysis when no server is running.
+
+Endpoints:
+
+    GET  /v1/health
+        {"status": "ok", "version": <engine version>, "pid": <server pid>}
+    POST /v1/analyze?filename=<name>&mode=full|gate&filter=1|0[&pdf_text=layout|fast]
+        body: the document's bytes. Returns what
+        ``RedFlagPipeline.analyze_bytes`` (mode "full", the default) or
+        ``gate_bytes`` (mode "gate") returns; the format is sniffed from the
+        content, with *filename*'s extension as the fallback. With
+        *pdf_text*, the request is refused (409) unless the server's loader
+        extracts PDF text in that mode.
+
+Errors are JSON objects ``{"error": <message>}`` with status 400 (document
+cannot be loaded, bad query), 404, 405, 409, 411, 413 or 500.
+
+The analyzer's rules and caches and the loader's settings are the server's
+own (see ``run_redflag.py serve``); a request cannot change them.
+
+Requests run on a BoundedExecutor (see bounded_executor.py): a burst of large
+PDFs cannot hold up small notes, and connections keep-alive so a caller
+gating many notes pays for one connection.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import errno
+import json
+import os
+import stat
+import sys
+import traceback
+from http import HTTPStatus
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+from urllib.parse import parse_qsl
+
+from boilerplate_filter import BoilerplateFilterConfig
+from bounded_executor import BoundedExecutor
+from document_loader import PDF_TEXT_MODES, DocumentLoader, UnsupportedFormatError
+from redflag_client import ServerUnavailable, default_address, parse_address, request
+from redflag_engine import RedFlagAnalyzer
+from redflag_pipeline import RedFlagPipeline
+
+# Largest document accepted, in bytes.
+MAX_BODY = 100 * 1024 * 1024
+
+_Response = Tuple[int, Dict[str, Any]]
+
+
+class GateServer:
+    """
+    Serves one warm analyzer and loader to many clients.
+
+    Filtered and unfiltered requests share the analyzer (and its result
+    cache) and the loader (and its extraction cache).
+
+    Args:
+        analyzer: The analyzer (default: built-in rules, no cache).
+        loader: Document loader (default: a new DocumentLoader).
+        filter_config: Boilerplate filter configuration for ``filter=1``
+            requests (default: everything enabled).
+        executor: Runs loading and analysis (default: a new BoundedExecutor,
+            closed when :meth:`run` returns).
+        max_body: Largest document accepted, in bytes.
+    """
+
+    def __init__(
+        self,
+        analyzer: RedFlagAnalyzer | None = None,
+        loader: DocumentLoader | None = None,
+        filter_config: BoilerplateFilterConfig | None = None,
+        executor: BoundedExecutor | None = None,
+        max_body: int = MAX_BODY,
+    ) -> None:
+        analyzer = analyzer or RedFlagAnalyzer()
+        loader = loader or DocumentLoader()
+        self._pdf_text = loader.pdf_text
+        self._pipelines = {
+            True: RedFlagPipeline(analyzer, True, filter_config, loader),
+            False: RedFlagPipeline(analyzer, False, loader=loader),
+        }
+        self._own_executor = executor is None
+        self._executor = executor or BoundedExecutor()
+        self._max_body = max_body
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._writers: Set[asyncio.StreamWriter] = set()
+
+    def serve_forever(self, address: str, ready: Callable[[str], None] | None = None) -> None:
+        """Run :meth:`run` on a new event loop until :meth:`stop` is called."""
+        asyncio.run(self.run(address, ready))
+
+    async def run(self, address: str, ready: Callable[[str], None] | None = None) -> None:
+        """
+        Listen on *address* and serve requests until :meth:`stop` is called.
+
+        Args:
+            address: Unix socket path or TCP ``host:port`` (port 0 picks a
+                free port).
+            ready: Called with the address being served (with the actual
+                port for TCP) once connections are accepted.
+
+        A Unix socket is created accessible to this user only, and at the
+        default address its directory is created (or must already be)
+        private to this user, so no other user can connect to the server or
+        stand in for it.
+
+        Raises OSError when the address is in use: a stale socket file left
+        by a server that died is replaced, a live server's is not.
+        """
+        kind, where = parse_address(address)
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        if kind == "unix":
+            if address == default_address():
+                private_dir(os.path.dirname(str(where)))
+            _claim_socket(str(where))
+            # Documents may be confidential: only the owner may connect, from
+            # the moment the socket file exists.
+            umask = os.umask(0o077)
+            try:
+                server = await asyncio.start_unix_server(self._handle, path=where)
+            finally:
+                os.umask(umask)
+        else:
+            host, port = where
+            server = await asyncio.start_server(self._handle, host, port)
+            address = f"{host}:{server.sockets[0].getsockname()[1]}"
+        try:
+            if ready is not None:
+                ready(address)
+            await self._stopping.wait()
+        finally:
+            server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await server.wait_closed()
+            if kind == "unix":
+                _unlink(str(where))
+            if self._own_executor:
+                self._executor.close()
+            self._loop = None
+
+    def stop(self) -> None:
+        """Stop serving; safe to call from any thread (or a signal handler)."""
+        loop, stopping = self._loop, self._stopping
+        if loop is not None and stopping is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(stopping.set)
+
+    # ------------------------------------------------------------------
+    # Connections
+    # ------------------------------------------------------------------
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.add(writer)
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    return  # client closed the connection
+                except asyncio.LimitOverrunError:
+                    await _respond(writer, 400, {"error": "request headers too large"}, False)
+                    return
+                try:
+                    method, target, version, headers = _parse_head(head)
+                except ValueError:
+                    await _respond(writer, 400, {"error": "malformed request"}, False)
+                    return
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" or (
+                    version == "HTTP/1.1" and connection != "close"
+                )
+                length = headers.get("content-length", "0")
+                if "transfer-encoding" in headers:
+                    await _respond(writer, 411, {"error": "Content-Length required"}, False)
+                    return
+                if not length.isdigit():
+                    await _respond(writer, 400, {"error": "invalid Content-Length"}, False)
+                    return
+                if int(length) > self._max_body:
+                    error = f"document larger than {self._max_body} bytes"
+                    await _respond(writer, 413, {"error": error}, False)
+                    return
+                if int(length) and headers.get("expect", "").lower() == "100-continue":
+                    writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+                try:
+                    body = await reader.readexactly(int(length))
+                except asyncio.IncompleteReadError:
+                    return
+
+                status, payload = await self._dispatch(method, target, body)
+                await _respond(writer, status, payload, keep_alive)
+        except ConnectionError:
+            pass  # client went away mid-request
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> _Response:
+        path, _, query = target.partition("?")
+        if path == "/v1/health":
+            if method != "GET":
+                return 405, {"error": f"{method} not allowed on {path}"}
+            return 200, {"status": "ok", "version": RedFlagAnalyzer.VERSION, "pid": os.getpid()}
+        if path != "/v1/analyze":
+            return 404, {"error": f"not found: {path}"}
+        if method != "POST":
+            return 405, {"error": f"{method} not allowed on {path}"}
+
+        params = dict(parse_qsl(query))
+        filename = params.get("filename", "")
+        mode = params.get("mode", "full")
+        use_filter = params.get("filter", "1")
+        if not filename:
+            return 400, {"error": "the filename parameter is required"}
+        if mode not in ("full", "gate"):
+            return 400, {"error": f"mode must be 'full' or 'gate', not {mode!r}"}
+        if use_filter not in ("0", "1"):
+            return 400, {"error": f"filter must be 0 or 1, not {use_filter!r}"}
+        pdf_text = params.get("pdf_text", self._pdf_text)
+        if pdf_text not in PDF_TEXT_MODES:
+            return 400, {"error": f"pdf_text must be one of {PDF_TEXT_MODES}, not {pdf_text!r}"}
+        if pdf_text != self._pdf_text:
+            return 409, {"error": f"this server extracts PDF text in {self._pdf_text!r} mode"}
+
+        pipeline = self._pipelines[use_filter == "1"]
+        try:
+            if mode == "gate":
+                result = await self._executor.run(
+                    pipeline.gate_bytes, body, filename, size=len(body)
+                )
+            else:
+                result = await pipeline.aanalyze_bytes(body, filename, self._executor)
+        except (UnsupportedFormatError, ValueError) as exc:
+            return 400, {"error": str(exc)}
+        except Exception as exc:  # one broken document must not take the server down
+            traceback.print_exc(file=sys.stderr)
+            return 500, {"error": f"{type(exc).__name__}: {exc}"}
+        return 200, result
+
+
+# ----------------------------
+# HTTP helpers
+# ----------------------------
+def _parse_head(head: bytes) -> Tuple[str, str, str, Dict[str, str]]:
+    """``(method, target, version, headers)``; header names are lower-cased."""
+    lines = head.decode("latin-1").split("\r\n")
+    parts = lines[0].split()
+    if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+        raise ValueError(f"malformed request line: {lines[0]!r}")
+    headers = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(":")
+        if not sep:
+            raise ValueError(f"malformed header: {line!r}")
+        headers[name.strip().lower()] = value.strip()
+    return parts[0], parts[1], parts[2], headers
+
+
+async def _respond(
+    writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any], keep_alive: bool
+) -> None:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+    )
+    if not keep_alive:
+        head += "Connection: close\r\n"
+    writer.write(head.encode("ascii") + b"\r\n" + body)
+    await writer.drain()
+
+
+# ----------------------------
+# Unix socket files
+# ----------------------------
+def private_dir(path: str) -> None:
+    """
+    Create directory *path* with mode 0700, or check that the existing one
+    is a directory owned by this user that no one else can access.
+
+    Raises PermissionError otherwise (e.g. another user created it first).
+    """
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(
+            errno.EACCES, f"{path} must be a directory private to this user (mode 0700)"
+        )
+
+
+def _claim_socket(path: str) -> None:
+    """Remove a stale socket file at *path*; raise if a server still answers there."""
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise OSError(errno.EEXIST, f"{path} exists and is not a socket")
+    try:
+        request(path, "GET", "/v1/health", timeout=5.0)
+    except ServerUnavailable:
+        _unlink(path)  # left behind by a server that did not shut down
+        return
+    raise OSError(errno.EADDRINUSE, f"a gate server is already listening on {path}")
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,311 @@
+"""
+result_cache.py
+
+Content-hash caches: analyzer results (ResultCache) and extracted document
+text (ExtractionCache).
+
+The same drafts are routinely re-submitted through the gate (retries,
+dashboard re-renders, CI reruns). RedFlagAnalyzer consults an optional
+ResultCache keyed by SHA-256 of the normalized text, the engine VERSION and
+a digest of the effective config, so a repeated analysis only pays for
+normalization and a lookup.
+
+Design goals:
+- Bounded in-memory LRU, optionally backed by an on-disk SQLite table that
+  survives across processes and CI runs.
+- Results are stored as JSON, so callers can freely mutate what they get back
+  (e.g. the CLI attaching `input` metadata) without corrupting the cache.
+- Hit/miss counters for sizing.
+
+ExtractionCache does the same one stage earlier. Thresholds and rules change
+far more often than the archive they are run over, and re-extracting an
+unchanged PDF costs more than analyzing its text: DocumentLoader looks each
+file up by a hash of its bytes before parsing it.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+def cache_key(normalized_text: str, engine_version: str, config_digest: str) -> str:
+    """Return the SHA-256 cache key for one analysis."""
+    h = hashlib.sha256()
+    h.update(engine_version.encode("utf-8"))
+    h.update(b"\0")
+    h.update(config_digest.encode("utf-8"))
+    h.update(b"\0")
+    h.update(normalized_text.encode("utf-8", errors="surrogatepass"))
+    return h.hexdigest()
+
+
+def config_digest(config: Dict[str, Any]) -> str:
+    """Return a stable digest of an effective analyzer config."""
+    payload = json.dumps(config, sort_keys=True, separators=(",", ":"), default=list)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    Bounded LRU of analyzer results with an optional SQLite backend.
+
+    Args:
+        maxsize: Maximum number of results held in memory.
+        path: Optional SQLite database file. When given, every result is also
+            persisted there and memory misses fall through to disk.
+    """
+
+    def __init__(self, maxsize: int = 1024, path: str | Path | None = None) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self._maxsize = maxsize
+        self._memory: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._db: sqlite3.Connection | None = None
+        if path is not None:
+            self._db = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, payload TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current occupancy."""
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "size": len(self._memory),
+                "maxsize": self._maxsize,
+                "persistent": self._db is not None,
+            }
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        """Return a fresh copy of the cached result for *key*, or None."""
+        with self._lock:
+            payload = self._memory.get(key)
+            if payload is not None:
+                self._memory.move_to_end(key)
+            elif self._db is not None:
+                row = self._db.execute(
+                    "SELECT payload FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    payload = row[0]
+                    self._remember(key, payload)
+            if payload is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+        return json.loads(payload)
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store *result* under *key*."""
+        payload = json.dumps(result, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._remember(key, payload)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, payload) VALUES (?, ?)",
+                    (key, payload),
+                )
+                self._db.commit()
+
+    def clear(self) -> None:
+        """Drop every cached result (memory and disk) and reset counters."""
+        with self._lock:
+            self._memory.clear()
+            self._hits = 0
+            self._misses = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def close(self) -> None:
+        """Close the SQLite backend, if any."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    # ------------------------------------------------------------------
+    # Private helpers
+    # ------------------------------------------------------------------
+
+    def _remember(self, key: str, payload: str) -> None:
+        self._memory[key] = payload
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._maxsize:
+            self._memory.popitem(last=False)
+
+
+class ExtractionCache:
+    """
+    On-disk cache of extracted document text, shared across processes.
+
+    Each entry holds a document's text (zlib-compressed), format, page count
+    and load warnings, under a key derived from the file's bytes (see
+    DocumentLoader). Once the compressed text of all entries exceeds
+    *max_bytes*, the least recently used entries are evicted.
+
+    Args:
+        path: SQLite database file.
+        max_bytes: Budget for the compressed text of all entries
+            (default 1 GiB).
+    """
+
+    def __init__(self, path: str | Path, max_bytes: int = 1 << 30) -> None:
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be at least 1")
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._db: sqlite3.Connection | None = sqlite3.connect(
+            str(path), timeout=30, check_same_thread=False
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS extractions ("
+            "key TEXT PRIMARY KEY, format TEXT NOT NULL, page_count INTEGER, "
+            "warnings TEXT NOT NULL, text BLOB NOT NULL, size INTEGER NOT NULL, "
+            "used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS extractions_used ON extractions (used)")
+        self._db.commit()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current occupancy."""
+        with self._lock:
+            count, size = (
+                self._connection()
+                .execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM extractions")
+                .fetchone()
+            )
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "size": count,
+                "bytes": size,
+                "max_bytes": self._max_bytes,
+            }
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        """Return the entry for *key* (text, format, page_count, warnings), or None."""
+        with self._lock:
+            db = self._connection()
+            row = db.execute(
+                "SELECT format, page_count, warnings, text FROM extractions WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            db.execute("UPDATE extractions SET used = ? WHERE key = ?", (time.time(), key))
+            db.commit()
+        fmt, page_count, warnings, text = row
+        return {
+            "text": zlib.decompress(text).decode("utf-8", errors="surrogatepass"),
+            "format": fmt,
+            "page_count": page_count,
+            "warnings": json.loads(warnings),
+        }
+
+    def put(
+        self, key: str, text: str, fmt: str, page_count: int | None, warnings: List[str]
+    ) -> None:
+        """Store one document's extraction under *key*, evicting as needed."""
+        blob = zlib.compress(text.encode("utf-8", errors="surrogatepass"))
+        if len(blob) > self._max_bytes:
+            return  # would evict everything else and still not fit
+        with self._lock:
+            db = self._connection()
+            db.execute(
+                "INSERT OR REPLACE INTO extractions "
+                "(key, format, page_count, warnings, text, size, used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, fmt, page_count, json.dumps(warnings), blob, len(blob), time.time()),
+            )
+            self._evict(db)
+            db.commit()
+
+    def clear(self) -> None:
+        """Drop every entry and reset counters."""
+        with self._lock:
+            self._hits = 0
+            self._misses = 0
+            db = self._connection()
+            db.execute("DELETE FROM extractions")
+            db.commit()
+
+    def close(self) -> None:
+        """Close the SQLite database."""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Private helpers
+    # ------------------------------------------------------------------
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            raise ValueError("ExtractionCache is closed")
+        return self._db
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        """Delete least recently used entries until the budget is met."""
+        excess = db.execute("SELECT COALESCE(SUM(size), 0) FROM extractions").fetchone()[0]
+        excess -= self._max_bytes
+        if excess <= 0:
+            return
+        victims = []
+        for key, size in db.execute("SELECT key, size FROM extractions ORDER BY used"):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        db.executemany("DELETE FROM extractions WHERE key = ?", victims)
@@ -0,0 +1,585 @@
+"""
+rule_registry.py
+
+Declarative detection rules for the RedFlag engine.
+
+A rule is plain data: keyword conditions, named regex patterns, severity
+tiers, evidence and per-severity actions. Desk-specific rules can therefore
+live in JSON/YAML files and be evaluated alongside the built-in detectors.
+
+RuleSet compiles a list of rules once, at construction time:
+- every keyword from every rule goes into one shared KeywordMatcher, so a
+  document is scanned once however many rules there are;
+- identical regexes are searched once;
+- each rule is indexed under the keywords/patterns it cannot fire without,
+  so a document only evaluates the rules its hit table can satisfy.
+
+Rule format (JSON shown; YAML is the same structure):
+
+    {
+      "id": "OPTIONS_LEVERAGE_TRAP",
+      "title": "Options leverage trap",
+      "when": {"any": ["naked call", "max leverage"]},
+      "severity": "HIGH",
+      "escalate": [{"severity": "CRITICAL", "when": {"all": ["naked call", "earnings"]}}],
+      "evidence": ["naked call", "max leverage"],
+      "protect": ["naked call"],
+      "explanation": "...",
+      "action": "PM_REVIEW: ...",
+      "actions": {"CRITICAL": "AUTO_REJECT: ..."}
+    }
+
+Conditions:
+- "keyword": the keyword occurs in the normalized text.
+- {"any": [...]}, {"all": [...]}, {"not": cond}: boolean combinators.
+- {"at_least": n, "of": [...]}: at least n of the conditions hold.
+- {"pattern": "name"}: the rule's regex `patterns[name]` matches.
+
+`protect` lists keywords of the rule that mark risk content: the boilerplate
+filter never strips text containing one of them (see RuleSet.protected).
+
+A rule may take its base severity from a count captured by a pattern
+instead of `severity`:
+
+    "count": {"pattern": "calls", "group": 1,
+              "tiers": {"MEDIUM": 10, "HIGH": 15}, "otherwise": "LOW"}
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from keyword_matcher import KeywordMatcher
+
+SEVERITY_LEVELS = ("NONE", "LOW", "MEDIUM", "HIGH", "CRITICAL")
+_SEVERITY_RANK = {sev: rank for rank, sev in enumerate(SEVERITY_LEVELS)}
+
+DEFAULT_EVIDENCE_LIMIT = 8
+
+Condition = Union[str, Dict[str, Any]]
+
+# Compiled condition: (hits, pattern matches) -> bool
+_Evaluator = Callable[[Dict[str, int], Dict[str, "re.Match"]], bool]
+# Keywords / pattern sources at least one of which a condition needs, or None
+# when it can hold without any (e.g. "not").
+_Triggers = Optional[Tuple[FrozenSet[str], FrozenSet[str]]]
+
+
+# Pattern sources compile once per process, however many rule sets share them.
+_compile_pattern = lru_cache(maxsize=None)(re.compile)
+
+
+class RuleError(ValueError):
+    """Raised when a rule definition is invalid."""
+
+
+@dataclass(frozen=True)
+class Rule:
+    """One declarative detection rule (see the module docstring for the format)."""
+
+    id: str
+    title: str
+    when: Condition
+    severity: str = "MEDIUM"
+    escalate: Tuple[Dict[str, Any], ...] = ()
+    count: Optional[Dict[str, Any]] = None
+    patterns: Dict[str, str] = field(default_factory=dict)
+    evidence: Tuple[Union[str, Dict[str, str]], ...] = ()
+    evidence_sort: bool = False
+    evidence_limit: int = DEFAULT_EVIDENCE_LIMIT
+    protect: Tuple[str, ...] = ()
+    explanation: str = ""
+    action: str = ""
+    actions: Dict[str, str] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "escalate", tuple(self.escalate))
+        object.__setattr__(self, "evidence", tuple(self.evidence))
+        object.__setattr__(self, "protect", tuple(self.protect))
+        _validate(self)
+
+    @classmethod
+    def from_dict(cls, spec: Mapping[str, Any]) -> "Rule":
+        """Build a rule from its JSON/YAML mapping."""
+        if not isinstance(spec, Mapping):
+            raise RuleError(f"Rule must be a mapping, got {type(spec).__name__}")
+        unknown = set(spec) - set(cls.__dataclass_fields__)
+        if unknown:
+            raise RuleError(f"Rule {spec.get('id', '?')!r}: unknown keys {sorted(unknown)}")
+        missing = [key for key in ("id", "title", "when") if key not in spec]
+        if missing:
+            raise RuleError(f"Rule {spec.get('id', '?')!r}: missing {missing}")
+        return cls(**spec)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the rule as a JSON-serializable mapping."""
+        return asdict(self)
+
+    def action_for(self, severity: str) -> str:
+        """Recommended action for a flag raised at *severity*."""
+        return self.actions.get(severity, self.action)
+
+
+class RuleMatch(NamedTuple):
+    """A rule that fired, with its resolved severity and evidence tokens."""
+
+    rule: Rule
+    severity: str
+    evidence: List[str]
+
+
+# ----------------------------
+# Loading
+# ----------------------------
+def load_rules(path: str | Path) -> List[Rule]:
+    """
+    Load rules from a .json, .yaml or .yml file.
+
+    The file holds either a list of rules or a mapping with a "rules" list.
+    YAML requires PyYAML (``pip install pyyaml``).
+    """
+    path = Path(path)
+    ext = path.suffix.lower()
+    raw = path.read_text(encoding="utf-8")
+    if ext == ".json":
+        data = json.loads(raw)
+    elif ext in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as exc:
+            raise RuleError("YAML rule files require PyYAML: pip install pyyaml") from exc
+        data = yaml.safe_load(raw)
+    else:
+        raise RuleError(f"Unsupported rule file format: '{ext}' (use .json, .yaml or .yml)")
+
+    if isinstance(data, Mapping):
+        data = data.get("rules")
+    if not isinstance(data, list):
+        raise RuleError(f"{path}: expected a list of rules or a mapping with a 'rules' list")
+    return [Rule.from_dict(spec) for spec in data]
+
+
+# ----------------------------
+# Validation
+# ----------------------------
+def _validate(rule: Rule) -> None:
+    where = f"Rule {rule.id!r}"
+    if not rule.id:
+        raise RuleError("Rule id must be non-empty")
+    _check_severity(rule.severity, where)
+    for name, pattern in rule.patterns.items():
+        try:
+            _compile_pattern(pattern)
+        except re.error as exc:
+            raise RuleError(f"{where}: invalid pattern {name!r}: {exc}") from exc
+    _check_condition(rule.when, rule, where)
+    for step in rule.escalate:
+        if not isinstance(step, Mapping) or set(step) != {"severity", "when"}:
+            raise RuleError(f"{where}: escalate entries need exactly 'severity' and 'when'")
+        _check_severity(step["severity"], where)
+        _check_condition(step["when"], rule, where)
+    if rule.count is not None:
+        count = rule.count
+        if count.get("pattern") not in rule.patterns:
+            raise RuleError(f"{where}: count.pattern must name one of the rule's patterns")
+        for severity in count.get("tiers", {}):
+            _check_severity(severity, where)
+        _check_severity(count.get("otherwise", "NONE"), where)
+    for item in rule.evidence:
+        if isinstance(item, Mapping):
+            if item.get("pattern") not in rule.patterns:
+                raise RuleError(f"{where}: evidence pattern must name one of the rule's patterns")
+        elif not isinstance(item, str) or not item:
+            raise RuleError(f"{where}: evidence items must be keywords or {{'pattern': name}}")
+    for severity in rule.actions:
+        _check_severity(severity, where)
+    if rule.evidence_limit < 0:
+        raise RuleError(f"{where}: evidence_limit must be >= 0")
+    if rule.protect:
+        vocabulary = _rule_keywords(rule)
+        for kw in rule.protect:
+            if not isinstance(kw, str) or kw not in vocabulary:
+                raise RuleError(
+                    f"{where}: protected keyword {kw!r} is not one of the rule's keywords"
+                )
+
+
+def _rule_keywords(rule: Rule) -> Set[str]:
+    """Every keyword a rule's conditions and evidence refer to."""
+    keywords: Set[str] = set()
+    stack: List[Any] = [rule.when, *(step["when"] for step in rule.escalate)]
+    while stack:
+        cond = stack.pop()
+        if isinstance(cond, str):
+            keywords.add(cond)
+        elif "not" in cond:
+            stack.append(cond["not"])
+        elif "pattern" not in cond:
+            stack.extend(cond.get("any") or cond.get("all") or cond["of"])
+    keywords.update(item for item in rule.evidence if isinstance(item, str))
+    return keywords
+
+
+def _check_severity(severity: Any, where: str) -> None:
+    if severity not in _SEVERITY_RANK:
+        raise RuleError(f"{where}: unknown severity {severity!r}")
+
+
+def _check_condition(cond: Any, rule: Rule, where: str) -> None:
+    if isinstance(cond, str):
+        if not cond:
+            raise RuleError(f"{where}: empty keyword in condition")
+        return
+    if not isinstance(cond, Mapping):
+        raise RuleError(f"{where}: condition must be a keyword or a mapping, got {cond!r}")
+    keys = set(cond)
+    if keys in ({"any"}, {"all"}):
+        children = cond[keys.pop()]
+    elif keys == {"at_least", "of"}:
+        if not isinstance(cond["at_least"], int):
+            raise RuleError(f"{where}: at_least must be an integer")
+        children = cond["of"]
+    elif keys == {"not"}:
+        children = [cond["not"]]
+    elif keys == {"pattern"}:
+        if cond["pattern"] not in rule.patterns:
+            raise RuleError(f"{where}: unknown pattern {cond['pattern']!r}")
+        return
+    else:
+        raise RuleError(f"{where}: unrecognized condition {dict(cond)!r}")
+    if not isinstance(children, list) or not children:
+        raise RuleError(f"{where}: condition {sorted(keys)} needs a non-empty list")
+    for child in children:
+        _check_condition(child, rule, where)
+
+
+# ----------------------------
+# Compilation
+# ----------------------------
+class _CompiledRule:
+    """A rule with its conditions turned into closures over the shared plan."""
+
+    __slots__ = (
+        "rule",
+        "when",
+        "triggers",
+        "escalate",
+        "count",
+        "evidence",
+        "keywords",
+        "monotone",
+    )
+
+    def __init__(self, rule: Rule) -> None:
+        self.rule = rule
+        self.keywords: List[str] = []
+        # Cleared by any "not" condition; see `RuleSet.settled_severity`.
+        self.monotone = True
+        self.when, self.triggers = self._compile(rule.when)
+        self.escalate = [
+            (step["severity"], self._compile(step["when"])[0]) for step in rule.escalate
+        ]
+        self.count = None
+        if rule.count is not None:
+            tiers = sorted(
+                rule.count.get("tiers", {}).items(),
+                key=lambda item: _SEVERITY_RANK[item[0]],
+                reverse=True,
+            )
+            self.count = (
+                rule.patterns[rule.count["pattern"]],
+                rule.count.get("group", 1),
+                tiers,
+                rule.count.get("otherwise", "NONE"),
+            )
+            # A first match counted below `otherwise` would lower the severity.
+            floor = _SEVERITY_RANK[self.count[3]]
+            if any(_SEVERITY_RANK[tier] < floor for tier, _ in tiers):
+                self.monotone = False
+        self.evidence: List[Tuple[bool, str]] = []  # (is_pattern, keyword or source)
+        for item in rule.evidence:
+            if isinstance(item, Mapping):
+                self.evidence.append((True, rule.patterns[item["pattern"]]))
+            else:
+                self.keywords.append(item)
+                self.evidence.append((False, item))
+
+    def _compile(self, cond: Condition) -> Tuple[_Evaluator, _Triggers]:
+        if isinstance(cond, str):
+            self.keywords.append(cond)
+            return (lambda hits, matches, kw=cond: kw in hits), (frozenset([cond]), frozenset())
+        if "pattern" in cond:
+            source = self.rule.patterns[cond["pattern"]]
+            return (lambda hits, matches, src=source: src in matches), (
+                frozenset(),
+                frozenset([source]),
+            )
+        if "not" in cond:
+            self.monotone = False
+            inner = self._compile(cond["not"])[0]
+            return (lambda hits, matches: not inner(hits, matches)), None
+
+        compiled = [
+            self._compile(child) for child in cond.get("any") or cond.get("all") or cond["of"]
+        ]
+        children = [evaluator for evaluator, _ in compiled]
+        triggers = [trig for _, trig in compiled]
+        if "all" in cond:
+            known = [trig for trig in triggers if trig is not None]
+            # Any child's triggers are necessary; index under the narrowest.
+            narrowest = min(known, key=lambda t: len(t[0]) + len(t[1])) if known else None
+            return (lambda hits, matches: all(c(hits, matches) for c in children)), narrowest
+
+        union: _Triggers = None
+        if all(trig is not None for trig in triggers):
+            union = (
+                frozenset().union(*(t[0] for t in triggers)),
+                frozenset().union(*(t[1] for t in triggers)),
+            )
+        if "any" in cond:
+            return (lambda hits, matches: any(c(hits, matches) for c in children)), union
+
+        need = cond["at_least"]
+
+        def at_least(hits: Dict[str, int], matches: Dict[str, re.Match]) -> bool:
+            return sum(1 for c in children if c(hits, matches)) >= need
+
+        return at_least, (union if need > 0 else None)
+
+    @property
+    def max_severity(self) -> str:
+        """Highest severity this rule can ever report."""
+        candidates = [self.rule.severity if self.count is None else self.count[3]]
+        if self.count is not None:
+            candidates.extend(tier for tier, _ in self.count[2])
+        candidates.extend(tier for tier, _ in self.escalate)
+        return max(candidates, key=_SEVERITY_RANK.__getitem__)
+
+    def severity(self, hits: Dict[str, int], matches: Dict[str, re.Match]) -> str:
+        """Severity the rule reaches on a document ("NONE" if it does not fire)."""
+        if not self.when(hits, matches):
+            return "NONE"
+        severity = self.rule.severity
+        if self.count is not None:
+            source, group, tiers, severity = self.count
+            m = matches.get(source)
+            if m is not None:
+                value = int(m.group(group))
+                for tier, threshold in tiers:
+                    if value >= threshold:
+                        severity = tier
+                        break
+        for tier, condition in self.escalate:
+            if _SEVERITY_RANK[tier] > _SEVERITY_RANK[severity] and condition(hits, matches):
+                severity = tier
+        return severity
+
+    def evaluate(self, hits: Dict[str, int], matches: Dict[str, re.Match]) -> Optional[RuleMatch]:
+        severity = self.severity(hits, matches)
+        if severity == "NONE":
+            return None
+
+        rule = self.rule
+        evidence = []
+        for is_pattern, value in self.evidence:
+            if is_pattern:
+                m = matches.get(value)
+                if m is not None:
+                    evidence.append(m.group(0))
+            elif value in hits:
+                evidence.append(value)
+        if rule.evidence_sort:
+            evidence = sorted(set(evidence))
+        return RuleMatch(rule, severity, evidence[: rule.evidence_limit])
+
+
+class RuleSet:
+    """
+    A compiled, ordered collection of rules sharing one matching plan.
+
+    Args:
+        rules: Rules in output order. Ids must be unique.
+    """
+
+    def __init__(self, rules: Iterable[Rule]) -> None:
+        self._rules = tuple(rules)
+        seen = set()
+        for rule in self._rules:
+            if rule.id in seen:
+                raise RuleError(f"Duplicate rule id {rule.id!r}")
+            seen.add(rule.id)
+
+        self._compiled = [_CompiledRule(rule) for rule in self._rules]
+        self._matcher = KeywordMatcher(kw for c in self._compiled for kw in c.keywords)
+        self._protected = KeywordMatcher(kw for rule in self._rules for kw in rule.protect)
+        self._patterns: Dict[str, re.Pattern] = {}
+        for rule in self._rules:
+            for source in rule.patterns.values():
+                if source not in self._patterns:
+                    self._patterns[source] = _compile_pattern(source)
+
+        self._keyword_index: Dict[str, List[int]] = {}
+        self._pattern_index: Dict[str, List[int]] = {}
+        always = []
+        for index, compiled in enumerate(self._compiled):
+            if compiled.triggers is None:
+                always.append(index)
+                continue
+            keywords, sources = compiled.triggers
+            for kw in keywords:
+                self._keyword_index.setdefault(kw, []).append(index)
+            for source in sources:
+                self._pattern_index.setdefault(source, []).append(index)
+        self._always = frozenset(always)
+
+        # Gate order: rules able to reach the highest severity first (stable).
+        self._gate_order = sorted(
+            self._compiled, key=lambda c: _SEVERITY_RANK[c.max_severity], reverse=True
+        )
+
+    @property
+    def rules(self) -> Tuple[Rule, ...]:
+        return self._rules
+
+    @property
+    def matcher(self) -> KeywordMatcher:
+        """The shared matcher over every rule keyword."""
+        return self._matcher
+
+    @property
+    def protected(self) -> KeywordMatcher:
+        """Matcher over every rule's `protect` keywords (boilerplate safety net)."""
+        return self._protected
+
+    @property
+    def patterns(self) -> Dict[str, re.Pattern]:
+        """Distinct compiled patterns, keyed by regex source."""
+        return self._patterns
+
+    def search_patterns(self, text: str, skip: Iterable[str] = ()) -> Dict[str, re.Match]:
+        """First match of every pattern in *text* (except those in *skip*), by source."""
+        matches = {}
+        for source, pattern in self._patterns.items():
+            if source in skip:
+                continue
+            m = pattern.search(text)
+            if m is not None:
+                matches[source] = m
+        return matches
+
+    def evaluate(self, hits: Dict[str, int], matches: Dict[str, re.Match]) -> List[RuleMatch]:
+        """Evaluate the rules reachable from *hits* / *matches*, in rule order."""
+        candidates = set(self._always)
+        keyword_index = self._keyword_index
+        for kw in hits:
+            indexes = keyword_index.get(kw)
+            if indexes:
+                candidates.update(indexes)
+        for source in matches:
+            candidates.update(self._pattern_index.get(source, ()))
+
+        results = []
+        for index in sorted(candidates):
+            match = self._compiled[index].evaluate(hits, matches)
+            if match is not None:
+                results.append(match)
+        return results
+
+    def gate_severity(self, text: str, stop_at: str = "HIGH") -> str:
+        """
+        Highest severity the rules reach on normalized *text*, short-circuited.
+
+        Rules are tried in order of the highest severity they can report, with
+        keyword and pattern lookups done lazily against *text* instead of a
+        full scan. Evaluation stops once *stop_at* is reached (the result is
+        then a lower bound) or once no remaining rule could raise the result
+        (the result is then exact). No evidence is collected.
+        """
+        hits = _LazyHits(text)
+        matches = _LazyMatches(text, self._patterns)
+        worst = 0
+        stop = _SEVERITY_RANK[stop_at]
+        for compiled in self._gate_order:
+            if _SEVERITY_RANK[compiled.max_severity] <= worst:
+                break
+            rank = _SEVERITY_RANK[compiled.severity(hits, matches)]
+            if rank > worst:
+                worst = rank
+                if worst >= stop:
+                    break
+        return SEVERITY_LEVELS[worst]
+
+    def settled_severity(self, hits: Dict[str, int], matches: Dict[str, re.Match]) -> str:
+        """
+        Severity that no text appended to the document can lower.
+
+        *hits* / *matches* describe a prefix of a document, as collected by
+        streamed analysis: more text only adds keywords and first pattern
+        matches. Rules without "not" conditions, whose count tiers all lie at
+        or above their `otherwise`, can then only rise, so the highest
+        severity they reach on the prefix holds for the whole document.
+        Other rules are left out.
+        """
+        worst = 0
+        for compiled in self._gate_order:
+            if _SEVERITY_RANK[compiled.max_severity] <= worst:
+                break
+            if compiled.monotone:
+                worst = max(worst, _SEVERITY_RANK[compiled.severity(hits, matches)])
+        return SEVERITY_LEVELS[worst]
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+
+class _LazyHits:
+    """Hit-table stand-in for gate mode: membership is checked on demand."""
+
+    __slots__ = ("_text", "_seen")
+
+    def __init__(self, text: str) -> None:
+        self._text = text
+        self._seen: Dict[str, bool] = {}
+
+    def __contains__(self, keyword: str) -> bool:
+        found = self._seen.get(keyword)
+        if found is None:
+            found = self._seen[keyword] = keyword in self._text
+        return found
+
+
+class _LazyMatches:
+    """Pattern-match stand-in for gate mode: each pattern is searched on demand."""
+
+    __slots__ = ("_text", "_patterns", "_seen")
+
+    def __init__(self, text: str, patterns: Dict[str, re.Pattern]) -> None:
+        self._text = text
+        self._patterns = patterns
+        self._seen: Dict[str, Optional[re.Match]] = {}
+
+    def get(self, source: str) -> Optional[re.Match]:
+        if source not in self._seen:
+            self._seen[source] = self._patterns[source].search(self._text)
+        return self._seen[source]
+
+    def __contains__(self, source: str) -> bool:
+        return self.get(source) is not None
@@ -7,14 +7,29 @@ CLI entry point to run the RedFlag Analyst gate on a text input.
 Usage:
   python run_redflag.py --input analyst_note.txt
   python run_redflag.py --input report.pdf
+  python run_redflag.py --input broker_report.pdf --pdf-workers 8
+  python run_redflag.py --input broker_report.pdf --gate-only
   python run_redflag.py --input research.docx --no-filter
   python run_redflag.py --input analyst_note.txt --output report.json
+  python run_redflag.py --input-dir archive/ --glob "**/*.pdf" --output results.jsonl
+  python run_redflag.py --input-dir archive/ --output - --workers 8
+  python run_redflag.py --input analyst_note.txt --rules desk_rules.yaml
+  python run_redflag.py --input-dir archive/ --extract-cache extract.db --output results.jsonl
+  python run_redflag.py --input-dir archive/ --pdf-text layout --output results.jsonl
+  python run_redflag.py serve
+  python run_redflag.py --input analyst_note.txt --server
 
 Design goals:
 - Runs locally with deterministic outputs (no API keys required)
 - Produces JSON with risk flags, severity scores, and gate recommendation
 - Accepts .txt, .pdf, and .docx inputs
 - Strips institutional boilerplate by default (configurable)
+- Batch mode streams one JSON object per line (JSONL) across a process pool
+- `serve` keeps a warm pipeline in memory; `--server` gates through it and
+  falls back to in-process analysis when no server is running
+
+The analysis modules are imported where they are used, so a run that gates
+through a server only imports the thin client (redflag_client.py).
 """
 
 from __future__ import annotations
@@ -24,13 +39,28 @@ import json
 import os
 import sys
 from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+from redflag_client import ServerError, ServerMismatch, ServerUnavailable, default_address
+
+if TYPE_CHECKING:
+    from document_loader import DocumentLoader
+    from redflag_engine import RedFlagAnalyzer
+    from redflag_pipeline import RedFlagPipeline
+    from rule_registry import Rule
+
+# Exit codes are useful for CI / gating:
+# 0 PASS, 10 PM_REVIEW, 20 AUTO_REJECT (2 = input error)
+_GATE_EXIT_CODES = {"PASS": 0, "PM_REVIEW": 10, "AUTO_REJECT": 20}
+_ERROR_EXIT_CODE = 2
 
-from boilerplate_filter import BoilerplateFilter
-from document_loader import DocumentLoader, UnsupportedFormatError
-from redflag_engine import RedFlagAnalyzer
+# document_loader.PDF_TEXT_MODES, spelled out so parsing arguments does not
+# import the loader.
+_PDF_TEXT_MODES = ("layout", "fast")
 
 
-def _default_results_path(input_path: str) -> str:
+def _default_results_path(input_path: str, ext: str = ".json") -> str:
     """
     Construct a default RESULTS/<input>_<timestamp>.json path.
     """
@@ -39,86 +69,512 @@ def _default_results_path(input_path: str) -> str:
 
     base = os.path.splitext(os.path.basename(input_path))[0]
     ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-    return os.path.join(results_dir, f"{base}_{ts}.json")
+    return os.path.join(results_dir, f"{base}_{ts}{ext}")
+
+
+def _exit_code(gate: str) -> int:
+    return _GATE_EXIT_CODES.get(gate, _GATE_EXIT_CODES["AUTO_REJECT"])
+
+
+# ----------------------------
+# Batch mode
+# ----------------------------
+# Per-process pipeline for batch mode; built once by the pool initializer so
+# imports, filter regexes and the analyzer are paid once per worker.
+_BATCH_PIPELINE: Optional[RedFlagPipeline] = None
+
+
+def _build_analyzer(cache_db: Optional[str], rules: Sequence[Rule] = ()) -> RedFlagAnalyzer:
+    from redflag_engine import RedFlagAnalyzer
+    from result_cache import ResultCache
+
+    cache = ResultCache(path=cache_db) if cache_db else None
+    return RedFlagAnalyzer(cache=cache, rules=rules)
+
+
+def _build_loader(
+    extract_cache: Optional[str], pdf_workers: int = 1, pdf_text: str = "layout"
+) -> DocumentLoader:
+    from document_loader import DocumentLoader
+    from result_cache import ExtractionCache
+
+    cache = ExtractionCache(extract_cache) if extract_cache else None
+    return DocumentLoader(pdf_workers=pdf_workers, cache=cache, pdf_text=pdf_text)
+
+
+def _init_batch_worker(
+    use_filter: bool,
+    cache_db: Optional[str] = None,
+    rules: Sequence[Rule] = (),
+    extract_cache: Optional[str] = None,
+    pdf_text: str = "fast",
+) -> None:
+    from redflag_pipeline import RedFlagPipeline
+
+    global _BATCH_PIPELINE
+    _BATCH_PIPELINE = RedFlagPipeline(
+        _build_analyzer(cache_db, rules),
+        use_filter=use_filter,
+        loader=_build_loader(extract_cache, pdf_text=pdf_text),
+    )
+
+
+def _analyze_batch_item(in_path: str) -> Tuple[str, str]:
+    """Analyze one batch file, returning ``(gate_decision or "ERROR", json_line)``."""
+    from document_loader import UnsupportedFormatError
+
+    if _BATCH_PIPELINE is None:  # pragma: no cover - initializer always runs first
+        raise RuntimeError("batch worker was not initialized")
+    try:
+        result = _BATCH_PIPELINE.analyze_file(in_path)
+    except (UnsupportedFormatError, ValueError, OSError) as exc:
+        record = {"input": {"path": in_path}, "error": str(exc)}
+        return "ERROR", json.dumps(record, ensure_ascii=False)
+    return result["overall"]["gate_decision"], json.dumps(result, ensure_ascii=False)
+
+
+def _collect_batch_paths(input_dir: str, pattern: str) -> List[str]:
+    """
+    Return the documents under *input_dir* matching *pattern*, sorted.
+
+    A file is a document when its extension is supported or, as for a single
+    --input file, its content is recognized (a PDF saved without an
+    extension, a DOCX named .bin).
+    """
+    from document_loader import DocumentLoader, UnsupportedFormatError
+
+    loader = DocumentLoader()
+    paths = []
+    for p in Path(input_dir).glob(pattern):
+        if not p.is_file():
+            continue
+        if p.suffix.lower() not in DocumentLoader.SUPPORTED_EXTENSIONS:
+            try:
+                loader.detect_format(p)
+            except (UnsupportedFormatError, OSError):
+                continue
+        paths.append(str(p))
+    return sorted(paths)
+
+
+def _iter_batch_results(
+    paths: List[str],
+    use_filter: bool,
+    workers: int,
+    cache_db: Optional[str] = None,
+    rules: Sequence[Rule] = (),
+    extract_cache: Optional[str] = None,
+    pdf_text: str = "fast",
+) -> Iterator[Tuple[str, str]]:
+    if workers <= 1:
+        _init_batch_worker(use_filter, cache_db, rules, extract_cache, pdf_text)
+        for path in paths:
+            yield _analyze_batch_item(path)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, min(64, len(paths) // (workers * 4)))
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_batch_worker,
+        initargs=(use_filter, cache_db, tuple(rules), extract_cache, pdf_text),
+    )
+    try:
+        yield from pool.map(_analyze_batch_item, paths, chunksize=chunksize)
+    finally:
+        # Closed early (the output's reader went away): drop the queued files.
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _run_batch(args: argparse.Namespace, rules: Sequence[Rule] = ()) -> int:
+    input_dir = args.input_dir or "."
+    if not os.path.isdir(input_dir):
+        print(f"ERROR: input directory not found: {input_dir}", file=sys.stderr)
+        return _ERROR_EXIT_CODE
+
+    paths = _collect_batch_paths(input_dir, args.glob or "*")
+    if not paths:
+        print(f"ERROR: no supported files matched in {input_dir}", file=sys.stderr)
+        return _ERROR_EXIT_CODE
+
+    workers = args.workers or os.cpu_count() or 1
+    out_path = args.output or _default_results_path(os.path.abspath(input_dir), ".jsonl")
+
+    counts = {"PASS": 0, "PM_REVIEW": 0, "AUTO_REJECT": 0, "ERROR": 0}
+    worst_code = 0
+
+    out: TextIO = sys.stdout if out_path == "-" else open(out_path, "w", encoding="utf-8")
+    results = _iter_batch_results(
+        paths,
+        not args.no_filter,
+        workers,
+        args.cache_db,
+        rules,
+        args.extract_cache,
+        args.pdf_text or "fast",
+    )
+    processed = len(paths)
+    try:
+        for gate, line in results:
+            out.write(line + "\n")
+            counts[gate] += 1
+            if gate != "ERROR":
+                worst_code = max(worst_code, _exit_code(gate))
+        out.flush()
+    except BrokenPipeError:
+        # The reader stopped early (e.g. `--output - | head`): cancel the rest,
+        # and point stdout at devnull so the flush at exit cannot fail again.
+        results.close()
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        os.close(devnull)
+        processed = sum(counts.values())
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    summary = ", ".join(f"{gate}={n}" for gate, n in counts.items())
+    print(f"Processed {processed} files: {summary}", file=sys.stderr)
+
+    # Worst gate across the batch; load failures surface as 2 only when
+    # nothing gated worse.
+    if worst_code == 0 and counts["ERROR"]:
+        return _ERROR_EXIT_CODE
+    return worst_code
+
+
+def _load_rule_files(paths: Sequence[str]) -> Optional[List[Rule]]:
+    """Rules from every file in *paths*, or None (after reporting) when one fails."""
+    rules: List[Rule] = []
+    if not paths:
+        return rules
+
+    from rule_registry import load_rules
+
+    for rules_path in paths:
+        try:
+            rules.extend(load_rules(rules_path))
+        except (ValueError, OSError) as exc:
+            print(f"ERROR: could not load rules from {rules_path}: {exc}", file=sys.stderr)
+            return None
+    return rules
+
+
+# ----------------------------
+# Server mode
+# ----------------------------
+def _serve(argv: Sequence[str]) -> int:
+    """``run_redflag.py serve``: run a gate server until interrupted."""
+    parser = argparse.ArgumentParser(
+        prog="run_redflag.py serve",
+        description=(
+            "Keep a warm RedFlag pipeline in memory and gate documents sent by "
+            "'run_redflag.py --server' (or any HTTP client; see redflag_server.py)."
+        ),
+    )
+    parser.add_argument(
+        "--listen",
+        default=default_address(),
+        metavar="ADDR",
+        help=f"Unix socket path or TCP host:port to listen on (default {default_address()}).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Documents analyzed at once (default: CPU count, between 2 and 4).",
+    )
+    parser.add_argument(
+        "--pdf-text",
+        choices=_PDF_TEXT_MODES,
+        default="layout",
+        help="PDF text extraction mode (default 'layout'; see run_redflag.py --help).",
+    )
+    parser.add_argument("--cache-db", default=None, help="Optional SQLite analyzer result cache.")
+    parser.add_argument(
+        "--extract-cache",
+        default=None,
+        metavar="PATH",
+        help="Optional SQLite extracted-text cache.",
+    )
+    parser.add_argument(
+        "--rules",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help="Additional declarative rules (.json, .yaml/.yml). May be repeated.",
+    )
+    args = parser.parse_args(argv)
+
+    rules = _load_rule_files(args.rules)
+    if rules is None:
+        return _ERROR_EXIT_CODE
+
+    import signal
+
+    from bounded_executor import BoundedExecutor
+    from redflag_server import GateServer
+
+    executor = BoundedExecutor(args.workers)
+    server = GateServer(
+        _build_analyzer(args.cache_db, rules),
+        _build_loader(args.extract_cache, pdf_text=args.pdf_text),
+        executor=executor,
+    )
+    # Stop cleanly (removing the socket file) when a service manager stops us.
+    signal.signal(signal.SIGTERM, lambda *_: server.stop())
+    try:
+        server.serve_forever(
+            args.listen,
+            ready=lambda address: print(f"Serving on {address}", file=sys.stderr, flush=True),
+        )
+    except OSError as exc:
+        print(f"ERROR: could not listen on {args.listen}: {exc}", file=sys.stderr)
+        return _ERROR_EXIT_CODE
+    except KeyboardInterrupt:
+        pass
+    finally:
+        executor.close(wait=False)
+    return 0
+
+
+def _server_side_flags(args: argparse.Namespace) -> List[str]:
+    """
+    Flags given that only the server's own ``serve`` settings can supply.
+
+    A server analyzes with the rules, caches and PDF workers it was started
+    with, so a run given any of these analyzes in-process instead. The PDF
+    text mode is checked per request (see :func:`_analyze_via_server`).
+    """
+    flags = []
+    if args.rules:
+        flags.append("--rules")
+    if args.cache_db:
+        flags.append("--cache-db")
+    if args.extract_cache:
+        flags.append("--extract-cache")
+    if args.pdf_workers != 1:
+        flags.append("--pdf-workers")
+    return flags
+
+
+def _single_file_flags(args: argparse.Namespace) -> List[str]:
+    """
+    Flags given that only a single-file run can honour.
+
+    Batch mode analyzes in worker processes, each extracting one document at
+    a time, and always writes full reports.
+    """
+    flags = []
+    if args.server:
+        flags.append("--server")
+    if args.gate_only:
+        flags.append("--gate-only")
+    if args.pdf_workers != 1:
+        flags.append("--pdf-workers")
+    return flags
+
+
+def _analyze_via_server(address: str, in_path: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Have the server at *address* analyze *in_path*, as the in-process run would.
+
+    Raises ServerMismatch when the server extracts PDF text in another mode.
+    """
+    from redflag_client import analyze
+
+    data = Path(in_path).read_bytes()
+    return analyze(
+        address,
+        data,
+        in_path,
+        mode="gate" if args.gate_only else "full",
+        use_filter=not args.no_filter,
+        pdf_text=args.pdf_text or "layout",
+    )
 
 
 def main() -> int:
+    if sys.argv[1:2] == ["serve"]:
+        return _serve(sys.argv[2:])
+
     parser = argparse.ArgumentParser(
         description="RedFlag Analyst: gate research drafts for institutional finance risks."
     )
-    parser.add_argument(
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
         "--input",
         "-i",
-        required=True,
         help="Path to a .txt, .pdf, or .docx file containing a research draft / analyst note.",
     )
+    source.add_argument(
+        "--input-dir",
+        default=None,
+        help="Batch mode: analyze every supported file in this directory (see --glob).",
+    )
+    parser.add_argument(
+        "--glob",
+        default=None,
+        help="Batch mode: glob pattern relative to --input-dir (default '*'; use '**/*' to recurse).",
+    )
     parser.add_argument(
         "--output",
         "-o",
         default=None,
-        help="Optional path to write JSON output. If omitted, writes to RESULTS/.",
+        help=(
+            "Optional path to write JSON output. If omitted, writes to RESULTS/. "
+            "In batch mode this is a JSONL file; use '-' for stdout."
+        ),
     )
     parser.add_argument(
         "--pretty",
         action="store_true",
-        help="Pretty-print JSON output.",
+        help="Pretty-print JSON output (single-file mode only).",
     )
     parser.add_argument(
         "--no-filter",
         action="store_true",
         help="Disable boilerplate legal language filtering (filter is ON by default).",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Batch mode: worker processes for loading + analysis (default: CPU count).",
+    )
+    parser.add_argument(
+        "--pdf-workers",
+        type=int,
+        default=1,
+        help=(
+            "Single-file mode: processes extracting PDF pages in parallel "
+            "(default 1). Speeds up long reports on multi-core machines."
+        ),
+    )
+    parser.add_argument(
+        "--pdf-text",
+        choices=_PDF_TEXT_MODES,
+        default=None,
+        help=(
+            "PDF text extraction: 'layout' (pdfplumber, layout-aware) or 'fast' "
+            "(pypdf, falling back to pdfplumber for unreadable pages). "
+            "Default: 'fast' in batch mode, 'layout' for a single file."
+        ),
+    )
+    parser.add_argument(
+        "--gate-only",
+        action="store_true",
+        help=(
+            "Single-file mode: report only the gate decision, reading the document "
+            "page by page and stopping at the first page that forces AUTO_REJECT."
+        ),
+    )
+    parser.add_argument(
+        "--cache-db",
+        default=None,
+        help=(
+            "Optional SQLite file caching analyzer results by content hash, "
+            "so re-gating unchanged drafts (CI reruns, retries) is instant."
+        ),
+    )
+    parser.add_argument(
+        "--extract-cache",
+        default=None,
+        metavar="PATH",
+        help=(
+            "Optional SQLite file caching extracted document text by file content "
+            "hash, so re-scoring an unchanged archive after a threshold or rule "
+            "change skips PDF/DOCX parsing."
+        ),
+    )
+    parser.add_argument(
+        "--rules",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help=(
+            "Additional declarative rules (.json, .yaml/.yml) evaluated after the "
+            "built-in detectors. May be repeated."
+        ),
+    )
+    parser.add_argument(
+        "--server",
+        nargs="?",
+        const=default_address(),
+        default=None,
+        metavar="ADDR",
+        help=(
+            "Single-file mode: gate through a running 'run_redflag.py serve' at ADDR "
+            f"(default {default_address()}; or set REDFLAG_SERVER), analyzing "
+            "in-process when none is running or when it extracts PDF text in "
+            "another --pdf-text mode. The server analyzes with the rules, caches "
+            "and PDF workers it was started with, so a run given --rules, "
+            "--cache-db, --extract-cache or --pdf-workers analyzes in-process."
+        ),
+    )
     args = parser.parse_args()
 
+    rules = _load_rule_files(args.rules)
+    if rules is None:
+        return _ERROR_EXIT_CODE
+
+    if args.input is None:
+        if args.input_dir is None and args.glob is None:
+            parser.error("one of the arguments --input/-i --input-dir --glob is required")
+        batch = "--input-dir" if args.input_dir is not None else "--glob"
+        for flag in _single_file_flags(args):
+            parser.error(f"argument {flag}: not allowed with argument {batch}")
+        if os.environ.get("REDFLAG_SERVER"):
+            print("NOTE: REDFLAG_SERVER is not used in batch mode", file=sys.stderr)
+        return _run_batch(args, rules)
+    if args.glob is not None:
+        parser.error("argument --glob: not allowed with argument --input/-i")
+
     in_path = args.input
     if not os.path.exists(in_path):
         print(f"ERROR: input file not found: {in_path}", file=sys.stderr)
-        return 2
+        return _ERROR_EXIT_CODE
 
-    # --- Load document ---
-    loader = DocumentLoader()
-    try:
-        load_result = loader.load_file(in_path)
-    except UnsupportedFormatError as exc:
-        print(f"ERROR: {exc}", file=sys.stderr)
-        return 2
-    except ValueError as exc:
-        print(f"ERROR: {exc}", file=sys.stderr)
-        return 2
-
-    for warning in load_result.warnings:
-        print(f"WARNING: {warning}", file=sys.stderr)
+    result = None
+    server = args.server or os.environ.get("REDFLAG_SERVER")
+    server_side = _server_side_flags(args) if server else []
+    if server_side:
+        flags = ", ".join(server_side)
+        print(f"NOTE: {flags} not applied by a gate server; analyzing in-process", file=sys.stderr)
+    elif server:
+        try:
+            result = _analyze_via_server(server, in_path, args)
+        except (ServerUnavailable, ServerMismatch) as exc:
+            print(f"NOTE: {exc}; analyzing in-process", file=sys.stderr)
+        except (ServerError, OSError) as exc:
+            print(f"ERROR: {exc}", file=sys.stderr)
+            return _ERROR_EXIT_CODE
 
-    # --- Boilerplate filter ---
-    filter_meta = None
-    if args.no_filter:
-        text = load_result.text
-    else:
-        bp_filter = BoilerplateFilter()
-        filter_result = bp_filter.filter(load_result.text)
-        text = filter_result.filtered_text
-        filter_meta = {
-            "boilerplate_filter": True,
-            "original_chars": filter_result.original_length,
-            "filtered_chars": filter_result.filtered_length,
-            "chars_removed": filter_result.chars_removed,
-            "sections_removed": filter_result.sections_removed,
-        }
-
-    # --- Analyze ---
-    analyzer = RedFlagAnalyzer()
-    result = analyzer.analyze(text)
-
-    # Attach metadata about the input
-    result["input"] = {
-        "path": in_path,
-        "format": load_result.format,
-        "chars": load_result.char_count,
-        "page_count": load_result.page_count,
-        "warnings": load_result.warnings,
-    }
-    if filter_meta:
-        result["preprocessing"] = filter_meta
+    if result is None:
+        from document_loader import UnsupportedFormatError
+        from redflag_pipeline import RedFlagPipeline
+
+        try:
+            pipeline = RedFlagPipeline(
+                _build_analyzer(args.cache_db, rules),
+                use_filter=not args.no_filter,
+                loader=_build_loader(
+                    args.extract_cache, args.pdf_workers, args.pdf_text or "layout"
+                ),
+            )
+            if args.gate_only:
+                result = pipeline.gate_file(in_path)
+            else:
+                result = pipeline.analyze_file(in_path)
+        except UnsupportedFormatError as exc:
+            print(f"ERROR: {exc}", file=sys.stderr)
+            return _ERROR_EXIT_CODE
+        except ValueError as exc:
+            print(f"ERROR: {exc}", file=sys.stderr)
+            return _ERROR_EXIT_CODE
+
+    for warning in result["input"].get("warnings", ()):
+        print(f"WARNING: {warning}", file=sys.stderr)
 
     json_kwargs: dict = {"ensure_ascii": False}
     if args.pretty:
@@ -132,14 +588,7 @@ def main() -> int:
     with open(out_path, "w", encoding="utf-8") as f:
         f.write(payload + "\n")
 
-    # Exit code is useful for CI / gating:
-    # 0 PASS, 10 PM_REVIEW, 20 AUTO_REJECT
-    gate = result.get("overall", {}).get("gate_decision", "PASS")
-    if gate == "PASS":
-        return 0
-    if gate == "PM_REVIEW":
-        return 10
-    return 20
+    return _exit_code(result.get("overall", {}).get("gate_decision", "PASS"))
 
 
 if __name__ == "__main__":
@@ -116,6 +116,24 @@ def risky_pdf_path(tmp_dir):
     return path
 
 
+@pytest.fixture
+def long_risky_pdf_path(tmp_dir):
+    """Generate a 10-page report whose page 3 tips MNPI."""
+    from fpdf import FPDF
+
+    path = os.path.join(tmp_dir, "long_risky.pdf")
+    pdf = FPDF()
+    for i in range(10):
+        pdf.add_page()
+        pdf.set_font("Helvetica", size=12)
+        text = "Revenue grew and margins expanded this quarter."
+        if i == 2:
+            text = "Off the record, the insider confirmed the deal."
+        pdf.cell(200, 10, text=text, new_x="LMARGIN", new_y="NEXT")
+    pdf.output(path)
+    return path
+
+
 @pytest.fixture
 def pdf_with_boilerplate_path(tmp_dir):
     """Generate a PDF with both risky content and boilerplate disclaimers."""
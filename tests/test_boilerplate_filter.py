@@ -7,13 +7,37 @@ Run with: pytest tests/test_boilerplate_filter.py -v
 from __future__ import annotations
 
 import os
+import re
 import sys
 
 import pytest
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from boilerplate_filter import BoilerplateFilter, BoilerplateFilterConfig
+from boilerplate_filter import (
+    _CERTIFICATION_PATTERNS,
+    _CONFIDENTIALITY_PATTERNS,
+    _COPYRIGHT_PATTERNS,
+    _DISCLAIMER_PATTERNS,
+    _DISTRIBUTION_PATTERNS,
+    _PATTERN_ANCHORS,
+    _REGULATORY_PATTERNS,
+    DEFAULT_PROTECTED_KEYWORDS,
+    BoilerplateFilter,
+    BoilerplateFilterConfig,
+    FilterRegion,
+)
+from redflag_engine import RedFlagAnalyzer
+from rule_registry import Rule
+
+_BUILTIN_PATTERNS = (
+    _DISCLAIMER_PATTERNS
+    + _CERTIFICATION_PATTERNS
+    + _DISTRIBUTION_PATTERNS
+    + _REGULATORY_PATTERNS
+    + _CONFIDENTIALITY_PATTERNS
+    + _COPYRIGHT_PATTERNS
+)
 
 
 class TestBasicFiltering:
@@ -236,6 +260,63 @@ class TestProtectedKeywords:
         assert "insider" in result.filtered_text.lower()
 
 
+class TestProtectedVocabulary:
+    """Test that the protected set is derived from the engine's rules."""
+
+    def test_default_set_matches_engine_vocabulary(self):
+        assert set(DEFAULT_PROTECTED_KEYWORDS) == {
+            "friend",
+            "investigator",
+            "off the record",
+            "not public",
+            "leak",
+            "insider",
+            "told me",
+            "said things look good",
+            "preliminary results",
+            "naked call",
+            "naked calls",
+            "maximize leverage",
+            "max leverage",
+            "near max risk",
+            "soft dollar",
+            "soft dollars",
+            "corporate access",
+            "mifid",
+            "inducement",
+            "crowded",
+            "most held short",
+            "short squeeze",
+            "13f",
+        }
+        assert set(DEFAULT_PROTECTED_KEYWORDS) <= set(RedFlagAnalyzer().rules.matcher.keywords)
+
+    def test_default_filter_shares_analyzer_matcher(self):
+        assert BoilerplateFilter()._protected is RedFlagAnalyzer().protected_keywords
+
+    def test_custom_rule_protect_keywords(self):
+        rule = Rule(id="DESK", title="t", when="wall-cross", protect=["wall-cross"])
+        analyzer = RedFlagAnalyzer(rules=[rule])
+        bp_filter = BoilerplateFilter(protected=analyzer.protected_keywords)
+        text = "Buy.\n\nThis report is for institutional investors only. Wall-cross pending."
+        assert "Wall-cross pending" in bp_filter.filter(text).filtered_text
+        assert "Wall-cross" not in BoilerplateFilter().filter(text).filtered_text
+
+    def test_config_indicators_follow_analyzer(self):
+        analyzer = RedFlagAnalyzer(config={"mnpi_indicators": [("whisper", "WHISPER")]})
+        assert "whisper" in analyzer.protected_keywords.keywords
+        assert "friend" not in analyzer.protected_keywords.keywords
+
+    def test_routine_indicators_not_protected(self):
+        text = "Buy.\n\nPast performance is not indicative of future results or guidance."
+        assert "guidance" not in BoilerplateFilter().filter(text).filtered_text
+
+    def test_extra_keywords_extend_rule_vocabulary(self):
+        bp_filter = BoilerplateFilter(BoilerplateFilterConfig(protected_keywords=["Acme"]))
+        assert bp_filter._contains_protected_keyword("ACME and friends")
+        assert bp_filter._contains_protected_keyword("a leak")
+
+
 class TestFilterConfig:
     """Test configuration options."""
 
@@ -290,6 +371,306 @@ class TestFilterConfig:
         assert "special_term" in result.filtered_text
 
 
+class TestParagraphClassifier:
+    """Test the prefiltered paragraph classifier against plain in-order matching."""
+
+    SAMPLES = [
+        "This report is intended for institutional clients only.",
+        "Past performance is not a guarantee of future results.",
+        "The information contained herein is believed to be reliable.",
+        "This material is not intended to provide legal advice.",
+        "No representation or warranty is given as to completeness.",
+        "The author cannot warrant the figures; this firm does not assure them.",
+        "Investing involves substantial risk.",
+        "Investors should seek independent tax advice.",
+        "I, Jane Doe, hereby certify that the views are mine.",
+        "The views expressed herein accurately reflect our opinion.",
+        "Our compensation was not in any way tied to the rating.",
+        "The analysts responsible for this note.",
+        "This document should not be forwarded.",
+        "Not for distribution in the U.S. or Japan.",
+        "Restricted to eligible investors only.",
+        "Do not copy this material.",
+        "Regulated by the FCA.",
+        "Member of SIPC.",
+        "Authorized and regulated by the Financial Conduct Authority.",
+        "Securities offered through Example Capital Markets LLC.",
+        "This message is strictly confidential.",
+        "If you received this by mistake, delete it.",
+        "Proprietary and not for redistribution.",
+        "\u00a9 2024 Example Bank",
+        "All rights reserved.",
+    ]
+
+    def test_every_builtin_pattern_has_anchors(self):
+        assert set(_PATTERN_ANCHORS) == set(_BUILTIN_PATTERNS)
+
+    @pytest.mark.parametrize("sample", SAMPLES)
+    def test_anchors_present_whenever_pattern_matches(self, sample):
+        lower = sample.lower()
+        for pattern in _BUILTIN_PATTERNS:
+            if re.search(pattern, lower, re.IGNORECASE):
+                assert any(word in lower for word in _PATTERN_ANCHORS[pattern]), pattern
+
+    def test_first_pattern_in_order_wins(self):
+        # Matches a copyright pattern first in the text, but disclaimers come
+        # first in pattern order.
+        bp_filter = BoilerplateFilter()
+        lower = "all rights reserved. investing involves risk."
+        assert bp_filter._match_boilerplate(lower) == "disclaimer"
+
+    def test_long_s_bypasses_prefilter(self):
+        # IGNORECASE matches U+017F against "s"; the anchor "reserved" is absent.
+        bp_filter = BoilerplateFilter()
+        lower = "all rights re\u017ferved"
+        assert re.search(r"all\s+rights\s+reserved", lower, re.IGNORECASE)
+        assert bp_filter._match_boilerplate(lower) == "copyright"
+
+    def test_custom_patterns_always_searched(self):
+        config = BoilerplateFilterConfig(custom_patterns=[r"(\w)\1 model"])
+        bp_filter = BoilerplateFilter(config=config)
+        assert bp_filter._match_boilerplate("the zz model") == "custom"
+
+    def test_classifier_shared_per_config(self):
+        a = BoilerplateFilter(BoilerplateFilterConfig(strip_disclaimers=False))
+        b = BoilerplateFilter(BoilerplateFilterConfig(strip_disclaimers=False))
+        assert a._paragraph_patterns is b._paragraph_patterns
+        assert a._paragraph_patterns is not BoilerplateFilter()._paragraph_patterns
+
+
+class TestOnePassLayout:
+    """Test that the one-pass filter reproduces the line/paragraph layout rules."""
+
+    def test_removed_section_joins_surrounding_lines(self):
+        # Pass-1 removal leaves "Intro line" and the disclaimer in one paragraph.
+        text = (
+            "Intro line\nIMPORTANT DISCLOSURES\nlegal text\nInvestment Thesis\n"
+            "Past performance is not indicative of future results."
+        )
+        result = BoilerplateFilter().filter(text)
+        assert result.filtered_text == ""
+        assert result.sections_removed == ["section:IMPORTANT DISCLOSURES", "paragraph:disclaimer"]
+
+    def test_whitespace_only_lines_separate_paragraphs(self):
+        text = "Buy.\r\n \t\r\nAll rights reserved.\r\n\r\nSell.\n"
+        result = BoilerplateFilter().filter(text)
+        assert result.filtered_text == "Buy.\r\n\nSell."
+        assert result.sections_removed == ["paragraph:copyright"]
+
+    def test_empty_line_runs_collapsed_without_paragraph_patterns(self):
+        config = BoilerplateFilterConfig(
+            strip_disclaimers=False,
+            strip_certifications=False,
+            strip_distribution_notices=False,
+            strip_regulatory_notices=False,
+            strip_confidentiality_notices=False,
+            strip_copyright_notices=False,
+        )
+        text = "  Lead.\n\n\n\nMiddle\n\n\n \nEnd.  \n\n"
+        result = BoilerplateFilter(config).filter(text)
+        assert result.filtered_text == "Lead.\n\nMiddle\n\n \nEnd."
+
+    def test_whitespace_only_input_returned_unchanged(self):
+        result = BoilerplateFilter().filter(" \n\t ")
+        assert result.filtered_text == " \n\t "
+        assert result.chars_removed == 0
+
+    def test_section_spans_blank_lines_and_whole_blocks(self):
+        # Blocks inside a section without headers or protected keywords are
+        # dropped whole, together with the blank lines between them.
+        text = (
+            "Buy.\n\nIMPORTANT DISCLOSURES\n\nLegal text one.\nLegal text two.\n\n\n"
+            "More legal text.\n\nValuation\nWe use a DCF."
+        )
+        result = BoilerplateFilter().filter(text)
+        assert result.filtered_text == "Buy.\n\nValuation\nWe use a DCF."
+        (section,) = result.removed_regions
+        assert text[section.start : section.end].endswith("More legal text.\n")
+
+    def test_header_split_over_lines_is_not_a_header(self):
+        # The block search sees "Important\nDisclosures"; the line walk does not.
+        text = "Buy.\n\nImportant\nDisclosures\n\nSell."
+        assert BoilerplateFilter().filter(text).filtered_text == text
+
+
+class TestFilterRegions:
+    """Test the span-based FilterResult: regions, lazy text and offset mapping."""
+
+    TEXT = (
+        "Revenue grew 15%.\n\n"
+        "This report is for institutional investors only.\n\n"
+        "Margins expanded.\n"
+        "Important Disclosures\n"
+        "legal text\n"
+        "Valuation\n"
+        "Buy."
+    )
+
+    def test_removed_regions_are_offsets_into_original(self):
+        result = BoilerplateFilter().filter(self.TEXT)
+        assert result.removed_regions == [
+            FilterRegion(19, 67, "paragraph:disclaimer"),
+            FilterRegion(87, 119, "section:Important Disclosures"),
+        ]
+        assert self.TEXT[19:67] == "This report is for institutional investors only."
+        assert self.TEXT[87:119] == "Important Disclosures\nlegal text"
+        labels = [region.category for region in result.removed_regions]
+        assert sorted(labels) == sorted(result.sections_removed)
+
+    def test_kept_regions_rebuild_filtered_text(self):
+        result = BoilerplateFilter().filter(self.TEXT)
+        assert result.kept_regions == [
+            FilterRegion(0, 17, "kept"),
+            FilterRegion(69, 86, "kept"),
+            FilterRegion(120, 134, "kept"),
+        ]
+        assert result.separators == ["", "\n\n", "\n"]
+        assert result.filtered_text == "Revenue grew 15%.\n\nMargins expanded.\nValuation\nBuy."
+        assert result.filtered_length == len(result.filtered_text)
+
+    def test_filtered_text_built_lazily(self):
+        result = BoilerplateFilter().filter(self.TEXT)
+        assert result._filtered_text is None
+        assert result.chars_removed == len(self.TEXT) - result.filtered_length
+        assert result._filtered_text is None
+        assert result.filtered_text is result.filtered_text
+
+    def test_adjacent_kept_paragraphs_share_one_region(self):
+        text = "First paragraph.\n\nSecond paragraph.\n\nThird paragraph."
+        result = BoilerplateFilter().filter(text)
+        assert result.kept_regions == [FilterRegion(0, len(text), "kept")]
+        assert result.removed_regions == []
+
+    def test_to_original_maps_filtered_offsets(self):
+        result = BoilerplateFilter().filter(self.TEXT)
+        filtered = result.filtered_text
+        for pos in (0, filtered.index("Margins"), filtered.index("Valuation"), len(filtered) - 1):
+            assert self.TEXT[result.to_original(pos)] == filtered[pos]
+        assert result.to_original(len(filtered)) == len(self.TEXT)
+
+    def test_disabled_filter_keeps_whole_text(self):
+        text = "This report is for institutional investors only."
+        result = BoilerplateFilter(BoilerplateFilterConfig(enabled=False)).filter(text)
+        assert result.kept_regions == [FilterRegion(0, len(text), "kept")]
+        assert result.removed_regions == []
+        assert result.filtered_text == text
+
+    def test_empty_text_has_no_regions(self):
+        result = BoilerplateFilter().filter("")
+        assert result.kept_regions == []
+        assert result.filtered_text == ""
+        assert result.to_original(0) == 0
+
+
+class TestSharedScan:
+    """Test the filter hooks RedFlagPipeline feeds from its document scan."""
+
+    TEXT = (
+        "Off the record, the insider confirmed it.\n\n"
+        "This report is for institutional investors only.\n\n"
+        "Margins expanded.\n\n"
+        "All rights reserved."
+    )
+
+    def test_candidates_limit_protected_search(self):
+        bp_filter = BoilerplateFilter()
+        text = "This report is for institutional investors only. A friend said so."
+        assert bp_filter.filter(text).filtered_text == text
+        # Only the listed keywords are looked for.
+        assert bp_filter.filter(text, candidates=[]).filtered_text == ""
+        assert bp_filter.filter(text, candidates=["friend"]).filtered_text == text
+
+    def test_normalized_document_gives_same_result(self):
+        bp_filter = BoilerplateFilter()
+        normalized = RedFlagAnalyzer().scan(self.TEXT).normalized
+        assert bp_filter.filter(self.TEXT, normalized=normalized) == bp_filter.filter(self.TEXT)
+
+    def test_classifier_narrowed_to_document_anchors(self):
+        classifier = BoilerplateFilter()._paragraph_patterns
+        narrowed = classifier.for_document("past performance; all rights reserved")
+        assert narrowed._anchors == ("performance", "reserved")
+        assert narrowed.match("past performance is not indicative of future results") == (
+            "disclaimer"
+        )
+        assert narrowed.match("all rights reserved") == "copyright"
+        assert narrowed.match("this report is for institutional investors only") is None
+
+    def test_classifier_not_narrowed_with_case_folding_letters(self):
+        classifier = BoilerplateFilter()._paragraph_patterns
+        assert classifier.for_document("copyright 2024 \u017fomething") is classifier
+
+
+class TestParagraphMemo:
+    """Test paragraph decisions memoized across calls (see RedFlagSession)."""
+
+    TEXT = TestSharedScan.TEXT
+
+    def test_memo_records_decisions(self):
+        memo = {}
+        result = BoilerplateFilter().filter(self.TEXT, memo=memo)
+        assert result == BoilerplateFilter().filter(self.TEXT)
+        assert memo == {
+            "Off the record, the insider confirmed it.": None,
+            "This report is for institutional investors only.": "disclaimer",
+            "Margins expanded.": None,
+            "All rights reserved.": "copyright",
+        }
+
+    def test_memoized_decision_is_reused(self):
+        # A memoized decision is taken as is, without classifying again.
+        memo = {"Margins expanded.": "custom"}
+        result = BoilerplateFilter().filter(self.TEXT, memo=memo)
+        assert "Margins expanded." not in result.filtered_text
+        assert "paragraph:custom" in result.sections_removed
+
+
+class TestFilterStream:
+    """Test page-by-page filtering (see RedFlagPipeline.gate_file)."""
+
+    PAGES = [
+        "Investment Thesis\nRevenue grew.\n\nThis report is for institutional investors only.",
+        "Important Disclosures\nThe firm may do business with companies covered.",
+        "More disclosure text on a second page.",
+        "Valuation\nWe did 25 calls with former employees.",
+    ]
+
+    @staticmethod
+    def _normalized(text):
+        return " ".join(text.split())
+
+    def test_matches_filtering_joined_pages(self):
+        bp_filter = BoilerplateFilter()
+        streamed = "\n\n".join(bp_filter.filter_stream(self.PAGES))
+        expected = bp_filter.filter("\n\n".join(self.PAGES)).filtered_text
+        assert self._normalized(streamed) == self._normalized(expected)
+        assert "disclosure" not in streamed
+        assert "25 calls" in streamed
+
+    def test_pages_held_while_section_open(self):
+        pulled = []
+
+        def pages():
+            for page in self.PAGES:
+                pulled.append(page)
+                yield page
+
+        stream = BoilerplateFilter().filter_stream(pages())
+        assert next(stream) == "Investment Thesis\nRevenue grew."
+        assert len(pulled) == 1
+        # The disclosure section stays open until "Valuation" closes it.
+        assert next(stream) == "Valuation\nWe did 25 calls with former employees."
+        assert len(pulled) == 4
+
+    def test_section_open_to_the_end(self):
+        pieces = list(BoilerplateFilter().filter_stream(self.PAGES[:3]))
+        assert pieces == ["Investment Thesis\nRevenue grew."]
+
+    def test_blank_pages_skipped(self):
+        assert list(BoilerplateFilter().filter_stream(["", "  \n", "Revenue grew."])) == [
+            "Revenue grew."
+        ]
+
+
 class TestFilterResultMetadata:
     """Test that FilterResult metadata is accurate."""
 
@@ -0,0 +1,135 @@
+"""
+Tests for bounded_executor.py
+
+Run with: pytest tests/test_bounded_executor.py -v
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bounded_executor import BoundedExecutor, default_executor
+
+
+@pytest.fixture
+def executor():
+    executor = BoundedExecutor(max_workers=2, heavy_size=100)
+    yield executor
+    executor.close()
+
+
+class _Tracker:
+    """Blocking calls that record how many run at once until released."""
+
+    def __init__(self) -> None:
+        self.release = threading.Event()
+        self.started: list[str] = []
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def call(self, name: str) -> str:
+        with self._lock:
+            self.started.append(name)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        self.release.wait(5)
+        with self._lock:
+            self.running -= 1
+        return name
+
+
+async def _until(predicate) -> None:
+    for _ in range(500):
+        if predicate():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+class TestRun:
+    def test_returns_result(self, executor):
+        assert asyncio.run(executor.run(sum, [1, 2, 3])) == 6
+
+    def test_propagates_exceptions(self, executor):
+        def fail():
+            raise ValueError("bad document")
+
+        with pytest.raises(ValueError, match="bad document"):
+            asyncio.run(executor.run(fail))
+
+    def test_reused_across_event_loops(self, executor):
+        for _ in range(3):
+            assert asyncio.run(executor.run(len, "abc")) == 3
+
+    def test_closed(self, executor):
+        executor.close()
+        with pytest.raises(RuntimeError, match="closed"):
+            asyncio.run(executor.run(len, "abc"))
+
+    def test_default_executor_shared(self):
+        assert default_executor() is default_executor()
+        assert default_executor().max_workers >= 2
+
+    def test_invalid_workers(self):
+        with pytest.raises(ValueError):
+            BoundedExecutor(max_workers=0)
+
+
+class TestBounds:
+    def test_concurrency_bounded(self, executor):
+        tracker = _Tracker()
+
+        async def main():
+            calls = [asyncio.ensure_future(executor.run(tracker.call, str(i))) for i in range(6)]
+            await _until(lambda: tracker.running == 2)
+            await asyncio.sleep(0.05)
+            assert len(tracker.started) == 2
+            tracker.release.set()
+            return await asyncio.gather(*calls)
+
+        assert asyncio.run(main()) == [str(i) for i in range(6)]
+        assert tracker.peak == 2
+
+    def test_small_call_not_starved_by_large_ones(self, executor):
+        tracker = _Tracker()
+
+        async def main():
+            large = [
+                asyncio.ensure_future(executor.run(tracker.call, f"large{i}", size=100))
+                for i in range(3)
+            ]
+            await _until(lambda: tracker.started == ["large0"])
+            small = await executor.run(len, "note")
+            assert tracker.started == ["large0"]
+            tracker.release.set()
+            await asyncio.gather(*large)
+            return small
+
+        assert asyncio.run(main()) == 4
+        assert tracker.peak == 1
+
+    def test_cancelled_call_keeps_its_slot_until_done(self, executor):
+        tracker = _Tracker()
+
+        async def main():
+            first = asyncio.ensure_future(executor.run(tracker.call, "a"))
+            second = asyncio.ensure_future(executor.run(tracker.call, "b"))
+            await _until(lambda: tracker.running == 2)
+            first.cancel()
+            third = asyncio.ensure_future(executor.run(tracker.call, "c"))
+            await asyncio.sleep(0.05)
+            assert tracker.started == ["a", "b"]
+            tracker.release.set()
+            assert await third == "c"
+            assert await second == "b"
+
+        asyncio.run(main())
+        assert tracker.peak == 2
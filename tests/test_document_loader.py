@@ -6,14 +6,22 @@ Run with: pytest tests/test_document_loader.py -v
 
 from __future__ import annotations
 
+import asyncio
+import io
 import os
+import subprocess
 import sys
+import zipfile
+from pathlib import Path
 
 import pytest
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import document_loader
+from bounded_executor import BoundedExecutor
 from document_loader import DocumentLoader, LoadResult, UnsupportedFormatError
+from result_cache import ExtractionCache
 
 
 class TestTxtLoading:
@@ -94,6 +102,280 @@ class TestPdfLoading:
             loader.load_bytes(b"this is not a pdf", "fake.pdf")
 
 
+class TestInPlaceLoading:
+    """Test that files on disk are parsed in place, not read into memory whole."""
+
+    @pytest.mark.parametrize(
+        "fixture", ["sample_txt_path", "multi_page_pdf_path", "docx_with_table_path"]
+    )
+    def test_same_result_as_bytes(self, request, monkeypatch, fixture):
+        path = request.getfixturevalue(fixture)
+        with open(path, "rb") as f:
+            data = f.read()
+        expected = DocumentLoader().load_bytes(data, os.path.basename(path))
+
+        def no_read(self):
+            raise AssertionError("file read into memory")
+
+        monkeypatch.setattr(Path, "read_bytes", no_read)
+        result = DocumentLoader().load_file(path)
+        assert result.text == expected.text
+        assert result.page_count == expected.page_count
+
+    def test_pdf_pages_released_after_extraction(self, monkeypatch, multi_page_pdf_path):
+        from pdfplumber.page import Page
+
+        calls = []
+        extract_text, close = Page.extract_text, Page.close
+        monkeypatch.setattr(
+            Page, "extract_text", lambda page: calls.append("extract") or extract_text(page)
+        )
+        monkeypatch.setattr(Page, "close", lambda page: calls.append("close") or close(page))
+        DocumentLoader().load_file(multi_page_pdf_path)
+        # Each page's layout is dropped before the next page is parsed.
+        assert calls[:6] == ["extract", "close"] * 3
+
+
+class TestExtractionCaching:
+    """Test DocumentLoader with an ExtractionCache."""
+
+    @pytest.fixture
+    def cache(self, tmp_dir):
+        cache = ExtractionCache(os.path.join(tmp_dir, "extract.db"))
+        yield cache
+        cache.close()
+
+    @staticmethod
+    def _no_parsing(monkeypatch):
+        def fail(self, loader, source):
+            raise AssertionError("document parsed despite a cache hit")
+
+        monkeypatch.setattr(document_loader._Backend, "load", fail)
+
+    def test_second_load_served_from_cache(self, monkeypatch, cache, multi_page_pdf_path):
+        first = DocumentLoader(cache=cache).load_file(multi_page_pdf_path)
+        self._no_parsing(monkeypatch)
+        second = DocumentLoader(cache=cache).load_file(multi_page_pdf_path)
+        assert second == first
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_keyed_by_content_not_path(self, monkeypatch, cache, sample_txt_path):
+        with open(sample_txt_path, "rb") as f:
+            data = f.read()
+        first = DocumentLoader(cache=cache).load_bytes(data, "upload.txt")
+        self._no_parsing(monkeypatch)
+        second = DocumentLoader(cache=cache).load_file(sample_txt_path)
+        assert second.text == first.text
+        assert second.source_path == sample_txt_path
+
+    def test_changed_content_misses(self, cache, tmp_dir):
+        path = os.path.join(tmp_dir, "note.txt")
+        loader = DocumentLoader(cache=cache)
+        for text in ("Draft one.", "Draft two."):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            assert loader.load_file(path).text == text
+        assert cache.hits == 0
+
+    def test_warnings_cached(self, monkeypatch, cache):
+        from fpdf import FPDF
+
+        pdf = FPDF()
+        pdf.add_page()
+        data = bytes(pdf.output())
+        first = DocumentLoader(cache=cache).load_bytes(data, "blank.pdf")
+        assert first.warnings
+        self._no_parsing(monkeypatch)
+        assert DocumentLoader(cache=cache).load_bytes(data, "blank.pdf") == first
+
+    def test_load_errors_not_cached(self, cache):
+        with pytest.raises(ValueError):
+            DocumentLoader(cache=cache).load_bytes(b"this is not a pdf", "fake.pdf")
+        assert len(cache) == 0
+
+
+class TestParallelPdfLoading:
+    """Test page extraction across a process pool."""
+
+    def test_same_result_as_sequential(self, monkeypatch, multi_page_pdf_path):
+        monkeypatch.setattr(document_loader, "PDF_PAGES_PER_WORKER", 1)
+        sequential = DocumentLoader().load_file(multi_page_pdf_path)
+        parallel = DocumentLoader(pdf_workers=2).load_file(multi_page_pdf_path)
+        assert parallel == sequential
+        assert parallel.text.index("Page 1") < parallel.text.index("Page 3")
+
+    def test_short_pdf_extracted_in_process(self, monkeypatch, multi_page_pdf_path):
+        def no_pool(*args):
+            raise AssertionError("pool started for a short PDF")
+
+        monkeypatch.setattr(document_loader, "_extract_pages_parallel", no_pool)
+        result = DocumentLoader(pdf_workers=8).load_file(multi_page_pdf_path)
+        assert result.page_count == 3
+
+
+class TestFastPdfText:
+    """Test pypdf extraction with per-page pdfplumber fallback."""
+
+    @pytest.fixture(autouse=True)
+    def pypdf(self):
+        return pytest.importorskip("pypdf")
+
+    @pytest.fixture
+    def no_fallback(self, monkeypatch):
+        def fail(source):
+            raise AssertionError("pdfplumber opened for a readable PDF")
+
+        monkeypatch.setattr(document_loader, "_open_pdf", fail)
+
+    def test_same_text_as_layout(self, multi_page_pdf_path, risky_pdf_path):
+        for path in (multi_page_pdf_path, risky_pdf_path):
+            layout = DocumentLoader().load_file(path)
+            fast = DocumentLoader(pdf_text="fast").load_file(path)
+            assert fast == layout
+
+    def test_readable_pdf_never_opens_pdfplumber(self, no_fallback, multi_page_pdf_path):
+        loader = DocumentLoader(pdf_text="fast")
+        assert loader.load_file(multi_page_pdf_path).page_count == 3
+        assert len(list(loader.iter_pages(multi_page_pdf_path))) == 3
+
+    def test_garbled_page_falls_back(self, monkeypatch, pypdf, multi_page_pdf_path):
+        extract = pypdf.PageObject.extract_text
+
+        def garble_page_2(page, *args, **kwargs):
+            text = extract(page, *args, **kwargs)
+            return "\ufffd" * len(text) if text.startswith("Page 2") else text
+
+        monkeypatch.setattr(pypdf.PageObject, "extract_text", garble_page_2)
+        opened = []
+        open_pdf = document_loader._open_pdf
+        monkeypatch.setattr(
+            document_loader, "_open_pdf", lambda source: opened.append(source) or open_pdf(source)
+        )
+        fast = DocumentLoader(pdf_text="fast").load_file(multi_page_pdf_path)
+        assert len(opened) == 1
+        assert fast.text == DocumentLoader().load_file(multi_page_pdf_path).text
+        assert "\ufffd" not in "".join(
+            DocumentLoader(pdf_text="fast").iter_pages(multi_page_pdf_path)
+        )
+
+    @pytest.mark.parametrize(
+        "text, garbled",
+        [
+            ("", True),
+            ("  \n ", True),
+            ("\ue000\ue001 revenue", True),
+            ("Revenue" * 40, True),
+            ("Off the record, the insider said revenue grew.", False),
+            ("Revenue grew.\n" + "\ufffd" + " margins expanded" * 10, False),
+        ],
+    )
+    def test_garbled(self, text, garbled):
+        assert document_loader._garbled(text) is garbled
+
+    def test_without_pypdf_uses_pdfplumber(self, monkeypatch, multi_page_pdf_path):
+        monkeypatch.setitem(sys.modules, "pypdf", None)
+        fast = DocumentLoader(pdf_text="fast").load_file(multi_page_pdf_path)
+        assert fast == DocumentLoader().load_file(multi_page_pdf_path)
+
+    def test_modes_cached_separately(self, tmp_dir, multi_page_pdf_path):
+        cache = ExtractionCache(os.path.join(tmp_dir, "extract.db"))
+        DocumentLoader(cache=cache).load_file(multi_page_pdf_path)
+        DocumentLoader(cache=cache, pdf_text="fast").load_file(multi_page_pdf_path)
+        assert (cache.hits, len(cache)) == (0, 2)
+        cache.close()
+
+    def test_invalid_pdf(self):
+        with pytest.raises(ValueError, match="Failed to open PDF"):
+            DocumentLoader(pdf_text="fast").load_bytes(b"%PDF-1.4 truncated", "broken.pdf")
+
+    def test_unknown_mode(self):
+        with pytest.raises(ValueError, match="pdf_text"):
+            DocumentLoader(pdf_text="ocr")
+
+
+class TestPageIteration:
+    """Test lazy page-by-page extraction."""
+
+    def test_pages_join_to_loaded_text(self, multi_page_pdf_path):
+        loader = DocumentLoader()
+        pages = list(loader.iter_pages(multi_page_pdf_path))
+        assert len(pages) == 3
+        assert pages[0].startswith("Page 1")
+        assert "\n\n".join(pages).strip() == loader.load_file(multi_page_pdf_path).text
+
+    def _track_close(self, monkeypatch):
+        """Patch PDF opening so each opened PDF's close is recorded; return the record."""
+        closed = []
+        open_pdf = document_loader._open_pdf
+
+        def tracking(source):
+            pdf = open_pdf(source)
+            pdf_close = pdf.close
+            monkeypatch.setattr(pdf, "close", lambda: closed.append(True) or pdf_close())
+            return pdf
+
+        monkeypatch.setattr(document_loader, "_open_pdf", tracking)
+        return closed
+
+    def test_pages_extracted_on_demand(self, monkeypatch, multi_page_pdf_path):
+        closed = self._track_close(monkeypatch)
+        pages = DocumentLoader().iter_pages(multi_page_pdf_path)
+        assert next(pages).startswith("Page 1")
+        assert not closed
+        pages.close()
+        assert closed == [True]
+        assert list(pages) == []
+
+    def test_closed_when_exhausted(self, monkeypatch, multi_page_pdf_path):
+        closed = self._track_close(monkeypatch)
+        assert len(list(DocumentLoader().iter_pages(multi_page_pdf_path))) == 3
+        assert closed == [True]
+
+    def test_unstarted_iterator_closes_pdf(self, monkeypatch, multi_page_pdf_path):
+        closed = self._track_close(monkeypatch)
+        DocumentLoader().iter_pages(multi_page_pdf_path).close()
+        assert closed == [True]
+
+    def test_text_file_is_one_page(self, sample_txt_path):
+        loader = DocumentLoader()
+        assert list(loader.iter_pages(sample_txt_path)) == [loader.load_file(sample_txt_path).text]
+
+    def test_errors_raised_before_first_page(self, tmp_dir):
+        path = os.path.join(tmp_dir, "broken.pdf")
+        with open(path, "wb") as f:
+            f.write(b"this is not a pdf")
+        with pytest.raises(ValueError, match="Failed to open PDF"):
+            DocumentLoader().iter_pages(path)
+        with pytest.raises(FileNotFoundError):
+            DocumentLoader().iter_pages("/nonexistent/file.pdf")
+
+
+class TestAsyncLoading:
+    """Test the coroutine API."""
+
+    def test_aload_bytes_matches_load_bytes(self, sample_docx_path, multi_page_pdf_path):
+        uploads = []
+        for path in (sample_docx_path, multi_page_pdf_path):
+            with open(path, "rb") as f:
+                uploads.append((f.read(), os.path.basename(path)))
+        loader = DocumentLoader()
+
+        async def main():
+            executor = BoundedExecutor(max_workers=2, heavy_size=1)
+            try:
+                return await asyncio.gather(
+                    *(loader.aload_bytes(data, name, executor) for data, name in uploads)
+                )
+            finally:
+                executor.close()
+
+        assert asyncio.run(main()) == [loader.load_bytes(*upload) for upload in uploads]
+
+    def test_errors_raised_in_caller(self):
+        with pytest.raises(UnsupportedFormatError):
+            asyncio.run(DocumentLoader().aload_bytes(b"data", "sheet.xls"))
+
+
 class TestDocxLoading:
     """Test DOCX file loading."""
 
@@ -130,6 +412,224 @@ class TestDocxLoading:
             loader.load_bytes(b"not a docx file", "fake.docx")
 
 
+class TestStreamingDocx:
+    """Test the streaming DOCX extractor and its python-docx compatible layout."""
+
+    @staticmethod
+    def _save(doc):
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _python_docx_text(data):
+        """The python-docx based extractor the streaming one replaced."""
+        from docx import Document
+
+        doc = Document(io.BytesIO(data))
+        parts = [para.text for para in doc.paragraphs if para.text.strip()]
+        for table in doc.tables:
+            for row in table.rows:
+                row_text = "\t".join(cell.text.strip() for cell in row.cells if cell.text.strip())
+                if row_text:
+                    parts.append(row_text)
+        return "\n".join(parts).strip()
+
+    @pytest.fixture
+    def report(self):
+        from docx import Document
+        from docx.enum.text import WD_BREAK
+
+        doc = Document()
+        doc.add_paragraph("Intro")
+        table = doc.add_table(rows=3, cols=3)
+        for i, row in enumerate(table.rows):
+            for j, cell in enumerate(row.cells):
+                cell.text = f"r{i}c{j}"
+        table.cell(0, 0).merge(table.cell(0, 1))  # spans two columns
+        table.cell(1, 2).merge(table.cell(2, 2))  # spans two rows
+        para = doc.add_paragraph("Outro")
+        para.add_run().add_tab()
+        para.add_run("tabbed").add_break()
+        para.add_run("next line").add_break(WD_BREAK.PAGE)
+        return self._save(doc)
+
+    def test_document_order(self, report):
+        text = DocumentLoader().load_bytes(report, "report.docx").text
+        assert text == (
+            "Intro\nr0c0\nr0c1\tr0c2\nr1c0\tr1c1\tr1c2\nr2c2\nr2c0\tr2c1\nOutro\ttabbed\nnext line"
+        )
+
+    def test_compat_reproduces_python_docx(self, report):
+        text = DocumentLoader(docx_compat=True).load_bytes(report, "report.docx").text
+        assert text == self._python_docx_text(report)
+        assert text.startswith("Intro\nOutro\ttabbed\nnext line\nr0c0\nr0c1\tr0c0\nr0c1\t")
+
+    def test_compat_on_fixtures(self, sample_docx_path, docx_with_table_path, risky_docx_path):
+        for path in (sample_docx_path, docx_with_table_path, risky_docx_path):
+            with open(path, "rb") as f:
+                data = f.read()
+            result = DocumentLoader(docx_compat=True).load_file(path)
+            assert result.text == self._python_docx_text(data)
+
+    def test_hyperlinks_and_nested_tables(self):
+        from docx import Document
+        from docx.oxml import parse_xml
+
+        doc = Document()
+        para = doc.add_paragraph("See ")
+        para._p.append(
+            parse_xml(
+                '<w:hyperlink xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                "<w:r><w:t>the filing</w:t></w:r></w:hyperlink>"
+            )
+        )
+        outer = doc.add_table(rows=1, cols=1)
+        outer.cell(0, 0).text = "outer"
+        outer.cell(0, 0).add_table(rows=1, cols=1).cell(0, 0).text = "nested"
+        data = self._save(doc)
+        text = DocumentLoader().load_bytes(data, "links.docx").text
+        # As python-docx reads it: nested tables are not part of the cell text.
+        assert text == "See the filing\nouter" == self._python_docx_text(data)
+
+    def test_layouts_cached_separately(self, tmp_dir, report):
+        cache = ExtractionCache(os.path.join(tmp_dir, "extract.db"))
+        document = DocumentLoader(cache=cache).load_bytes(report, "report.docx")
+        compat = DocumentLoader(cache=cache, docx_compat=True).load_bytes(report, "report.docx")
+        assert compat.text != document.text
+        assert len(cache) == 2
+        cache.close()
+
+    def test_zip_without_document_part(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr("readme.txt", "not a word document")
+        with pytest.raises(ValueError, match="Failed to open DOCX"):
+            DocumentLoader().load_bytes(buffer.getvalue(), "fake.docx")
+
+
+class TestFormatDetection:
+    """Routing by content: magic bytes first, the extension as fallback."""
+
+    @pytest.fixture(autouse=True)
+    def registry(self, monkeypatch):
+        # Tests that register loaders must not leak them into other tests.
+        monkeypatch.setattr(document_loader, "_BACKENDS", dict(document_loader._BACKENDS))
+        monkeypatch.setattr(
+            DocumentLoader, "SUPPORTED_EXTENSIONS", set(DocumentLoader.SUPPORTED_EXTENSIONS)
+        )
+
+    def test_misnamed_pdf_loaded_as_pdf(self, tmp_dir, multi_page_pdf_path):
+        path = os.path.join(tmp_dir, "report.txt")
+        with open(multi_page_pdf_path, "rb") as src, open(path, "wb") as dst:
+            dst.write(src.read())
+        result = DocumentLoader().load_file(path)
+        expected = DocumentLoader().load_file(multi_page_pdf_path)
+        assert (result.format, result.text) == ("pdf", expected.text)
+        assert result.warnings == [
+            "Loaded as pdf: the content does not match the file extension '.txt'."
+        ]
+        assert DocumentLoader().detect_format(path) == "pdf"
+        assert list(DocumentLoader().iter_pages(path)) == list(
+            DocumentLoader().iter_pages(multi_page_pdf_path)
+        )
+
+    @pytest.mark.parametrize("filename", ["notes.pdf", "notes.doc", "upload"])
+    def test_misnamed_docx_upload(self, sample_docx_path, filename):
+        with open(sample_docx_path, "rb") as f:
+            data = f.read()
+        result = DocumentLoader().load_bytes(data, filename)
+        assert result.format == "docx"
+        assert result.text == DocumentLoader().load_file(sample_docx_path).text
+
+    @pytest.mark.parametrize("encoding", ["utf-16-le", "utf-16-be"])
+    @pytest.mark.parametrize("filename", ["note.txt", "note.md"])
+    def test_utf16_text_with_bom(self, tmp_dir, encoding, filename):
+        text = "Off the record, the insider said \u00e9t\u00e9 numbers."
+        data = "\ufeff".encode(encoding) + text.encode(encoding)
+        path = os.path.join(tmp_dir, filename)
+        with open(path, "wb") as f:
+            f.write(data)
+        assert DocumentLoader().load_file(path).text == text
+        assert DocumentLoader().load_bytes(data, filename).text == text
+
+    def test_utf8_bom_text_unchanged(self):
+        data = "\ufeffRevenue grew.".encode("utf-8")
+        result = DocumentLoader().load_bytes(data, "note.txt")
+        assert (result.text, result.warnings) == ("\ufeffRevenue grew.", [])
+
+    def test_other_ooxml_package_unsupported(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr(
+                "[Content_Types].xml",
+                '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                '<Override PartName="/xl/workbook.xml" ContentType="application/'
+                'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/></Types>',
+            )
+            archive.writestr(
+                "_rels/.rels",
+                '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                f'<Relationship Id="rId1" Type="{document_loader._OFFICE_DOCUMENT}" '
+                'Target="xl/workbook.xml"/></Relationships>',
+            )
+        with pytest.raises(UnsupportedFormatError, match="'.xlsx'"):
+            DocumentLoader().load_bytes(buffer.getvalue(), "book.xlsx")
+
+    def test_lazy_backend_imported_on_first_use(self, tmp_dir, monkeypatch):
+        with open(os.path.join(tmp_dir, "rtf_backend.py"), "w") as f:
+            f.write(
+                "from document_loader import LoadResult\n"
+                "def load(loader, source):\n"
+                "    return LoadResult(text='rtf text', source_path=None, format='rtf', page_count=None)\n"
+            )
+        monkeypatch.syspath_prepend(tmp_dir)
+        document_loader.register_loader(
+            "rtf", "rtf_backend:load", extensions=[".rtf"], magic=[b"{\\rtf"]
+        )
+        assert "rtf_backend" not in sys.modules
+        assert ".rtf" in DocumentLoader.SUPPORTED_EXTENSIONS
+        result = DocumentLoader().load_bytes(b"{\\rtf1 hello}", "upload.bin")
+        assert (result.format, result.text) == ("rtf", "rtf text")
+        assert "rtf_backend" in sys.modules
+        monkeypatch.delitem(sys.modules, "rtf_backend")
+
+    def test_replaced_backend_keeps_signature(self, tmp_dir, multi_page_pdf_path):
+        def fast_pdf(loader, source):
+            return LoadResult(text="fast", source_path=None, format="pdf", page_count=3)
+
+        document_loader.register_loader("pdf", fast_pdf)
+        path = os.path.join(tmp_dir, "report.bin")
+        with open(multi_page_pdf_path, "rb") as src, open(path, "wb") as dst:
+            dst.write(src.read())
+        assert DocumentLoader().load_file(path).text == "fast"
+        assert list(DocumentLoader().iter_pages(multi_page_pdf_path)) == ["fast"]
+
+    def test_replaced_backend_cached_separately(self, tmp_dir, multi_page_pdf_path):
+        cache = ExtractionCache(os.path.join(tmp_dir, "extract.db"))
+        DocumentLoader(cache=cache).load_file(multi_page_pdf_path)
+        document_loader.register_loader(
+            "pdf", lambda loader, source: LoadResult("fast", None, "pdf", 3)
+        )
+        assert DocumentLoader(cache=cache).load_file(multi_page_pdf_path).text == "fast"
+        assert len(cache) == 2
+        cache.close()
+
+    def test_import_does_not_load_backends(self):
+        code = (
+            "import sys, document_loader; "
+            "print(sorted({'pdfplumber', 'zipfile', 'sqlite3', 'multiprocessing'} & set(sys.modules)))"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=Path(document_loader.__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        assert out.strip() == "[]"
+
+
 class TestErrorHandling:
     """Test error handling and format validation."""
 
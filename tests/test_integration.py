@@ -6,13 +6,17 @@ Run with: pytest tests/test_integration.py -v
 
 from __future__ import annotations
 
+import json
 import os
+import shutil
+import subprocess
 import sys
 
 import pytest
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import run_redflag
 from boilerplate_filter import BoilerplateFilter
 from document_loader import DocumentLoader
 from redflag_engine import RedFlagAnalyzer
@@ -139,3 +143,216 @@ class TestExistingExamples:
             pytest.skip("Example file not found")
         result = self._run(pipeline, path)
         assert result["overall"]["gate_decision"] == "AUTO_REJECT"
+
+
+class TestBatchCli:
+    """Directory / glob batch mode of run_redflag.py."""
+
+    def _main(self, monkeypatch, *argv):
+        monkeypatch.setattr(sys, "argv", ["run_redflag.py", *argv])
+        return run_redflag.main()
+
+    def test_jsonl_output_and_worst_gate(
+        self, monkeypatch, tmp_dir, sample_txt_path, risky_txt_path, sample_pdf_path
+    ):
+        out_path = os.path.join(tmp_dir, "out.jsonl")
+        code = self._main(
+            monkeypatch, "--input-dir", tmp_dir, "--output", out_path, "--workers", "1"
+        )
+        assert code == 20
+
+        with open(out_path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        paths = [r["input"]["path"] for r in records]
+        assert paths == sorted([sample_txt_path, risky_txt_path, sample_pdf_path])
+        assert all(r["schema"] == "redflag_ex1_analyst.output.v1" for r in records)
+
+    def test_glob_and_process_pool(self, monkeypatch, tmp_dir, sample_txt_path, risky_txt_path):
+        out_path = os.path.join(tmp_dir, "out.jsonl")
+        code = self._main(
+            monkeypatch,
+            "--input-dir",
+            tmp_dir,
+            "--glob",
+            "sample*.txt",
+            "--output",
+            out_path,
+            "--workers",
+            "2",
+        )
+        assert code == 0
+        with open(out_path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        assert [r["input"]["path"] for r in records] == [sample_txt_path]
+        assert records[0]["preprocessing"]["boilerplate_filter"] is True
+
+    def test_documents_found_by_content(
+        self, monkeypatch, tmp_dir, risky_pdf_path, sample_docx_path
+    ):
+        misnamed = [os.path.join(tmp_dir, "risky"), os.path.join(tmp_dir, "sample.bin")]
+        shutil.copy(risky_pdf_path, misnamed[0])
+        shutil.copy(sample_docx_path, misnamed[1])
+        with open(os.path.join(tmp_dir, "notes.bin"), "wb") as f:
+            f.write(b"\x00\x01 not a document")
+        paths = run_redflag._collect_batch_paths(tmp_dir, "*")
+        assert paths == sorted([risky_pdf_path, sample_docx_path, *misnamed])
+
+        out_path = os.path.join(tmp_dir, "out.jsonl")
+        args = ["--input-dir", tmp_dir, "--glob", "[rs]*", "--output", out_path, "--workers", "1"]
+        assert self._main(monkeypatch, *args) == 20
+        with open(out_path, encoding="utf-8") as f:
+            records = {r["input"]["path"]: r for r in map(json.loads, f)}
+        assert records[misnamed[0]]["input"]["format"] == "pdf"
+        assert records[misnamed[1]]["input"]["format"] == "docx"
+
+    @pytest.mark.parametrize(
+        "argv, flag",
+        [
+            (("--server",), "--server"),
+            (("--server", "/tmp/redflag.sock"), "--server"),
+            (("--gate-only",), "--gate-only"),
+            (("--pdf-workers", "4"), "--pdf-workers"),
+        ],
+    )
+    def test_single_file_flags_rejected(self, monkeypatch, capsys, tmp_dir, argv, flag):
+        with pytest.raises(SystemExit) as exc:
+            self._main(monkeypatch, "--input-dir", tmp_dir, *argv)
+        assert exc.value.code == 2
+        assert f"argument {flag}: not allowed with argument --input-dir" in capsys.readouterr().err
+
+    def test_server_env_ignored(self, monkeypatch, capsys, tmp_dir, sample_txt_path):
+        monkeypatch.setenv("REDFLAG_SERVER", os.path.join(tmp_dir, "none.sock"))
+        out_path = os.path.join(tmp_dir, "out.jsonl")
+        code = self._main(
+            monkeypatch, "--input-dir", tmp_dir, "--output", out_path, "--workers", "1"
+        )
+        assert code == 0
+        assert "REDFLAG_SERVER is not used in batch mode" in capsys.readouterr().err
+        with open(out_path, encoding="utf-8") as f:
+            assert len(f.readlines()) == 1
+
+    def test_stdout_output(self, monkeypatch, capsys, tmp_dir, risky_txt_path):
+        code = self._main(monkeypatch, "--input-dir", tmp_dir, "--output", "-", "--workers", "1")
+        assert code == 20
+        lines = capsys.readouterr().out.splitlines()
+        assert json.loads(lines[0])["overall"]["gate_decision"] == "AUTO_REJECT"
+
+    @pytest.mark.parametrize("workers", ["1", "2"])
+    def test_stdout_reader_closing_early(self, tmp_dir, workers):
+        for i in range(300):
+            with open(os.path.join(tmp_dir, f"note{i:03}.txt"), "w", encoding="utf-8") as f:
+                f.write("Off the record, the insider confirmed the deal.\n")
+        script = os.path.join(os.path.dirname(run_redflag.__file__), "run_redflag.py")
+        argv = [sys.executable, script, "--input-dir", tmp_dir, "--output", "-"]
+        proc = subprocess.Popen(
+            [*argv, "--workers", workers], stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        assert json.loads(proc.stdout.readline())["overall"]["gate_decision"] == "AUTO_REJECT"
+        proc.stdout.close()  # like `| head -n 1`: 300 results do not fit in the pipe
+        err = proc.stderr.read().decode()
+        assert proc.wait(60) == 20
+        assert "Traceback" not in err
+        processed = int(err.split("Processed ")[1].split()[0])
+        assert 1 <= processed < 300
+
+    def test_load_errors_reported_per_file(self, monkeypatch, tmp_dir, sample_txt_path):
+        with open(os.path.join(tmp_dir, "broken.pdf"), "wb") as f:
+            f.write(b"not a pdf")
+        out_path = os.path.join(tmp_dir, "out.jsonl")
+        code = self._main(
+            monkeypatch, "--input-dir", tmp_dir, "--output", out_path, "--workers", "1"
+        )
+        # Everything else passed, so the load failure sets the exit code.
+        assert code == 2
+        with open(out_path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        assert "Failed to open PDF" in records[0]["error"]
+
+    def test_extract_cache_reused_across_runs(self, monkeypatch, tmp_dir, sample_pdf_path):
+        cache_path = os.path.join(tmp_dir, "extract.db")
+        args = ["--input-dir", tmp_dir, "--output", "-", "--workers", "1"]
+        assert self._main(monkeypatch, *args, "--extract-cache", cache_path) == 0
+
+        monkeypatch.setattr(
+            DocumentLoader,
+            "_load_pdf",
+            lambda self, source: pytest.fail("PDF parsed again"),
+        )
+        assert self._main(monkeypatch, *args, "--extract-cache", cache_path) == 0
+
+    @pytest.mark.parametrize("argv, mode", [((), "fast"), (("--pdf-text", "layout"), "layout")])
+    def test_pdf_text_mode(self, monkeypatch, tmp_dir, risky_pdf_path, argv, mode):
+        args = ["--input-dir", tmp_dir, "--output", "-", "--workers", "1", *argv]
+        assert self._main(monkeypatch, *args) == 20
+        assert run_redflag._BATCH_PIPELINE.loader._pdf_text == mode
+
+    def test_examples_directory(self, monkeypatch, tmp_dir):
+        examples = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples"
+        )
+        if not os.path.isdir(examples):
+            pytest.skip("Examples directory not found")
+        shutil.copytree(examples, os.path.join(tmp_dir, "examples"))
+        out_path = os.path.join(tmp_dir, "out.jsonl")
+        code = self._main(
+            monkeypatch, "--input-dir", tmp_dir, "--glob", "**/*.txt", "--output", out_path
+        )
+        assert code == 20
+
+
+class TestLongDocumentCli:
+    """Documents above the analyzer limit are streamed, not rejected."""
+
+    def test_oversized_txt_is_analyzed(self, monkeypatch, tmp_dir):
+        path = os.path.join(tmp_dir, "long.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("Revenue grew strongly this quarter. " * 20_000)
+            f.write("Off the record, the insider confirmed the deal.\n")
+        out_path = os.path.join(tmp_dir, "out.json")
+        monkeypatch.setattr(
+            sys, "argv", ["run_redflag.py", "--input", path, "--output", out_path, "--no-filter"]
+        )
+        assert run_redflag.main() == 20
+        with open(out_path, encoding="utf-8") as f:
+            result = json.load(f)
+        assert result["input"]["chars"] > 500_000
+
+
+class TestRulesCli:
+    """--rules loads desk-specific rule files."""
+
+    RULE = {
+        "id": "DESK_WATCHLIST",
+        "title": "Watch-list name mentioned",
+        "when": "acme biotech",
+        "severity": "MEDIUM",
+        "evidence": ["acme biotech"],
+    }
+
+    def test_rules_file_adds_flag(self, monkeypatch, tmp_dir):
+        rules_path = os.path.join(tmp_dir, "desk.json")
+        with open(rules_path, "w", encoding="utf-8") as f:
+            json.dump([self.RULE], f)
+        note = os.path.join(tmp_dir, "note.txt")
+        with open(note, "w", encoding="utf-8") as f:
+            f.write("We like ACME Biotech into the readout.\n")
+        out_path = os.path.join(tmp_dir, "out.json")
+        monkeypatch.setattr(
+            sys,
+            "argv",
+            ["run_redflag.py", "--input", note, "--output", out_path, "--rules", rules_path],
+        )
+        assert run_redflag.main() == 10
+        with open(out_path, encoding="utf-8") as f:
+            result = json.load(f)
+        assert [flag["id"] for flag in result["flags"]] == ["DESK_WATCHLIST"]
+
+    def test_invalid_rules_file(self, monkeypatch, capsys, tmp_dir, sample_txt_path):
+        rules_path = os.path.join(tmp_dir, "desk.json")
+        with open(rules_path, "w", encoding="utf-8") as f:
+            json.dump([{"id": "BROKEN", "title": "no condition"}], f)
+        monkeypatch.setattr(
+            sys, "argv", ["run_redflag.py", "--input", sample_txt_path, "--rules", rules_path]
+        )
+        assert run_redflag.main() == 2
+        assert "could not load rules" in capsys.readouterr().err
@@ -0,0 +1,81 @@
+"""
+Tests for keyword_matcher.py
+
+Run with: pytest tests/test_keyword_matcher.py -v
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keyword_matcher import KeywordMatcher
+from redflag_engine import RedFlagAnalyzer
+
+
+class TestKeywordMatcher:
+    """Test hit-table construction."""
+
+    def test_first_offsets(self):
+        matcher = KeywordMatcher(["leak", "insider"])
+        hits = matcher.scan("an insider leak, another leak")
+        assert hits == {"insider": 3, "leak": 11}
+
+    def test_missing_keywords_absent(self):
+        matcher = KeywordMatcher(["leak", "insider"])
+        assert matcher.scan("clean text") == {}
+
+    def test_duplicates_and_empty_ignored(self):
+        matcher = KeywordMatcher(["leak", "leak", ""])
+        assert matcher.keywords == ("leak",)
+
+    def test_overlapping_keywords_all_reported(self):
+        matcher = KeywordMatcher(["naked call", "naked calls", "calls"])
+        hits = matcher.scan("buy naked calls")
+        assert hits == {"naked call": 4, "naked calls": 4, "calls": 10}
+
+    def test_contained_keyword_first_offset_is_earliest(self):
+        matcher = KeywordMatcher(["beta", "beta 0"])
+        hits = matcher.scan("beta is high; target beta 0")
+        assert hits == {"beta": 0, "beta 0": 21}
+
+    def test_container_skipped_when_contained_keyword_missing(self):
+        matcher = KeywordMatcher(["most held short", "#1 most held short"])
+        assert matcher.scan("#1 most shorted") == {}
+
+    def test_substring_semantics(self):
+        # Matching is raw substring containment, as the detectors always used.
+        matcher = KeywordMatcher(["eu"])
+        assert matcher.scan("market neutral") == {"eu": 8}
+
+
+class TestSearchAny:
+    """Test the early-exit containment check."""
+
+    def test_any_keyword_found(self):
+        matcher = KeywordMatcher(["leak", "insider"])
+        assert matcher.search_any("an insider said")
+        assert not matcher.search_any("clean text")
+
+    def test_containers_answered_by_roots(self):
+        matcher = KeywordMatcher(["naked call", "naked calls", "soft dollar"])
+        assert matcher._roots == ("naked call", "soft dollar")
+        assert matcher.search_any("buy naked calls")
+
+    def test_empty_matcher(self):
+        assert not KeywordMatcher([]).search_any("anything")
+
+
+class TestAnalyzerVocabulary:
+    """Test that the analyzer compiles its full vocabulary."""
+
+    def test_default_vocabulary_compiled(self):
+        keywords = set(RedFlagAnalyzer()._matcher.keywords)
+        assert {"off the record", "mifid", "naked calls", "short squeeze", "xbi"} <= keywords
+
+    def test_config_tokens_compiled(self):
+        config = {"mnpi_indicators": [("secret", "SECRET_LANGUAGE")]}
+        keywords = set(RedFlagAnalyzer(config=config)._matcher.keywords)
+        assert "secret" in keywords
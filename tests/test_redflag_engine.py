@@ -4,6 +4,7 @@ Tests for RedFlag Analyst Engine
 Run with: pytest tests/ -v
 """
 
+import asyncio
 import os
 import sys
 
@@ -12,12 +13,17 @@ import pytest
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from bounded_executor import BoundedExecutor
 from redflag_engine import (
     _SEVERITY_TO_SCORE,
     MAX_INPUT_CHARS,
+    STREAM_OVERLAP_CHARS,
+    Flag,
     RedFlagAnalyzer,
     _max_severity,
 )
+from result_cache import ResultCache
+from rule_registry import Rule
 
 
 class TestSeverityUtilities:
@@ -365,6 +371,34 @@ class TestEdgeCases:
         assert result["overall"]["gate_decision"] == "PASS"
 
 
+class TestNormalization:
+    """Test text normalization ahead of matching."""
+
+    @pytest.fixture
+    def analyzer(self):
+        return RedFlagAnalyzer()
+
+    def test_ascii_whitespace_and_case(self, analyzer):
+        assert analyzer._normalize("  Off\tTHE\n\n Record \x0c ") == "off the record"
+
+    def test_unicode_whitespace(self, analyzer):
+        assert analyzer._normalize("off\u00a0the\u2003record\u3000") == "off the record"
+
+    def test_typographic_quotes(self, analyzer):
+        text = "\u2018told me\u2019 \u201cnot public\u201d CEO\u02bcs"
+        assert analyzer._normalize(text) == "'told me' \"not public\" ceo's"
+
+    def test_dashes_fold_to_hyphen(self, analyzer):
+        result = analyzer.analyze("Small\u2013cap long hedged with an ETF.")
+        flag_ids = [f["id"] for f in result["flags"]]
+        assert "LIQUIDITY_BASIS_MISMATCH" in flag_ids
+
+    def test_zero_width_and_soft_hyphen_removed(self, analyzer):
+        result = analyzer.analyze("An in\u00adsider said it is not\u200b public.")
+        flags = [f for f in result["flags"] if f["id"] == "MNPI_TIPPING_RISK"]
+        assert flags[0]["evidence"] == ["insider", "not public"]
+
+
 class TestConfigOverride:
     """Test that detection thresholds can be overridden via config."""
 
@@ -399,3 +433,433 @@ class TestConfigOverride:
         flags = [f for f in result["flags"] if f["id"] == "EXPERT_NETWORK_STEERING"]
         assert len(flags) == 1
         assert flags[0]["severity"] == "MEDIUM"
+
+
+class TestAnalyzeMany:
+    """Test the batch analysis API."""
+
+    TEXTS = [
+        "Strong fundamentals support our buy thesis.",
+        "Off the record, the insider confirmed the deal.",
+        "We had 10 calls with the expert to understand the thesis.",
+        "We plan to buy naked calls to maximize leverage ahead of earnings.",
+        "",
+    ]
+
+    @staticmethod
+    def _strip_timestamp(result):
+        return {k: v for k, v in result.items() if k != "timestamp_utc"}
+
+    def test_serial_matches_analyze(self):
+        analyzer = RedFlagAnalyzer()
+        results = list(analyzer.analyze_many(self.TEXTS, workers=1))
+        assert [i for i, _ in results] == list(range(len(self.TEXTS)))
+        for (_, result), text in zip(results, self.TEXTS):
+            assert self._strip_timestamp(result) == self._strip_timestamp(analyzer.analyze(text))
+
+    def test_process_pool_preserves_order(self):
+        analyzer = RedFlagAnalyzer()
+        texts = self.TEXTS * 4
+        results = list(analyzer.analyze_many(iter(texts), workers=2, batch_size=3))
+        assert [i for i, _ in results] == list(range(len(texts)))
+        gates = [r["overall"]["gate_decision"] for _, r in results]
+        assert gates[:5] == ["PASS", "AUTO_REJECT", "PM_REVIEW", "AUTO_REJECT", "PASS"]
+
+    def test_unordered_yields_every_index(self):
+        analyzer = RedFlagAnalyzer()
+        results = list(analyzer.analyze_many(self.TEXTS, workers=2, ordered=False, batch_size=1))
+        assert sorted(i for i, _ in results) == list(range(len(self.TEXTS)))
+        by_index = dict(results)
+        assert by_index[1]["overall"]["gate_decision"] == "AUTO_REJECT"
+
+    def test_workers_use_effective_config(self):
+        config = {"expert_network": {"medium": 5, "high": 8, "critical": 12}}
+        analyzer = RedFlagAnalyzer(config=config)
+        [(_, result)] = list(analyzer.analyze_many(["We had 5 calls with experts."], workers=2))
+        assert result["overall"]["severity"] == "MEDIUM"
+
+    @pytest.mark.parametrize("ordered", [True, False])
+    def test_process_pool_uses_result_cache(self, ordered):
+        cache = ResultCache()
+        analyzer = RedFlagAnalyzer(cache=cache)
+        first = dict(analyzer.analyze_many(self.TEXTS, workers=2, ordered=ordered, batch_size=2))
+        assert (cache.hits, cache.misses, len(cache)) == (0, 5, 5)
+
+        serial = ResultCache()
+        for text in self.TEXTS:
+            RedFlagAnalyzer(cache=serial).analyze(text)
+        assert dict(cache._memory) == dict(serial._memory)  # stored as analyze() stores them
+
+        second = dict(analyzer.analyze_many(self.TEXTS, workers=2, ordered=ordered, batch_size=2))
+        assert cache.hits == 5
+        assert {i: self._strip_timestamp(r) for i, r in second.items()} == {
+            i: self._strip_timestamp(r) for i, r in first.items()
+        }
+
+    def test_input_limit_enforced_in_workers(self):
+        analyzer = RedFlagAnalyzer(max_input_chars=10)
+        with pytest.raises(ValueError, match="exceeds maximum allowed length"):
+            list(analyzer.analyze_many(["x" * 11], workers=2))
+
+
+class TestAnalyzeAsync:
+    """Test the coroutine API."""
+
+    def test_matches_analyze(self):
+        analyzer = RedFlagAnalyzer()
+        texts = TestAnalyzeMany.TEXTS
+
+        async def main():
+            executor = BoundedExecutor(max_workers=2)
+            try:
+                return await asyncio.gather(
+                    *(analyzer.aanalyze(text, executor=executor) for text in texts),
+                    analyzer.aanalyze(texts[1], "gate"),
+                )
+            finally:
+                executor.close()
+
+        *results, gated = asyncio.run(main())
+        strip = TestAnalyzeMany._strip_timestamp
+        assert [strip(r) for r in results] == [strip(analyzer.analyze(t)) for t in texts]
+        assert gated["overall"] == analyzer.analyze(texts[1], "gate")["overall"]
+
+    def test_errors_raised_in_caller(self):
+        analyzer = RedFlagAnalyzer(max_input_chars=10)
+        with pytest.raises(ValueError, match="maximum allowed length"):
+            asyncio.run(analyzer.aanalyze("x" * 11))
+
+
+class TestAnalyzeStream:
+    """Test chunked / streaming analysis."""
+
+    @pytest.fixture
+    def analyzer(self):
+        return RedFlagAnalyzer()
+
+    @staticmethod
+    def _strip_timestamp(result):
+        return {k: v for k, v in result.items() if k != "timestamp_utc"}
+
+    def test_matches_single_shot_analysis(self, analyzer):
+        text = (
+            "After 15 calls with the expert, a friend (an investigator) said things look good. "
+            "We'll pay for corporate access to the French CEO using soft dollars."
+        )
+        chunks = [text[i : i + 7] for i in range(0, len(text), 7)]
+        assert self._strip_timestamp(analyzer.analyze_stream(chunks)) == self._strip_timestamp(
+            analyzer.analyze(text)
+        )
+
+    def test_phrase_spanning_chunk_boundary(self, analyzer):
+        result = analyzer.analyze_stream(iter(["The CFO spoke off the", "\nrecord about it."]))
+        flags = [f for f in result["flags"] if f["id"] == "MNPI_TIPPING_RISK"]
+        assert flags[0]["evidence"] == ["off the record"]
+        assert flags[0]["severity"] == "HIGH"
+
+    def test_expert_count_spanning_boundary(self, analyzer):
+        result = analyzer.analyze_stream(["We logged 2", "0 hours with the expert."])
+        flags = [f for f in result["flags"] if f["id"] == "EXPERT_NETWORK_STEERING"]
+        assert flags[0]["severity"] == "CRITICAL"
+        assert flags[0]["evidence"] == ["20 hours"]
+
+    def test_no_input_size_limit(self):
+        analyzer = RedFlagAnalyzer(max_input_chars=100)
+        chunks = ["Strong fundamentals. " * 50] * 10 + ["An insider confirmed the deal."]
+        result = analyzer.analyze_stream(chunks)
+        assert result["overall"]["gate_decision"] == "AUTO_REJECT"
+
+    def test_empty_stream(self, analyzer):
+        result = analyzer.analyze_stream([])
+        assert result["overall"]["gate_decision"] == "PASS"
+        assert result["flags"] == []
+
+    def test_explicit_overlap(self, analyzer, monkeypatch):
+        used = []
+        monkeypatch.setattr(analyzer, "_gate_stream", lambda chunks, overlap: used.append(overlap))
+        for overlap in (None, 0, 1_000):
+            analyzer.analyze_stream([], overlap, mode="gate")
+        longest = max(map(len, analyzer._matcher.keywords))
+        assert used == [STREAM_OVERLAP_CHARS, longest, 1_000]
+
+    def test_zero_overlap_still_finds_spanning_phrase(self, analyzer):
+        result = analyzer.analyze_stream(["The CFO spoke off the", "\nrecord about it."], 0)
+        assert result["overall"]["gate_decision"] == "AUTO_REJECT"
+
+    def test_negative_overlap_rejected(self, analyzer):
+        with pytest.raises(ValueError, match="overlap"):
+            analyzer.analyze_stream(["text"], -1)
+
+
+class TestEvidenceSpans:
+    """Test evidence offsets back into the original text."""
+
+    @pytest.fixture
+    def analyzer(self):
+        return RedFlagAnalyzer()
+
+    def test_spans_point_into_original_text(self, analyzer):
+        text = "Notes.\n\n  The CFO spoke OFF THE\n   RECORD about an In\u00adsider."
+        result = analyzer.analyze(text)
+        [flag] = [f for f in result["flags"] if f["id"] == "MNPI_TIPPING_RISK"]
+        assert len(flag["evidence_spans"]) == len(flag["evidence"])
+        for token, span in zip(flag["evidence"], flag["evidence_spans"]):
+            assert span["text"] == text[span["start"] : span["end"]]
+            assert analyzer._normalize(span["text"]) == token
+        spans = {s["text"]: s for s in flag["evidence_spans"]}
+        assert "OFF THE\n   RECORD" in spans
+        assert "In\u00adsider" in spans
+
+    def test_context_window(self, analyzer):
+        text = "Background. " * 20 + "An insider confirmed it. " + "Filler. " * 20
+        result = analyzer.analyze(text)
+        [span] = result["flags"][0]["evidence_spans"]
+        assert "An insider confirmed it." in span["context"]
+        assert len(span["context"]) < len(text)
+
+    def test_expert_network_span(self, analyzer):
+        text = "We logged 20\nhours with the expert."
+        [flag] = analyzer.analyze(text)["flags"]
+        assert flag["evidence_spans"][0]["text"] == "20\nhours"
+        assert flag["evidence_spans"][0]["start"] == text.index("20")
+
+    def test_offset_map_only_built_when_flags_fire(self, analyzer, monkeypatch):
+        import redflag_engine
+
+        built = []
+
+        class CountingMap(redflag_engine.OffsetMap):
+            def __init__(self, *args, **kwargs):
+                built.append(1)
+                super().__init__(*args, **kwargs)
+
+        monkeypatch.setattr(redflag_engine, "OffsetMap", CountingMap)
+        analyzer.analyze("Strong  fundamentals\n\nand a clean balance sheet.")
+        assert built == []
+        analyzer.analyze("An  insider leak.")
+        assert built == [1]
+
+    def test_stream_spans_match_single_shot(self, analyzer):
+        text = ("Filler text.\n\n" * 40) + "A friend said it is not  public. " + ("More.  " * 40)
+        chunks = [text[i : i + 11] for i in range(0, len(text), 11)]
+        streamed = analyzer.analyze_stream(chunks)
+        single = analyzer.analyze(text)
+        assert streamed["flags"] == single["flags"]
+
+    def test_cached_result_spans_follow_input(self):
+        analyzer = RedFlagAnalyzer(cache=ResultCache())
+        analyzer.analyze("An insider leak.")
+        spaced = "An  insider\nleak."
+        result = analyzer.analyze(spaced)
+        assert analyzer.cache.hits == 1
+        spans = result["flags"][0]["evidence_spans"]
+        assert [spaced[s["start"] : s["end"]] for s in spans] == ["insider", "leak"]
+
+
+class TestGateMode:
+    """Test analyze(mode="gate") for gate-only callers."""
+
+    @pytest.fixture
+    def analyzer(self):
+        return RedFlagAnalyzer()
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "Strong fundamentals and a clean balance sheet.",
+            "We should hedge with the XBI ETF against our small-cap long.",
+            "We had 12 calls with the expert and the optimizer likes it.",
+            "Off the record, the insider confirmed the deal.",
+            "A friend (an investigator) said things look good.",
+        ],
+    )
+    def test_gate_decision_matches_full_analysis(self, analyzer, text):
+        full = analyzer.analyze(text)["overall"]
+        gate = analyzer.analyze(text, mode="gate")["overall"]
+        assert gate["gate_decision"] == full["gate_decision"]
+        if full["gate_decision"] != "AUTO_REJECT":
+            assert gate == full
+
+    def test_returns_aggregate_only(self, analyzer):
+        result = analyzer.analyze("An insider leak.", mode="gate")
+        assert result["mode"] == "gate"
+        assert "flags" not in result
+        assert result["overall"]["gate_decision"] == "AUTO_REJECT"
+
+    def test_critical_rules_tried_first(self, analyzer):
+        # MNPI can reach CRITICAL, so it is evaluated before the HIGH-only
+        # options rule and reports the exact severity.
+        text = "Buy naked calls; a friend who is an investigator told me."
+        assert analyzer.analyze(text, mode="gate")["overall"]["severity"] == "CRITICAL"
+
+    def test_served_from_full_cache_entry(self):
+        cache = ResultCache()
+        analyzer = RedFlagAnalyzer(cache=cache)
+        full = analyzer.analyze("We had 5 calls with experts.")
+        gate = analyzer.analyze("We had 5 calls with experts.", mode="gate")
+        assert cache.hits == 1
+        assert gate["overall"] == full["overall"]
+
+    def test_gate_results_not_cached(self):
+        cache = ResultCache()
+        analyzer = RedFlagAnalyzer(cache=cache)
+        analyzer.analyze("An insider leak.", mode="gate")
+        assert len(cache) == 0
+        assert analyzer.analyze("An insider leak.")["flags"]
+
+    def test_unknown_mode(self, analyzer):
+        with pytest.raises(ValueError, match="Unknown mode"):
+            analyzer.analyze("text", mode="fast")
+
+    def test_input_limit_still_enforced(self):
+        with pytest.raises(ValueError, match="exceeds maximum allowed length"):
+            RedFlagAnalyzer(max_input_chars=5).analyze("x" * 6, mode="gate")
+
+
+class TestGateStream:
+    """Test analyze_stream(mode="gate") stopping early on a lazy source."""
+
+    @pytest.fixture
+    def analyzer(self):
+        return RedFlagAnalyzer()
+
+    @staticmethod
+    def _pages(texts, pulled):
+        for text in texts:
+            pulled.append(text)
+            yield text
+
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "Strong fundamentals and a clean balance sheet.",
+            "We had 12 calls with the expert and the optimizer likes it.",
+            "We logged 20 hours with the expert.",
+            "Off the record, the insider confirmed the deal.",
+        ],
+    )
+    def test_gate_decision_matches_single_shot(self, analyzer, text):
+        chunks = [text[i : i + 7] for i in range(0, len(text), 7)]
+        streamed = analyzer.analyze_stream(chunks, mode="gate")
+        single = analyzer.analyze(text, mode="gate")
+        assert streamed["mode"] == "gate"
+        assert streamed["overall"]["gate_decision"] == single["overall"]["gate_decision"]
+        if single["overall"]["gate_decision"] != "AUTO_REJECT":
+            assert streamed["overall"] == single["overall"]
+
+    def test_stops_pulling_chunks_once_rejected(self, analyzer):
+        pulled = []
+        pages = ["Revenue grew.", "An insider confirmed the deal.", "Margins expanded."] * 100
+        result = analyzer.analyze_stream(self._pages(pages, pulled), mode="gate")
+        assert result["overall"]["gate_decision"] == "AUTO_REJECT"
+        assert len(pulled) == 2
+
+    def test_reads_everything_below_reject(self, analyzer):
+        pulled = []
+        pages = ["We had 12 calls with the expert. "] + ["Revenue grew. "] * 20
+        result = analyzer.analyze_stream(self._pages(pages, pulled), mode="gate")
+        assert result["overall"]["gate_decision"] == "PM_REVIEW"
+        assert len(pulled) == 21
+
+    def test_rule_more_text_can_lower_does_not_stop(self):
+        rules = [
+            Rule(
+                id="UNHEDGED",
+                title="t",
+                when={"all": ["leverage", {"not": "hedge"}]},
+                severity="HIGH",
+            )
+        ]
+        analyzer = RedFlagAnalyzer(rules=rules)
+        pulled = []
+        pages = ["Gross leverage is 3x.", "Revenue grew.", "We hedge the book."]
+        result = analyzer.analyze_stream(self._pages(pages, pulled), mode="gate")
+        assert len(pulled) == 3
+        assert result["overall"] == analyzer.analyze(" ".join(pages), mode="gate")["overall"]
+
+    def test_unknown_mode(self, analyzer):
+        with pytest.raises(ValueError, match="Unknown mode"):
+            analyzer.analyze_stream([], mode="fast")
+
+
+class TestFlagTemplates:
+    """Test shared flag templates and the slotted Flag."""
+
+    def test_flag_is_slotted(self):
+        analyzer = RedFlagAnalyzer()
+        template = analyzer._templates["MNPI_TIPPING_RISK", "HIGH"]
+        flag = Flag.from_template(template, ["leak"])
+        assert not hasattr(flag, "__dict__")
+        with pytest.raises(AttributeError):
+            flag.extra = 1
+
+    def test_to_dict_key_order_and_copies(self):
+        analyzer = RedFlagAnalyzer()
+        template = analyzer._templates["MNPI_TIPPING_RISK", "HIGH"]
+        evidence = ["leak"]
+        flag = Flag.from_template(template, evidence)
+        out = flag.to_dict()
+        assert list(out) == [
+            "id",
+            "title",
+            "severity",
+            "score",
+            "evidence",
+            "explanation",
+            "recommended_action",
+            "evidence_spans",
+        ]
+        assert out["score"] == 75
+        assert out["evidence"] == evidence and out["evidence"] is not evidence
+
+    def test_templates_are_immutable(self):
+        template = RedFlagAnalyzer()._templates["MNPI_TIPPING_RISK", "HIGH"]
+        with pytest.raises(AttributeError):
+            template.severity = "LOW"
+
+    def test_default_rule_set_shared(self):
+        a, b = RedFlagAnalyzer(), RedFlagAnalyzer(config={})
+        assert a.rules is b.rules
+        assert a._templates is b._templates
+
+    def test_config_override_gets_own_rule_set(self):
+        default = RedFlagAnalyzer()
+        custom = RedFlagAnalyzer(
+            config={"expert_network": {"medium": 5, "high": 8, "critical": 12}}
+        )
+        assert custom.rules is not default.rules
+
+    def test_results_do_not_share_lists(self):
+        analyzer = RedFlagAnalyzer()
+        first = analyzer.analyze("An insider leak.")
+        first["flags"][0]["evidence"].append("tampered")
+        second = analyzer.analyze("An insider leak.")
+        assert "tampered" not in second["flags"][0]["evidence"]
+
+
+class TestScanReuse:
+    """Test scan() and analyze(scan=...) as used by RedFlagPipeline."""
+
+    @pytest.fixture
+    def analyzer(self):
+        return RedFlagAnalyzer()
+
+    def test_scan_normalizes_and_finds_keywords(self, analyzer):
+        scan = analyzer.scan("  Off the\nRecord,  a FRIEND said.  ")
+        assert scan.normalized == "off the record, a friend said."
+        assert scan.hits["off the record"] == 0
+        assert scan.hits["friend"] == 18
+
+    def test_analyze_with_scan_matches_plain_analyze(self, analyzer):
+        original = "Off the record,\n\n\nthe insider said 25 calls."
+        edited = "Off the record,\n\nthe insider said 25 calls."
+        with_scan = analyzer.analyze(edited, scan=analyzer.scan(original))
+        plain = analyzer.analyze(edited)
+        with_scan.pop("timestamp_utc")
+        plain.pop("timestamp_utc")
+        assert with_scan == plain
+
+    def test_scan_is_used_as_given(self, analyzer):
+        scan = analyzer.scan("An insider leak.")
+        result = analyzer.analyze("Nothing to see here.", scan=scan)
+        assert result["overall"]["gate_decision"] == "AUTO_REJECT"
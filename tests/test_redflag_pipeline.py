@@ -0,0 +1,283 @@
+"""
+Tests for redflag_pipeline.py
+
+Run with: pytest tests/test_redflag_pipeline.py -v
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import boilerplate_filter
+from boilerplate_filter import BoilerplateFilter, BoilerplateFilterConfig
+from redflag_engine import RedFlagAnalyzer
+from redflag_pipeline import RedFlagPipeline
+
+_EXAMPLES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "examples"
+)
+
+BOILERPLATE_NOTE = (
+    "Investment Thesis\n"
+    "Off the record, the insider confirmed the deal.\n\n"
+    "This report is for institutional investors only.\n\n"
+    "Important Disclosures\n"
+    "The firm may do business with companies covered.\n\n"
+    "Valuation\n"
+    "We did 25 calls with former employees."
+)
+
+
+def _without_timestamp(result):
+    return {k: v for k, v in result.items() if k != "timestamp_utc"}
+
+
+def _separate_stages(text, config=None):
+    """The three stages run one after another, as before the pipeline."""
+    analyzer = RedFlagAnalyzer()
+    bp_filter = BoilerplateFilter(config, protected=analyzer.protected_keywords)
+    return analyzer.analyze(bp_filter.filter(text).filtered_text)
+
+
+class TestMatchesSeparateStages:
+    """The pipeline's output is the output of load -> filter -> analyze."""
+
+    @pytest.mark.parametrize(
+        "name", ["analyst_note_clean.txt", "analyst_note_risky.txt", "analyst_note_regulatory.txt"]
+    )
+    def test_examples(self, name):
+        with open(os.path.join(_EXAMPLES_DIR, name), encoding="utf-8") as f:
+            text = f.read()
+        run = RedFlagPipeline().analyze_text(text)
+        del run.result["preprocessing"]
+        assert _without_timestamp(run.result) == _without_timestamp(_separate_stages(text))
+
+    def test_document_with_removed_boilerplate(self):
+        run = RedFlagPipeline().analyze_text(BOILERPLATE_NOTE)
+        assert run.filter_result.removed_regions
+        del run.result["preprocessing"]
+        assert _without_timestamp(run.result) == _without_timestamp(
+            _separate_stages(BOILERPLATE_NOTE)
+        )
+        assert run.result["overall"]["gate_decision"] == "AUTO_REJECT"
+
+    def test_keyword_joined_across_removed_paragraph(self):
+        # Removing the middle paragraph joins "off the" and "record".
+        text = "Off the\n\nThis report is for institutional investors only.\n\nrecord"
+        run = RedFlagPipeline().analyze_text(text)
+        assert run.text == "Off the\n\nrecord"
+        del run.result["preprocessing"]
+        assert _without_timestamp(run.result) == _without_timestamp(_separate_stages(text))
+
+    def test_configured_protected_keywords(self):
+        config = BoilerplateFilterConfig(protected_keywords=["Acme"])
+        text = "Revenue grew.\n\nThis report is for institutional investors only. Acme"
+        run = RedFlagPipeline(filter_config=config).analyze_text(text)
+        assert "Acme" in run.text
+        assert run.filter_result.sections_removed == []
+
+    def test_without_filter(self):
+        run = RedFlagPipeline(use_filter=False).analyze_text(BOILERPLATE_NOTE)
+        assert run.filter_result is None
+        assert run.text == BOILERPLATE_NOTE
+        assert "preprocessing" not in run.result
+        assert _without_timestamp(run.result) == _without_timestamp(
+            RedFlagAnalyzer().analyze(BOILERPLATE_NOTE)
+        )
+
+
+class TestSingleScan:
+    """The pipeline filters first and normalizes and scans only the kept text."""
+
+    def test_whitespace_only_filtering_normalizes_identically(self):
+        text = "  Revenue grew.\n\n\n\nThe insider said  so.  \n"
+        analyzer = RedFlagAnalyzer()
+        run = RedFlagPipeline(analyzer).analyze_text(text)
+        assert run.filter_result.removed_regions == []
+        assert run.text != text
+        assert analyzer.scan(run.text) == analyzer.scan(text)
+
+    @pytest.mark.parametrize("text", ["Off the record, revenue grew.", BOILERPLATE_NOTE])
+    def test_kept_text_normalized_and_scanned_once(self, monkeypatch, text):
+        analyzer = RedFlagAnalyzer()
+        normalized, scanned = [], []
+        normalize, scan = analyzer._normalize, analyzer.rules.matcher.scan
+        monkeypatch.setattr(analyzer, "_normalize", lambda t: normalized.append(t) or normalize(t))
+        monkeypatch.setattr(analyzer.rules.matcher, "scan", lambda t: scanned.append(t) or scan(t))
+        run = RedFlagPipeline(analyzer).analyze_text(text)
+        assert normalized == [run.text]
+        assert len(scanned) == 1
+
+
+class TestMetadata:
+    """Input and preprocessing metadata attached to file results."""
+
+    def test_analyze_file(self, risky_txt_path):
+        result = RedFlagPipeline().analyze_file(risky_txt_path)
+        assert result["input"]["path"] == risky_txt_path
+        assert result["input"]["format"] == "txt"
+        assert result["preprocessing"]["boilerplate_filter"] is True
+        assert list(result)[-2:] == ["input", "preprocessing"]
+
+    def test_preprocessing_regions(self):
+        result = RedFlagPipeline().analyze_text(BOILERPLATE_NOTE).result
+        meta = result["preprocessing"]
+        assert meta["chars_removed"] == meta["original_chars"] - meta["filtered_chars"]
+        for start, end, category in meta["removed_regions"]:
+            assert 0 <= start < end <= len(BOILERPLATE_NOTE)
+            assert category.startswith(("section:", "paragraph:"))
+
+    def test_oversized_document_is_streamed(self):
+        analyzer = RedFlagAnalyzer(max_input_chars=1_000)
+        text = "Revenue grew strongly this quarter. " * 100 + "Off the record, the insider said."
+        result = RedFlagPipeline(analyzer).analyze_text(text).result
+        assert result["overall"]["gate_decision"] == "AUTO_REJECT"
+
+
+class TestAsync:
+    """The coroutine API returns what the blocking one does."""
+
+    def test_aanalyze_bytes(self, risky_txt_path, sample_docx_path):
+        uploads = []
+        for path in (risky_txt_path, sample_docx_path):
+            with open(path, "rb") as f:
+                uploads.append((f.read(), os.path.basename(path)))
+        pipeline = RedFlagPipeline()
+
+        async def main():
+            return await asyncio.gather(
+                *(pipeline.aanalyze_bytes(data, name) for data, name in uploads)
+            )
+
+        results = asyncio.run(main())
+        expected = [pipeline.analyze_bytes(*upload) for upload in uploads]
+        assert [_without_timestamp(r) for r in results] == [_without_timestamp(r) for r in expected]
+        assert results[0]["input"]["path"] == "risky.txt"
+        assert results[0]["overall"]["gate_decision"] == "AUTO_REJECT"
+
+    def test_aanalyze_text(self):
+        pipeline = RedFlagPipeline()
+        run = asyncio.run(pipeline.aanalyze_text(BOILERPLATE_NOTE))
+        expected = pipeline.analyze_text(BOILERPLATE_NOTE)
+        assert run.filter_result == expected.filter_result
+        assert _without_timestamp(run.result) == _without_timestamp(expected.result)
+
+
+class TestGateFile:
+    """Page-by-page gating with early exit."""
+
+    def test_stops_at_rejecting_page(self, long_risky_pdf_path):
+        result = RedFlagPipeline().gate_file(long_risky_pdf_path)
+        assert result["mode"] == "gate"
+        assert result["overall"]["gate_decision"] == "AUTO_REJECT"
+        assert result["input"] == {"path": long_risky_pdf_path, "format": "pdf", "pages_read": 3}
+
+    def test_gate_bytes(self, long_risky_pdf_path):
+        with open(long_risky_pdf_path, "rb") as f:
+            result = RedFlagPipeline().gate_bytes(f.read(), "upload.bin")
+        assert result["overall"]["gate_decision"] == "AUTO_REJECT"
+        assert result["input"] == {"path": "upload.bin", "format": "pdf", "pages_read": 3}
+
+    def test_clean_report_read_to_the_end(self, multi_page_pdf_path):
+        result = RedFlagPipeline().gate_file(multi_page_pdf_path)
+        assert result["overall"]["gate_decision"] == "PASS"
+        assert result["input"]["pages_read"] == 3
+
+    @pytest.mark.parametrize("use_filter", [True, False])
+    def test_gate_decision_matches_analyze_file(self, tmp_dir, use_filter):
+        path = os.path.join(tmp_dir, "note.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(BOILERPLATE_NOTE)
+        pipeline = RedFlagPipeline(use_filter=use_filter)
+        gated = pipeline.gate_file(path)
+        full = pipeline.analyze_file(path)
+        assert gated["overall"]["gate_decision"] == full["overall"]["gate_decision"]
+        assert gated["input"]["pages_read"] == 1
+
+    def test_boilerplate_on_later_pages_is_filtered(self, tmp_dir, monkeypatch):
+        pages = [
+            "Investment Thesis\nRevenue grew.",
+            "Important Disclosures\nThe firm may do business with companies covered.",
+            "Valuation\nWe did 12 calls with the expert.",
+        ]
+        pipeline = RedFlagPipeline()
+        monkeypatch.setattr(pipeline.loader, "iter_pages", lambda path: (p for p in pages))
+        monkeypatch.setattr(pipeline.loader, "detect_format", lambda path: "pdf")
+        result = pipeline.gate_file("report.pdf")
+        expected = pipeline.analyze_text("\n\n".join(pages)).result
+        assert result["overall"] == expected["overall"]
+        assert result["overall"]["gate_decision"] == "PM_REVIEW"
+
+
+class TestSession:
+    """Incremental re-analysis of successive drafts."""
+
+    VERSIONS = [
+        BOILERPLATE_NOTE,
+        BOILERPLATE_NOTE.replace("25 calls", "2 calls"),
+        BOILERPLATE_NOTE.replace("Off the record, the insider", "Management"),
+        "Margins expanded off the\n\nrecord.\n\n" + BOILERPLATE_NOTE,
+        "Revenue grew.",
+        "",
+    ]
+
+    @pytest.mark.parametrize("use_filter", [True, False])
+    def test_updates_match_analyze_text(self, use_filter):
+        pipeline = RedFlagPipeline(use_filter=use_filter)
+        session = pipeline.session()
+        for text in self.VERSIONS:
+            run, expected = session.update(text), pipeline.analyze_text(text)
+            assert _without_timestamp(run.result) == _without_timestamp(expected.result)
+            assert run.filter_result == expected.filter_result
+            assert run.text == expected.text
+
+    def test_keyword_across_paragraphs(self):
+        run = RedFlagPipeline().session().update("Margins expanded off the\n\nrecord.")
+        assert run.result["overall"]["gate_decision"] == "AUTO_REJECT"
+        assert run.result["flags"][0]["evidence"] == ["off the record"]
+
+    def test_only_changed_paragraphs_scanned(self, monkeypatch):
+        analyzer = RedFlagAnalyzer()
+        session = RedFlagPipeline(analyzer).session()
+        session.update(BOILERPLATE_NOTE)
+        scanned = []
+        scan = analyzer.scan
+        monkeypatch.setattr(analyzer, "scan", lambda t: scanned.append(t) or scan(t))
+        session.update(BOILERPLATE_NOTE.replace("25 calls", "2 calls"))
+        assert scanned == ["Valuation\nWe did 2 calls with former employees."]
+
+    def test_entries_follow_latest_version(self):
+        session = RedFlagPipeline().session()
+        session.update(BOILERPLATE_NOTE)
+        session.update("Revenue grew.\n\nMargins expanded.")
+        assert set(session._pieces) == {"Revenue grew.", "Margins expanded."}
+        assert set(session._memo) == {"Revenue grew.", "Margins expanded."}
+
+    def test_mostly_boilerplate_document_classified_once(self, monkeypatch):
+        body = [f"Revenue in segment {i} grew {i}% on pricing." for i in range(10)]
+        disclosures = [
+            f"This report is for institutional investors only. Reference {i}." for i in range(90)
+        ]
+        text = "\n\n".join(body + disclosures)
+        session = RedFlagPipeline().session()
+        session.update(text)
+        assert len(session._memo) == 100
+
+        classified = []
+        match = boilerplate_filter._ParagraphClassifier.match
+        monkeypatch.setattr(
+            boilerplate_filter._ParagraphClassifier,
+            "match",
+            lambda self, lower: classified.append(lower) or match(self, lower),
+        )
+        for version in range(3):
+            run = session.update(text.replace("segment 5 grew", f"segment 5 fell {version}"))
+            assert run.filter_result.sections_removed.count("paragraph:disclaimer") == 90
+        assert classified == [f"revenue in segment 5 fell {v} 5% on pricing." for v in range(3)]
+        assert len(session._memo) == 100
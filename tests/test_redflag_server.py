@@ -0,0 +1,348 @@
+"""
+Tests for redflag_server.py, redflag_client.py and run_redflag.py's
+serve / --server modes.
+
+Run with: pytest tests/test_redflag_server.py -v
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import redflag_client
+import run_redflag
+from document_loader import PDF_TEXT_MODES
+from redflag_pipeline import RedFlagPipeline
+from redflag_server import GateServer
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+
+
+def _start(server: GateServer, address: str):
+    """Serve *address* on a background thread; return ``(served_address, thread)``."""
+    ready = threading.Event()
+    served = []
+
+    def on_ready(addr: str) -> None:
+        served.append(addr)
+        ready.set()
+
+    thread = threading.Thread(target=server.serve_forever, args=(address, on_ready))
+    thread.start()
+    assert ready.wait(10), "server did not start"
+    return served[0], thread
+
+
+@pytest.fixture
+def socket_dir():
+    # Short path: Unix socket paths are limited to ~100 bytes.
+    path = tempfile.mkdtemp(prefix="rf")
+    yield path
+    shutil.rmtree(path, ignore_errors=True)
+
+
+@pytest.fixture
+def address(socket_dir):
+    server = GateServer()
+    served, thread = _start(server, os.path.join(socket_dir, "gate.sock"))
+    yield served
+    server.stop()
+    thread.join(10)
+
+
+def _strip_timestamp(result: dict) -> dict:
+    result.pop("timestamp_utc", None)
+    return result
+
+
+class TestServer:
+    def test_health(self, address):
+        status, body = redflag_client.request(address, "GET", "/v1/health")
+        assert status == 200
+        health = json.loads(body)
+        assert health["status"] == "ok"
+        assert health["pid"] == os.getpid()
+
+    @pytest.mark.parametrize("use_filter", [True, False])
+    def test_analyze_matches_in_process(self, address, pdf_with_boilerplate_path, use_filter):
+        with open(pdf_with_boilerplate_path, "rb") as f:
+            data = f.read()
+        served = redflag_client.analyze(address, data, "report.pdf", use_filter=use_filter)
+        local = RedFlagPipeline(use_filter=use_filter).analyze_bytes(data, "report.pdf")
+        assert _strip_timestamp(served) == _strip_timestamp(local)
+
+    def test_gate_mode(self, address, risky_pdf_path):
+        with open(risky_pdf_path, "rb") as f:
+            data = f.read()
+        served = redflag_client.analyze(address, data, "risky.pdf", mode="gate")
+        local = RedFlagPipeline().gate_bytes(data, "risky.pdf")
+        assert served["overall"] == local["overall"]
+        assert served["input"] == {"path": "risky.pdf", "format": "pdf", "pages_read": 1}
+
+    def test_pdf_text_mode_checked(self, address, risky_pdf_path):
+        with open(risky_pdf_path, "rb") as f:
+            data = f.read()
+        served = redflag_client.analyze(address, data, "risky.pdf", pdf_text="layout")
+        assert served["overall"]["gate_decision"] == "AUTO_REJECT"
+        with pytest.raises(redflag_client.ServerMismatch, match="'layout' mode"):
+            redflag_client.analyze(address, data, "risky.pdf", pdf_text="fast")
+
+    def test_unsupported_format(self, address):
+        with pytest.raises(redflag_client.ServerError, match="Unsupported file format"):
+            redflag_client.analyze(address, b"\x00\x01", "sheet.xlsx")
+
+    @pytest.mark.parametrize(
+        "method, target, status",
+        [
+            ("GET", "/v1/analyze?filename=a.txt", 405),
+            ("POST", "/v1/analyze", 400),
+            ("POST", "/v1/analyze?filename=a.txt&mode=fast", 400),
+            ("POST", "/v1/analyze?filename=a.txt&filter=yes", 400),
+            ("POST", "/v1/analyze?filename=a.txt&pdf_text=ocr", 400),
+            ("GET", "/nowhere", 404),
+        ],
+    )
+    def test_bad_requests(self, address, method, target, status):
+        got, body = redflag_client.request(address, method, target, b"note")
+        assert got == status
+        assert "error" in json.loads(body)
+
+    def test_document_too_large(self, socket_dir):
+        server = GateServer(max_body=10)
+        address, thread = _start(server, os.path.join(socket_dir, "small.sock"))
+        try:
+            with pytest.raises(redflag_client.ServerError, match="larger than 10 bytes"):
+                redflag_client.analyze(address, b"x" * 11, "note.txt")
+        finally:
+            server.stop()
+            thread.join(10)
+
+    def test_keep_alive(self, address):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(10)
+            sock.connect(address)
+            stream = sock.makefile("rb")
+            for _ in range(3):
+                sock.sendall(b"GET /v1/health HTTP/1.1\r\nHost: redflag\r\n\r\n")
+                assert stream.readline().startswith(b"HTTP/1.1 200")
+                length = 0
+                for line in iter(stream.readline, b"\r\n"):
+                    name, _, value = line.decode("ascii").partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                assert json.loads(stream.read(length))["status"] == "ok"
+
+    def test_tcp(self):
+        server = GateServer()
+        address, thread = _start(server, "127.0.0.1:0")
+        try:
+            assert not address.endswith(":0")
+            result = redflag_client.analyze(address, b"Off the record, a buyout.", "n.txt")
+            assert result["overall"]["gate_decision"] == "AUTO_REJECT"
+        finally:
+            server.stop()
+            thread.join(10)
+
+    def test_socket_removed_on_stop(self, socket_dir):
+        path = os.path.join(socket_dir, "gate.sock")
+        server = GateServer()
+        _, thread = _start(server, path)
+        try:
+            assert os.stat(path).st_mode & 0o077 == 0
+        finally:
+            server.stop()
+            thread.join(10)
+        assert not os.path.exists(path)
+
+    def test_socket_created_private(self, monkeypatch, socket_dir):
+        # Files are created world-accessible unless the server narrows the umask.
+        previous = os.umask(0)
+        modes = []
+        start_unix_server = asyncio.start_unix_server
+
+        async def recording(*args, path, **kwargs):
+            server = await start_unix_server(*args, path=path, **kwargs)
+            modes.append(os.stat(path).st_mode & 0o777)
+            return server
+
+        monkeypatch.setattr(asyncio, "start_unix_server", recording)
+        server = GateServer()
+        try:
+            _, thread = _start(server, os.path.join(socket_dir, "gate.sock"))
+            server.stop()
+            thread.join(10)
+            assert os.umask(0) == 0  # restored once the socket exists
+        finally:
+            os.umask(previous)
+        assert modes and modes[0] & 0o077 == 0
+
+    def test_default_address_directory_created_private(self, monkeypatch, socket_dir):
+        monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+        monkeypatch.setenv("TMPDIR", socket_dir)
+        address = redflag_client.default_address()
+        assert os.path.dirname(address) == os.path.join(socket_dir, f"redflag-{os.getuid()}")
+        server = GateServer()
+        _, thread = _start(server, address)
+        try:
+            info = os.stat(os.path.dirname(address))
+            assert (info.st_uid, info.st_mode & 0o777) == (os.getuid(), 0o700)
+            assert redflag_client.request(address, "GET", "/v1/health")[0] == 200
+        finally:
+            server.stop()
+            thread.join(10)
+
+    def test_shared_default_directory_refused(self, monkeypatch, socket_dir):
+        monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+        monkeypatch.setenv("TMPDIR", socket_dir)
+        address = redflag_client.default_address()
+        os.mkdir(os.path.dirname(address), 0o777)
+        os.chmod(os.path.dirname(address), 0o777)  # e.g. squatted by another user
+        with pytest.raises(PermissionError, match="private to this user"):
+            GateServer().serve_forever(address)
+        assert not os.path.exists(address)
+
+    def test_stale_socket_replaced(self, socket_dir):
+        path = os.path.join(socket_dir, "gate.sock")
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(path)
+        stale.close()  # leaves the file, with nothing listening
+        server = GateServer()
+        _, thread = _start(server, path)
+        try:
+            assert redflag_client.request(path, "GET", "/v1/health")[0] == 200
+        finally:
+            server.stop()
+            thread.join(10)
+
+    def test_live_socket_not_replaced(self, address):
+        with pytest.raises(OSError, match="already listening"):
+            GateServer().serve_forever(address)
+        assert redflag_client.request(address, "GET", "/v1/health")[0] == 200
+
+
+class TestClient:
+    def test_no_server(self, socket_dir):
+        with pytest.raises(redflag_client.ServerUnavailable):
+            redflag_client.analyze(os.path.join(socket_dir, "none.sock"), b"note", "n.txt")
+
+    def test_other_users_server_refused(self, monkeypatch, address):
+        sent = []
+        other_user = os.getuid() + 1
+        monkeypatch.setattr(socket.socket, "sendall", lambda sock, data: sent.append(data))
+        monkeypatch.setattr(os, "getuid", lambda: other_user)
+        with pytest.raises(redflag_client.ServerUnavailable, match="runs as another user"):
+            redflag_client.analyze(address, b"Off the record.", "n.txt")
+        assert sent == []
+
+    def test_default_address_in_runtime_dir(self, monkeypatch):
+        monkeypatch.setenv("XDG_RUNTIME_DIR", "/run/user/1000")
+        assert redflag_client.default_address() == "/run/user/1000/redflag.sock"
+
+    @pytest.mark.parametrize(
+        "address, parsed",
+        [
+            ("/tmp/redflag.sock", ("unix", "/tmp/redflag.sock")),
+            ("127.0.0.1:8765", ("tcp", ("127.0.0.1", 8765))),
+            ("http://localhost:9000/", ("tcp", ("localhost", 9000))),
+            (":8765", ("tcp", ("127.0.0.1", 8765))),
+        ],
+    )
+    def test_parse_address(self, address, parsed):
+        assert redflag_client.parse_address(address) == parsed
+
+
+class TestCli:
+    """run_redflag.py --server gates through the server, or in-process without one."""
+
+    def _run(self, monkeypatch, *argv):
+        monkeypatch.setattr(sys, "argv", ["run_redflag.py", *argv])
+        return run_redflag.main()
+
+    def test_through_server(self, monkeypatch, capsys, address, tmp_dir, risky_txt_path):
+        out_path = os.path.join(tmp_dir, "out.json")
+        code = self._run(
+            monkeypatch, "--input", risky_txt_path, "-o", out_path, "--server", address
+        )
+        assert code == 20
+        assert capsys.readouterr().err == ""
+        with open(out_path, encoding="utf-8") as f:
+            result = json.load(f)
+        assert result["input"]["path"] == risky_txt_path
+
+    def test_gate_only_through_server(self, monkeypatch, address, tmp_dir, risky_txt_path):
+        out_path = os.path.join(tmp_dir, "out.json")
+        monkeypatch.setenv("REDFLAG_SERVER", address)
+        assert (
+            self._run(monkeypatch, "--input", risky_txt_path, "-o", out_path, "--gate-only") == 20
+        )
+        with open(out_path, encoding="utf-8") as f:
+            assert "pages_read" in json.load(f)["input"]
+
+    def test_falls_back_without_server(
+        self, monkeypatch, capsys, socket_dir, tmp_dir, risky_txt_path
+    ):
+        out_path = os.path.join(tmp_dir, "out.json")
+        missing = os.path.join(socket_dir, "none.sock")
+        assert (
+            self._run(monkeypatch, "--input", risky_txt_path, "-o", out_path, "--server", missing)
+            == 20
+        )
+        assert "analyzing in-process" in capsys.readouterr().err
+        assert os.path.exists(out_path)
+
+    def test_other_pdf_text_mode_falls_back(
+        self, monkeypatch, capsys, address, tmp_dir, risky_pdf_path
+    ):
+        out_path = os.path.join(tmp_dir, "out.json")
+        argv = [
+            "--input",
+            risky_pdf_path,
+            "-o",
+            out_path,
+            "--server",
+            address,
+            "--pdf-text",
+            "fast",
+        ]
+        assert self._run(monkeypatch, *argv) == 20
+        err = capsys.readouterr().err
+        assert "'layout' mode; analyzing in-process" in err
+        assert os.path.exists(out_path)
+
+    @pytest.mark.parametrize(
+        "flag, value",
+        [("--cache-db", "r.db"), ("--extract-cache", "x.db"), ("--pdf-workers", "2")],
+    )
+    def test_server_side_flags_analyze_in_process(
+        self, monkeypatch, capsys, address, tmp_dir, risky_txt_path, flag, value
+    ):
+        def not_called(*args, **kwargs):
+            raise AssertionError("sent to the server")
+
+        monkeypatch.setattr(redflag_client, "analyze", not_called)
+        out_path = os.path.join(tmp_dir, "out.json")
+        value = os.path.join(tmp_dir, value) if value.endswith(".db") else value
+        argv = ["--input", risky_txt_path, "-o", out_path, "--server", address, flag, value]
+        assert self._run(monkeypatch, *argv) == 20
+        assert f"NOTE: {flag} not applied by a gate server" in capsys.readouterr().err
+
+    def test_server_error(self, monkeypatch, capsys, address, tmp_dir):
+        path = os.path.join(tmp_dir, "sheet.xlsx")
+        with open(path, "wb") as f:
+            f.write(b"\x00\x01")
+        assert self._run(monkeypatch, "--input", path, "--server", address) == 2
+        assert "Unsupported file format" in capsys.readouterr().err
+
+    def test_pdf_text_choices_match_loader(self):
+        assert run_redflag._PDF_TEXT_MODES == PDF_TEXT_MODES
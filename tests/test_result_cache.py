@@ -0,0 +1,210 @@
+"""
+Tests for result_cache.py
+
+Run with: pytest tests/test_result_cache.py -v
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from redflag_engine import RedFlagAnalyzer
+from result_cache import ExtractionCache, ResultCache, cache_key, config_digest
+
+RISKY = "Off the record, the insider confirmed the deal."
+
+
+class TestResultCache:
+    """Test the LRU and SQLite backends directly."""
+
+    def test_get_miss_then_hit(self):
+        cache = ResultCache()
+        assert cache.get("k") is None
+        cache.put("k", {"a": 1})
+        assert cache.get("k") == {"a": 1}
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_returns_independent_copies(self):
+        cache = ResultCache()
+        cache.put("k", {"a": [1]})
+        first = cache.get("k")
+        first["a"].append(2)
+        assert cache.get("k") == {"a": [1]}
+
+    def test_lru_eviction(self):
+        cache = ResultCache(maxsize=2)
+        cache.put("a", {})
+        cache.put("b", {})
+        cache.get("a")  # "b" becomes least recently used
+        cache.put("c", {})
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a") == {}
+
+    def test_invalid_maxsize(self):
+        with pytest.raises(ValueError, match="maxsize"):
+            ResultCache(maxsize=0)
+
+    def test_sqlite_persists_across_instances(self, tmp_dir):
+        path = os.path.join(tmp_dir, "cache.db")
+        cache = ResultCache(path=path)
+        cache.put("k", {"a": 1})
+        cache.close()
+
+        reopened = ResultCache(maxsize=1, path=path)
+        assert reopened.get("k") == {"a": 1}
+        assert reopened.stats()["persistent"] is True
+        reopened.close()
+
+    def test_sqlite_backs_evicted_entries(self, tmp_dir):
+        cache = ResultCache(maxsize=1, path=os.path.join(tmp_dir, "cache.db"))
+        cache.put("a", {"n": 1})
+        cache.put("b", {"n": 2})
+        assert cache.get("a") == {"n": 1}
+        assert cache.misses == 0
+        cache.close()
+
+    def test_clear(self):
+        cache = ResultCache()
+        cache.put("k", {})
+        cache.get("k")
+        cache.clear()
+        assert cache.stats() == {
+            "hits": 0,
+            "misses": 0,
+            "size": 0,
+            "maxsize": 1024,
+            "persistent": False,
+        }
+
+
+class TestExtractionCache:
+    """Test the on-disk extraction cache directly."""
+
+    @pytest.fixture
+    def cache(self, tmp_dir):
+        cache = ExtractionCache(os.path.join(tmp_dir, "extract.db"))
+        yield cache
+        cache.close()
+
+    def test_round_trip(self, cache):
+        assert cache.get("k") is None
+        cache.put("k", "Page one.\n\nPage two \u2014 caf\u00e9.", "pdf", 2, ["a warning"])
+        assert cache.get("k") == {
+            "text": "Page one.\n\nPage two \u2014 caf\u00e9.",
+            "format": "pdf",
+            "page_count": 2,
+            "warnings": ["a warning"],
+        }
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_text_stored_compressed(self, cache):
+        text = "Revenue grew strongly this quarter. " * 1_000
+        cache.put("k", text, "txt", None, [])
+        assert cache.stats()["bytes"] < len(text) // 10
+
+    def test_persists_across_instances(self, tmp_dir):
+        path = os.path.join(tmp_dir, "extract.db")
+        cache = ExtractionCache(path)
+        cache.put("k", "text", "txt", None, [])
+        cache.close()
+        reopened = ExtractionCache(path)
+        assert reopened.get("k")["text"] == "text"
+        reopened.close()
+
+    def test_least_recently_used_evicted_over_budget(self, tmp_dir, monkeypatch):
+        clock = iter(range(100))
+        monkeypatch.setattr("result_cache.time.time", lambda: next(clock))
+        # Random-looking text barely compresses, so each entry is ~400 bytes.
+        texts = {k: os.urandom(300).hex() for k in "abc"}
+        cache = ExtractionCache(os.path.join(tmp_dir, "extract.db"), max_bytes=1_000)
+        cache.put("a", texts["a"], "txt", None, [])
+        cache.put("b", texts["b"], "txt", None, [])
+        cache.get("a")  # "b" becomes least recently used
+        cache.put("c", texts["c"], "txt", None, [])
+        assert len(cache) == 2
+        assert cache.get("b") is None
+        assert cache.get("a")["text"] == texts["a"]
+        assert cache.stats()["bytes"] <= 1_000
+        cache.close()
+
+    def test_entry_over_budget_not_stored(self, tmp_dir):
+        cache = ExtractionCache(os.path.join(tmp_dir, "extract.db"), max_bytes=10)
+        cache.put("k", os.urandom(100).hex(), "txt", None, [])
+        assert len(cache) == 0
+        cache.close()
+
+    def test_clear(self, cache):
+        cache.put("k", "text", "txt", None, [])
+        cache.get("k")
+        cache.clear()
+        assert cache.stats() == {
+            "hits": 0,
+            "misses": 0,
+            "size": 0,
+            "bytes": 0,
+            "max_bytes": 1 << 30,
+        }
+
+    def test_invalid_budget(self, tmp_dir):
+        with pytest.raises(ValueError, match="max_bytes"):
+            ExtractionCache(os.path.join(tmp_dir, "extract.db"), max_bytes=0)
+
+
+class TestCacheKey:
+    """Test cache key derivation."""
+
+    def test_key_depends_on_all_parts(self):
+        base = cache_key("text", "0.1.0", "cfg")
+        assert base != cache_key("text2", "0.1.0", "cfg")
+        assert base != cache_key("text", "0.2.0", "cfg")
+        assert base != cache_key("text", "0.1.0", "cfg2")
+
+    def test_config_digest_is_order_independent(self):
+        assert config_digest({"a": 1, "b": [1, 2]}) == config_digest({"b": [1, 2], "a": 1})
+
+
+class TestAnalyzerCaching:
+    """Test RedFlagAnalyzer integration."""
+
+    def test_repeat_analysis_served_from_cache(self):
+        cache = ResultCache()
+        analyzer = RedFlagAnalyzer(cache=cache)
+        first = analyzer.analyze(RISKY)
+        second = analyzer.analyze(RISKY)
+        assert cache.hits == 1
+        assert cache.misses == 1
+        first.pop("timestamp_utc")
+        second.pop("timestamp_utc")
+        assert first == second
+
+    def test_whitespace_and_case_variants_share_entry(self):
+        cache = ResultCache()
+        analyzer = RedFlagAnalyzer(cache=cache)
+        analyzer.analyze(RISKY)
+        analyzer.analyze("  OFF THE RECORD,\nthe insider   confirmed the deal.  ")
+        assert cache.hits == 1
+
+    def test_config_change_misses(self):
+        cache = ResultCache()
+        RedFlagAnalyzer(cache=cache).analyze("We had 5 calls with experts.")
+        config = {"expert_network": {"medium": 5, "high": 8, "critical": 12}}
+        result = RedFlagAnalyzer(config=config, cache=cache).analyze("We had 5 calls with experts.")
+        assert cache.hits == 0
+        assert result["overall"]["severity"] == "MEDIUM"
+
+    def test_caller_mutation_does_not_leak(self):
+        analyzer = RedFlagAnalyzer(cache=ResultCache())
+        result = analyzer.analyze(RISKY)
+        result["input"] = {"path": "x"}
+        assert "input" not in analyzer.analyze(RISKY)
+
+    def test_cache_property(self):
+        cache = ResultCache()
+        assert RedFlagAnalyzer(cache=cache).cache is cache
+        assert RedFlagAnalyzer().cache is None
@@ -0,0 +1,286 @@
+"""
+Tests for rule_registry.py
+
+Run with: pytest tests/test_rule_registry.py -v
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rule_registry
+from redflag_engine import RedFlagAnalyzer
+from result_cache import ResultCache
+from rule_registry import Rule, RuleError, RuleSet, load_rules
+
+DESK_RULE = {
+    "id": "DESK_SPAC_PIPE",
+    "title": "SPAC PIPE wall-crossing",
+    "when": {"all": ["spac", {"any": ["pipe", "wall-cross"]}]},
+    "severity": "MEDIUM",
+    "escalate": [{"severity": "CRITICAL", "when": "before announcement"}],
+    "evidence": ["spac", "pipe", "wall-cross", "before announcement"],
+    "action": "PM_REVIEW: confirm wall-crossing log.",
+    "actions": {"CRITICAL": "AUTO_REJECT: restricted list check."},
+}
+
+
+def _evaluate(rules, text):
+    rule_set = RuleSet(rules)
+    return rule_set.evaluate(rule_set.matcher.scan(text), rule_set.search_patterns(text))
+
+
+class TestConditions:
+    """Test condition semantics."""
+
+    def test_keyword_and_combinators(self):
+        rule = Rule.from_dict(DESK_RULE)
+        assert _evaluate([rule], "spac only") == []
+        [match] = _evaluate([rule], "the spac pipe")
+        assert (match.severity, match.evidence) == ("MEDIUM", ["spac", "pipe"])
+
+    def test_escalation_and_per_severity_action(self):
+        rule = Rule.from_dict(DESK_RULE)
+        [match] = _evaluate([rule], "spac wall-cross before announcement")
+        assert match.severity == "CRITICAL"
+        assert rule.action_for(match.severity).startswith("AUTO_REJECT")
+        assert rule.action_for("MEDIUM").startswith("PM_REVIEW")
+
+    def test_not(self):
+        rule = Rule(id="R", title="t", when={"all": ["leak", {"not": "public"}]})
+        assert _evaluate([rule], "a leak")
+        assert _evaluate([rule], "a public leak") == []
+
+    def test_at_least(self):
+        rule = Rule(id="R", title="t", when={"at_least": 2, "of": ["a1", "b2", "c3"]})
+        assert _evaluate([rule], "a1 only") == []
+        assert _evaluate([rule], "a1 and c3")
+
+    def test_pattern_count_tiers(self):
+        rule = Rule(
+            id="R",
+            title="t",
+            patterns={"n": r"(\d+) tickets"},
+            when={"pattern": "n"},
+            count={"pattern": "n", "tiers": {"HIGH": 5, "MEDIUM": 2}},
+            evidence=[{"pattern": "n"}],
+        )
+        assert _evaluate([rule], "1 tickets") == []  # below every tier -> NONE
+        [match] = _evaluate([rule], "we sold 3 tickets")
+        assert (match.severity, match.evidence) == ("MEDIUM", ["3 tickets"])
+        assert _evaluate([rule], "9 tickets")[0].severity == "HIGH"
+
+    def test_evidence_sort_and_limit(self):
+        rule = Rule(
+            id="R",
+            title="t",
+            when={"any": ["zz", "aa", "mm"]},
+            evidence=["zz", "aa", "mm"],
+            evidence_sort=True,
+            evidence_limit=2,
+        )
+        assert _evaluate([rule], "zz mm aa")[0].evidence == ["aa", "mm"]
+
+
+class TestRuleSet:
+    """Test compilation and indexing."""
+
+    def test_rule_order_preserved(self):
+        rules = [Rule(id=f"R{i}", title="t", when="leak") for i in (3, 1, 2)]
+        assert [m.rule.id for m in _evaluate(rules, "leak")] == ["R3", "R1", "R2"]
+
+    def test_protected_vocabulary(self):
+        rules = [
+            Rule(id="A", title="t", when={"any": ["leak", "guidance"]}, protect=["leak"]),
+            Rule(id="B", title="t", when="x", evidence=["wall-cross"], protect=["wall-cross"]),
+            Rule(
+                id="C", title="t", when={"not": "y"}, escalate=[{"severity": "HIGH", "when": "z"}]
+            ),
+        ]
+        assert RuleSet(rules).protected.keywords == ("leak", "wall-cross")
+
+    def test_shared_matcher_and_patterns(self):
+        rules = [
+            Rule(id="A", title="t", when="leak", patterns={"p": r"\d+ calls"}),
+            Rule(id="B", title="t", when="leak", patterns={"q": r"\d+ calls"}),
+        ]
+        rule_set = RuleSet(rules)
+        assert rule_set.matcher.keywords == ("leak",)
+        assert len(rule_set.patterns) == 1
+
+    def test_only_reachable_rules_evaluated(self, monkeypatch):
+        rules = [Rule(id=f"R{i}", title="t", when=f"kw{i:03d}") for i in range(200)]
+        rule_set = RuleSet(rules)
+        hits = rule_set.matcher.scan("only kw007 here")
+        evaluated = []
+        original = rule_registry._CompiledRule.evaluate
+
+        def counting(self, hits, matches):
+            evaluated.append(self.rule.id)
+            return original(self, hits, matches)
+
+        monkeypatch.setattr(rule_registry._CompiledRule, "evaluate", counting)
+        assert [m.rule.id for m in rule_set.evaluate(hits, {})] == ["R7"]
+        assert evaluated == ["R7"]
+
+    def test_negated_rules_always_evaluated(self):
+        rule_set = RuleSet([Rule(id="R", title="t", when={"not": "disclaimer"})])
+        assert [m.rule.id for m in rule_set.evaluate({}, {})] == ["R"]
+
+    def test_gate_severity_short_circuits(self, monkeypatch):
+        rules = [
+            Rule(id="LOW", title="t", when="alpha", severity="LOW"),
+            Rule(id="HIGH", title="t", when="beta", severity="HIGH"),
+            Rule(
+                id="ESCALATES",
+                title="t",
+                when="gamma",
+                escalate=[{"severity": "CRITICAL", "when": "delta"}],
+            ),
+        ]
+        rule_set = RuleSet(rules)
+        evaluated = []
+        original = rule_registry._CompiledRule.severity
+
+        def counting(self, hits, matches):
+            evaluated.append(self.rule.id)
+            return original(self, hits, matches)
+
+        monkeypatch.setattr(rule_registry._CompiledRule, "severity", counting)
+        assert rule_set.gate_severity("alpha beta gamma delta") == "CRITICAL"
+        assert evaluated == ["ESCALATES"]
+
+        evaluated.clear()
+        assert rule_set.gate_severity("alpha") == "LOW"
+        assert evaluated == ["ESCALATES", "HIGH", "LOW"]
+
+    def test_settled_severity_skips_rules_more_text_can_lower(self):
+        rules = [
+            Rule(
+                id="NOT", title="t", when={"all": ["leak", {"not": "public"}]}, severity="CRITICAL"
+            ),
+            Rule(
+                id="COUNT",
+                title="t",
+                patterns={"n": r"(\d+) tickets"},
+                when="tickets",
+                count={"pattern": "n", "tiers": {"LOW": 5}, "otherwise": "HIGH"},
+            ),
+            Rule(id="PLAIN", title="t", when="leak", severity="MEDIUM"),
+        ]
+        rule_set = RuleSet(rules)
+        text = "a leak of tickets"
+        hits, matches = rule_set.matcher.scan(text), rule_set.search_patterns(text)
+        assert [m.severity for m in rule_set.evaluate(hits, matches)] == [
+            "CRITICAL",
+            "HIGH",
+            "MEDIUM",
+        ]
+        assert rule_set.settled_severity(hits, matches) == "MEDIUM"
+
+    def test_duplicate_ids_rejected(self):
+        rule = Rule(id="R", title="t", when="x")
+        with pytest.raises(RuleError, match="Duplicate"):
+            RuleSet([rule, rule])
+
+
+class TestValidation:
+    """Test rule definition errors."""
+
+    @pytest.mark.parametrize(
+        "spec, message",
+        [
+            ({"id": "R", "title": "t"}, "missing"),
+            ({"id": "R", "title": "t", "when": "x", "bogus": 1}, "unknown keys"),
+            ({"id": "R", "title": "t", "when": "x", "severity": "SEVERE"}, "unknown severity"),
+            ({"id": "R", "title": "t", "when": {"any": []}}, "non-empty list"),
+            ({"id": "R", "title": "t", "when": {"pattern": "p"}}, "unknown pattern"),
+            ({"id": "R", "title": "t", "when": "x", "patterns": {"p": "("}}, "invalid pattern"),
+            ({"id": "R", "title": "t", "when": {"some": ["x"]}}, "unrecognized condition"),
+            ({"id": "R", "title": "t", "when": "x", "protect": ["y"]}, "protected keyword"),
+        ],
+    )
+    def test_invalid_rules(self, spec, message):
+        with pytest.raises(RuleError, match=message):
+            Rule.from_dict(spec)
+
+
+class TestLoading:
+    """Test loading rule files."""
+
+    def test_load_json(self, tmp_dir):
+        path = os.path.join(tmp_dir, "rules.json")
+        with open(path, "w") as f:
+            json.dump({"rules": [DESK_RULE]}, f)
+        [rule] = load_rules(path)
+        assert rule == Rule.from_dict(DESK_RULE)
+
+    def test_load_yaml(self, tmp_dir):
+        yaml = pytest.importorskip("yaml")
+        path = os.path.join(tmp_dir, "rules.yaml")
+        with open(path, "w") as f:
+            yaml.safe_dump([DESK_RULE], f)
+        assert load_rules(path) == [Rule.from_dict(DESK_RULE)]
+
+    def test_unsupported_extension(self, tmp_dir):
+        path = os.path.join(tmp_dir, "rules.toml")
+        with open(path, "w") as f:
+            f.write("")
+        with pytest.raises(RuleError, match="Unsupported"):
+            load_rules(path)
+
+    def test_round_trip(self):
+        rule = Rule.from_dict(DESK_RULE)
+        assert Rule.from_dict(json.loads(json.dumps(rule.to_dict()))) == rule
+
+
+class TestAnalyzerRules:
+    """Test extra rules in RedFlagAnalyzer."""
+
+    def test_extra_rule_flags_and_gates(self):
+        analyzer = RedFlagAnalyzer(rules=[Rule.from_dict(DESK_RULE)])
+        result = analyzer.analyze("The SPAC PIPE closes before announcement.")
+        [flag] = result["flags"]
+        assert flag["id"] == "DESK_SPAC_PIPE"
+        assert flag["score"] == 100
+        assert flag["evidence_spans"][0]["text"] == "SPAC"
+        assert result["overall"]["gate_decision"] == "AUTO_REJECT"
+
+    def test_extra_rules_follow_builtins(self):
+        analyzer = RedFlagAnalyzer(rules=[Rule.from_dict(DESK_RULE)])
+        ids = [rule.id for rule in analyzer.rules.rules]
+        assert ids[0] == "EXPERT_NETWORK_STEERING"
+        assert ids[-1] == "DESK_SPAC_PIPE"
+
+    def test_rules_change_cache_key(self):
+        cache = ResultCache()
+        text = "The SPAC PIPE closes."
+        assert RedFlagAnalyzer(cache=cache).analyze(text)["flags"] == []
+        result = RedFlagAnalyzer(cache=cache, rules=[Rule.from_dict(DESK_RULE)]).analyze(text)
+        assert cache.hits == 0
+        assert result["flags"][0]["id"] == "DESK_SPAC_PIPE"
+
+    def test_extra_rules_reach_workers(self):
+        analyzer = RedFlagAnalyzer(rules=[Rule.from_dict(DESK_RULE)])
+        [(_, result)] = list(analyzer.analyze_many(["spac pipe"], workers=2))
+        assert result["flags"][0]["id"] == "DESK_SPAC_PIPE"
+
+    def test_stream_uses_rule_patterns(self):
+        rule = Rule(
+            id="R",
+            title="t",
+            patterns={"n": r"(\d+) tickets"},
+            when={"pattern": "n"},
+            severity="HIGH",
+            evidence=[{"pattern": "n"}],
+        )
+        analyzer = RedFlagAnalyzer(rules=[rule])
+        text = "We sold 12 tickets today."
+        streamed = analyzer.analyze_stream([text[:10], text[10:]])
+        assert streamed["flags"] == analyzer.analyze(text)["flags"]
@@ -0,0 +1,87 @@
+"""
+Tests for text_normalizer.py
+
+Run with: pytest tests/test_text_normalizer.py -v
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_normalizer import OffsetMap, context_window, normalize_text
+
+
+def _original_of(text: str, keyword: str) -> str:
+    """Normalize *text* (stripped), find *keyword* and map it back."""
+    normalized = normalize_text(text).strip()
+    pos = normalized.index(keyword)
+    start, end = OffsetMap(text).span(pos, pos + len(keyword))
+    return text[start:end]
+
+
+class TestNormalizeText:
+    """Test the normalization fold itself."""
+
+    def test_non_ascii_lowercased(self):
+        assert normalize_text("\u00c9T\u00c9 INSIDER") == "\u00e9t\u00e9 insider"
+
+    def test_length_preserving_case_fold(self):
+        # Dotted capital I folds to a single "i" rather than "i" + combining dot.
+        assert normalize_text("\u0130NSIDER") == "insider"
+
+    def test_does_not_strip(self):
+        assert normalize_text("  Leak \n") == " leak "
+
+
+class TestOffsetMap:
+    """Test mapping normalized offsets back to the original text."""
+
+    def test_identity_for_single_spaced_text(self):
+        offsets = OffsetMap("An insider leak")
+        assert len(offsets) == 1
+        assert offsets.span(3, 10) == (3, 10)
+
+    def test_collapsed_whitespace(self):
+        assert _original_of("  Off the\n\n   RECORD, he said", "off the record") == (
+            "Off the\n\n   RECORD"
+        )
+
+    def test_dropped_characters(self):
+        assert _original_of("An in\u00adsi\u200bder said so", "insider") == "in\u00adsi\u200bder"
+
+    def test_unicode_whitespace_and_typography(self):
+        text = "\u3000\u201cNot\u00a0\u00a0Public\u201d \u2014 told\u2003me"
+        assert _original_of(text, "not public") == "Not\u00a0\u00a0Public"
+        assert _original_of(text, "told me") == "told\u2003me"
+
+    def test_leading_run_kept_when_not_dropped(self):
+        # Stream chunks that do not follow a space keep their leading space.
+        offsets = OffsetMap("\n\nleak", drop_leading_space=False)
+        assert offsets.to_original(0) == 0
+        assert offsets.span(1, 5) == (2, 6)
+
+    def test_every_character_maps_back(self):
+        text = "\ufeffOff\u200b the  record\t\u00ad\u00adleak \u3000 X"
+        normalized = normalize_text(text).strip()
+        offsets = OffsetMap(text)
+        for pos, ch in enumerate(normalized):
+            original = text[offsets.to_original(pos)]
+            if ch == " ":
+                assert original.isspace() or original in "\u200b\u00ad"
+            else:
+                assert normalize_text(original) == ch
+
+
+class TestContextWindow:
+    """Test evidence context extraction."""
+
+    def test_window_is_clipped_and_collapsed(self):
+        text = "start\n\nof a long   document about a leak and more"
+        start = text.index("leak")
+        assert context_window(text, start, start + 4, width=10) == "t about a leak and more"
+
+    def test_window_at_document_start(self):
+        assert context_window("leak at start", 0, 4, width=3) == "leak at"
@@ -0,0 +1,165 @@
+"""
+text_normalizer.py
+
+Text normalization for the RedFlag engine, plus the offset map that ties
+normalized positions back to the original document.
+
+Normalization folds case, typographic punctuation (curly quotes, dashes) and
+whitespace runs, and drops zero-width characters and soft hyphens. Folding is
+one-to-one except for whitespace runs (collapsed to a single space) and the
+dropped characters, so the mapping back to the original text is a short list
+of segments: within a segment, normalized and original offsets advance in
+step. OffsetMap stores the segment starts in two `array` columns and answers
+lookups with a bisect, and is only built when a flag actually needs evidence
+positions.
+"""
+
+from __future__ import annotations
+
+import re
+from array import array
+from bisect import bisect_right
+from typing import Tuple
+
+# Characters either side of a match included in an evidence context window
+EVIDENCE_CONTEXT_CHARS = 60
+
+# ----------------------------
+# Normalization tables
+# ----------------------------
+# Typographic characters that would otherwise defeat keyword matching.
+# Zero-width characters and soft hyphens are dropped outright.
+_TYPOGRAPHIC_FOLDS = {
+    "\u2018": "'",  # left single quote
+    "\u2019": "'",  # right single quote / apostrophe
+    "\u201a": "'",  # single low-9 quote
+    "\u201b": "'",  # single high-reversed-9 quote
+    "\u02bc": "'",  # modifier letter apostrophe
+    "\u201c": '"',  # left double quote
+    "\u201d": '"',  # right double quote
+    "\u201e": '"',  # double low-9 quote
+    "\u201f": '"',  # double high-reversed-9 quote
+    "\u2010": "-",  # hyphen
+    "\u2011": "-",  # non-breaking hyphen
+    "\u2012": "-",  # figure dash
+    "\u2013": "-",  # en dash
+    "\u2014": "-",  # em dash
+    "\u2015": "-",  # horizontal bar
+    "\u2212": "-",  # minus sign
+    "\u00ad": "",  # soft hyphen
+    "\u200b": "",  # zero-width space
+    "\u200c": "",  # zero-width non-joiner
+    "\u200d": "",  # zero-width joiner
+    "\u2060": "",  # word joiner
+    "\ufeff": "",  # byte-order mark / zero-width no-break space
+    "\u0130": "i",  # dotted capital I (lower() would expand it to two code points)
+}
+_TYPOGRAPHIC_RE = re.compile("[" + "".join(_TYPOGRAPHIC_FOLDS) + "]")
+
+# ASCII fast path: one translate table folds whitespace to " " and A-Z to a-z.
+# Restricting it to ASCII keeps CPython on its cached ASCII translate loop.
+_ASCII_NORMALIZE_TABLE = {cp: " " for cp in range(128) if chr(cp).isspace()}
+_ASCII_NORMALIZE_TABLE.update({cp: cp + 32 for cp in range(ord("A"), ord("Z") + 1)})
+
+_SPACE_RUN_RE = re.compile(" {2,}")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# ----------------------------
+# Offset-map tables
+# ----------------------------
+_DROPPED_CHARS = frozenset(ch for ch, repl in _TYPOGRAPHIC_FOLDS.items() if not repl)
+# Every str.isspace() code point lies below U+3001 (the ideographic space is U+3000).
+_WHITESPACE_CHARS = "".join(chr(cp) for cp in range(0x3001) if chr(cp).isspace())
+_RUN_CLASS = "[" + re.escape(_WHITESPACE_CHARS + "".join(sorted(_DROPPED_CHARS))) + "]"
+# Runs whose normalized length differs from their original length: any run of
+# two or more whitespace / dropped characters, or a lone dropped character.
+# A lone whitespace character folds to one space and needs no segment.
+_LENGTH_CHANGING_RUN_RE = re.compile(
+    _RUN_CLASS + "{2,}|[" + re.escape("".join(sorted(_DROPPED_CHARS))) + "]"
+)
+_LEADING_RUN_RE = re.compile(_RUN_CLASS + "+")
+
+
+def _fold_typographic(m: re.Match) -> str:
+    return _TYPOGRAPHIC_FOLDS[m.group()]
+
+
+def normalize_text(text: str) -> str:
+    """
+    Fold case, typographic punctuation and whitespace runs, without stripping.
+
+    ASCII input (the common case, checked in O(1)) takes one translate pass
+    plus a collapse of space runs. Other input folds the typographic
+    characters, collapses Unicode whitespace and lower-cases.
+    """
+    if text.isascii():
+        return _SPACE_RUN_RE.sub(" ", text.translate(_ASCII_NORMALIZE_TABLE))
+    text = _TYPOGRAPHIC_RE.sub(_fold_typographic, text)
+    return _WHITESPACE_RE.sub(" ", text).lower()
+
+
+def context_window(text: str, start: int, end: int, width: int = EVIDENCE_CONTEXT_CHARS) -> str:
+    """Return *text[start:end]* with up to *width* characters either side, whitespace collapsed."""
+    return " ".join(text[max(0, start - width) : end + width].split())
+
+
+class OffsetMap:
+    """
+    Map offsets in ``normalize_text(original)`` back to *original*.
+
+    Args:
+        original: The text as it was before normalization.
+        drop_leading_space: The caller stripped the leading space the
+            normalized text would otherwise start with (document start, or a
+            stream chunk that follows a trailing space).
+    """
+
+    __slots__ = ("_norm_starts", "_orig_starts")
+
+    def __init__(self, original: str, drop_leading_space: bool = True) -> None:
+        norm_starts = array("q", [0])
+        orig_starts = array("q", [0])
+        shift = 0  # original chars minus normalized chars consumed so far
+        pos = 0
+        if drop_leading_space:
+            lead = _LEADING_RUN_RE.match(original)
+            if lead is not None:
+                pos = lead.end()
+                shift = pos
+                orig_starts[0] = pos
+
+        if original.isascii():
+            # Every run is whitespace and keeps one space. Searching the
+            # translated text for literal spaces beats a \s scan several-fold.
+            folded = original.translate(_ASCII_NORMALIZE_TABLE)
+            for m in _SPACE_RUN_RE.finditer(folded, pos):
+                start, end = m.span()
+                shift += end - start - 1
+                norm_starts.append(end - shift)
+                orig_starts.append(end)
+        else:
+            for m in _LENGTH_CHANGING_RUN_RE.finditer(original, pos):
+                start, end = m.span()
+                kept = 0 if all(ch in _DROPPED_CHARS for ch in m.group()) else 1
+                shift += (end - start) - kept
+                norm_starts.append(end - shift)
+                orig_starts.append(end)
+
+        self._norm_starts = norm_starts
+        self._orig_starts = orig_starts
+
+    def to_original(self, pos: int) -> int:
+        """Original offset of the character at normalized offset *pos*."""
+        i = bisect_right(self._norm_starts, pos) - 1
+        return self._orig_starts[i] + (pos - self._norm_starts[i])
+
+    def span(self, start: int, end: int) -> Tuple[int, int]:
+        """Original ``(start, end)`` covering the normalized slice ``[start:end]``."""
+        if end <= start:
+            orig = self.to_original(start)
+            return orig, orig
+        return self.to_original(start), self.to_original(end - 1) + 1
+
+    def __len__(self) -> int:
+        """Number of segments (1 for text that normalizes one-to-one)."""
+        return len(self._norm_starts)